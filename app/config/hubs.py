@@ -1,32 +1,30 @@
-# Major connecting hubs by region
+import os
+
+# Connecting-flight search tuning
+MAX_HUBS = int(os.getenv("CONNECTING_MAX_HUBS", "2"))  # Routes probed per search
+HUB_SEARCH_CONCURRENCY = int(os.getenv("CONNECTING_CONCURRENCY", "4"))  # Leg searches in flight at once
+TARGET_ITINERARIES = int(os.getenv("CONNECTING_TARGET_ITINERARIES", "6"))  # Stop probing once this many are found
+
+# Hub ranking (see services/route_graph.py)
+MAX_DETOUR = float(os.getenv("CONNECTING_MAX_DETOUR", "1.5"))  # Longest route allowed, as a multiple of the direct distance
+COVERAGE_WEIGHT = float(os.getenv("CONNECTING_COVERAGE_WEIGHT", "0.2"))  # How much a well-connected hub offsets its detour
+HOP_PENALTY_KM = float(os.getenv("CONNECTING_HOP_PENALTY_KM", "800"))  # Cost of an extra stop, in km of flying
+MAX_STOPS = int(os.getenv("CONNECTING_MAX_STOPS", "2"))
+# Route data to rank hubs with: an origin,destination CSV or an OpenFlights
+# routes.dat (see app/data/README.md). Unset, connecting searches rank the
+# major hubs below by great-circle detour.
+ROUTES_DATA_PATH = os.getenv("ROUTES_DATA_PATH", "")
+
+# Major connecting hubs by region, ranked by detour when there is no route data for an airport
 HUBS = {
     "africa": ["JNB", "ADD"],  # Johannesburg, Addis Ababa
     "middle_east": ["DXB", "DOH"],  # Dubai, Doha
     "europe": ["IST", "FRA", "LHR"],  # Istanbul, Frankfurt, London
     "asia": ["SIN", "HKG"],  # Singapore, Hong Kong
+    "north_america": ["JFK", "ATL"],  # New York, Atlanta
+    "south_america": ["GRU", "BOG"],  # Sao Paulo, Bogota
+    "oceania": ["SYD", "AKL"],  # Sydney, Auckland
 }
 
 # Flat list of all hubs
 ALL_HUBS = [hub for hubs in HUBS.values() for hub in hubs]
-
-# Regional mapping based on origin airport prefix (simplified)
-REGION_MAP = {
-    "HRE": "africa",  # Harare
-    "JNB": "africa",
-    "NBO": "africa",  # Nairobi
-    "ADD": "africa",
-    "CAI": "middle_east",  # Cairo
-    "DXB": "middle_east",
-}
-
-def get_hubs_for_origin(origin: str) -> list:
-    """
-    Get prioritized hubs for a given origin.
-    Returns regional hubs first, then other major hubs.
-    """
-    region = REGION_MAP.get(origin)
-    if region:
-        regional_hubs = HUBS.get(region, [])
-        other_hubs = [h for h in ALL_HUBS if h not in regional_hubs]
-        return regional_hubs + other_hubs
-    return ALL_HUBS
@@ -1,53 +1,7 @@
-# Location name to IATA code mapping
-LOCATION_TO_IATA = {
-    # Countries (use main airport)
-    "zimbabwe": "HRE",
-    "south africa": "JNB",
-    "kenya": "NBO",
-    "ethiopia": "ADD",
-    "japan": "NRT",  # Narita
-    "usa": "JFK",
-    "united states": "JFK",
-    "uk": "LHR",
-    "united kingdom": "LHR",
-    "uae": "DXB",
-    "united arab emirates": "DXB",
-    "china": "PEK",
-    "india": "DEL",
-    "france": "CDG",
-    "germany": "FRA",
-    "australia": "SYD",
-    
-    # Cities
-    "harare": "HRE",
-    "johannesburg": "JNB",
-    "cape town": "CPT",
-    "nairobi": "NBO",
-    "addis ababa": "ADD",
-    "tokyo": "NRT",
-    "osaka": "KIX",
-    "kyoto": "KIX",  # Uses Kansai
-    "new york": "JFK",
-    "nyc": "JFK",
-    "new york city": "JFK",
-    "los angeles": "LAX",
-    "london": "LHR",
-    "lon": "LHR",
-    "paris": "CDG",
-    "dubai": "DXB",
-    "doha": "DOH",
-    "singapore": "SIN",
-    "hong kong": "HKG",
-    "beijing": "PEK",
-    "shanghai": "PVG",
-    "mumbai": "BOM",
-    "delhi": "DEL",
-    "sydney": "SYD",
-    "melbourne": "MEL",
-    "frankfurt": "FRA",
-    "amsterdam": "AMS",
-    "istanbul": "IST",
-}
+from app.services.location_index import get_location_index
+
+# Place names, aliases and codes all come from the bundled airport and
+# country data (app/data), see services/location_index.py
 
 def normalize_to_iata(location: str) -> str:
     """
@@ -57,10 +11,11 @@ def normalize_to_iata(location: str) -> str:
     if not location:
         return location
 
-    # Try to find in mapping first (case-insensitive) - handles non-standard codes like LON->LHR
-    normalized = LOCATION_TO_IATA.get(location.lower())
-    if normalized:
-        return normalized
+    # City, alias, airport or country name (case-insensitive, tolerates typos),
+    # or a known code - metro codes like LON map to the main airport (LHR)
+    found = get_location_index().resolve(location)
+    if found:
+        return found.iata
 
     # If already a 3-letter code, assume it's valid IATA
     if len(location) == 3 and location.isalpha():
@@ -69,39 +24,9 @@ def normalize_to_iata(location: str) -> str:
     # Return original (might fail, but at least we tried)
     return location
 
-# IATA code to city name mapping (reverse of above)
-IATA_TO_NAME = {
-    "HRE": "Harare",
-    "JNB": "Johannesburg",
-    "CPT": "Cape Town",
-    "NBO": "Nairobi",
-    "ADD": "Addis Ababa",
-    "NRT": "Tokyo",
-    "KIX": "Osaka",
-    "OSA": "Osaka",
-    "OSD": "Osaka",
-    "JFK": "New York",
-    "LAX": "Los Angeles",
-    "LHR": "London",
-    "LON": "London",  # Handle non-standard codes
-    "CDG": "Paris",
-    "DXB": "Dubai",
-    "DOH": "Doha",
-    "SIN": "Singapore",
-    "HKG": "Hong Kong",
-    "PEK": "Beijing",
-    "PVG": "Shanghai",
-    "BOM": "Mumbai",
-    "DEL": "Delhi",
-    "SYD": "Sydney",
-    "MEL": "Melbourne",
-    "FRA": "Frankfurt",
-    "AMS": "Amsterdam",
-    "IST": "Istanbul",
-}
-
 def iata_to_name(code: str) -> str:
     """Convert IATA code to human-readable city name."""
     if not code:
         return code
-    return IATA_TO_NAME.get(code.upper(), code)
+    found = get_location_index().by_iata(code)
+    return found.city if found else code
@@ -0,0 +1,45 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+AMADEUS_SANDBOX_URL = "https://test.api.amadeus.com"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Which provider backs each service, and what it needs to connect.
+    Read once at startup; see services/provider_registry.py for the choices.
+    """
+    flights_provider: str = "mock"  # "mock" or "amadeus"
+    hotels_provider: str = "mock"
+    cars_provider: str = "mock"
+    nlp_provider: str = "regex"  # "regex", "openai" or "hybrid"
+    visa_provider: str = "travelbriefing"
+
+    amadeus_client_id: Optional[str] = None
+    amadeus_client_secret: Optional[str] = None
+    amadeus_base_url: str = AMADEUS_SANDBOX_URL
+    openai_api_key: Optional[str] = None
+    travelbriefing_base_url: str = "https://travelbriefing.org"
+    visa_prefetch_on_startup: bool = False
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        # USE_REAL_API and NLP_MODE still work when the *_PROVIDER variables aren't set
+        openai_api_key = os.getenv("OPENAI_API_KEY")
+        default_flights = "amadeus" if os.getenv("USE_REAL_API") == "true" else "mock"
+        default_nlp = os.getenv("NLP_MODE") or ("hybrid" if openai_api_key else "regex")
+        return cls(
+            flights_provider=os.getenv("FLIGHTS_PROVIDER", default_flights),
+            hotels_provider=os.getenv("HOTELS_PROVIDER", "mock"),
+            cars_provider=os.getenv("CARS_PROVIDER", "mock"),
+            nlp_provider=os.getenv("NLP_PROVIDER", default_nlp),
+            visa_provider=os.getenv("VISA_PROVIDER", "travelbriefing"),
+            amadeus_client_id=os.getenv("AMADEUS_CLIENT_ID"),
+            amadeus_client_secret=os.getenv("AMADEUS_CLIENT_SECRET"),
+            amadeus_base_url=os.getenv("AMADEUS_BASE_URL", AMADEUS_SANDBOX_URL),
+            openai_api_key=openai_api_key,
+            travelbriefing_base_url=os.getenv("TRAVELBRIEFING_BASE_URL", "https://travelbriefing.org"),
+            visa_prefetch_on_startup=os.getenv("VISA_PREFETCH_ON_STARTUP") == "true"
+        )
@@ -1,16 +1,69 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./travel_buddie.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./travel_buddie.db")
+
+# DB_PROFILE=production turns on WAL and the pragmas below. In WAL mode readers
+# don't block the single writer thread, so the pool can hold one connection
+# per concurrent reader plus the writer.
+DB_PROFILES = {
+    "default": {
+        "pragmas": {},
+        "pool_size": 5,
+        "max_overflow": 10,
+    },
+    "production": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",  # Safe with WAL: fsync at checkpoints, not every commit
+            "mmap_size": int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024))),
+            "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),
+            "temp_store": "MEMORY",
+        },
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "9")),  # 8 readers + 1 writer
+        "max_overflow": 0,
+    },
+}
+
+DB_PROFILE = os.getenv("DB_PROFILE", "default")
+db_settings = DB_PROFILES[DB_PROFILE]
+
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=db_settings["pool_size"],
+        max_overflow=db_settings["max_overflow"]
+    )
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in db_settings["pragmas"].items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+else:
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        pool_size=db_settings["pool_size"],
+        max_overflow=db_settings["max_overflow"]
+    )
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def init_db():
+    """Create missing tables, and missing indexes on tables that already exist."""
+    import app.models.db_models  # noqa: F401 (registers the models on Base)
+
+    Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
 def get_db():
     db = SessionLocal()
     try:
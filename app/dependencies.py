@@ -1,28 +1,36 @@
+from fastapi import Depends, Request
 from app.services.interfaces import IFlightsService, IHotelsService, INLPService, ICarRentalService
-from app.services.flights_service import MockFlightsService
-from app.services.hotels_service import MockHotelsService
-from app.services.amadeus_service import AmadeusFlightsService
-from app.services.nlp_service import RegexNLPService
-from app.services.openai_service import OpenAINLPService
-from app.services.car_rental_service import MockCarRentalService
-import os
-
-def get_flights_service() -> IFlightsService:
-    if os.getenv("USE_REAL_API") == "true":
-        return AmadeusFlightsService()
-    return MockFlightsService()
-
-def get_hotels_service() -> IHotelsService:
-    return MockHotelsService()
-
-def get_nlp_service() -> INLPService:
-    if os.getenv("OPENAI_API_KEY"):
-        return OpenAINLPService()
-    return RegexNLPService()
-
-def get_cars_service() -> ICarRentalService:
-    return MockCarRentalService()
-
-def get_visa_service():
-    from app.services.visa_service import TravelbriefingVisaService
-    return TravelbriefingVisaService()
+from app.services.persistence import RecommendationLogWriter
+from app.services.conversation_store import IConversationStore
+from app.services.prefetch import SearchPrefetcher
+from app.services.provider_registry import ProviderRegistry
+from app.services.visa_service import TravelbriefingVisaService
+
+# Everything here is built once in the app lifespan (see main.py); these just hand it out
+
+def get_providers(request: Request) -> ProviderRegistry:
+    return request.app.state.providers
+
+def get_log_writer(request: Request) -> RecommendationLogWriter:
+    return request.app.state.log_writer
+
+def get_conversation_store(request: Request) -> IConversationStore:
+    return request.app.state.conversations
+
+def get_prefetcher(request: Request) -> SearchPrefetcher:
+    return request.app.state.prefetcher
+
+def get_flights_service(providers: ProviderRegistry = Depends(get_providers)) -> IFlightsService:
+    return providers.flights
+
+def get_hotels_service(providers: ProviderRegistry = Depends(get_providers)) -> IHotelsService:
+    return providers.hotels
+
+def get_nlp_service(providers: ProviderRegistry = Depends(get_providers)) -> INLPService:
+    return providers.nlp
+
+def get_cars_service(providers: ProviderRegistry = Depends(get_providers)) -> ICarRentalService:
+    return providers.cars
+
+def get_visa_service(providers: ProviderRegistry = Depends(get_providers)) -> TravelbriefingVisaService:
+    return providers.visa
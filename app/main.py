@@ -1,19 +1,86 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from app.routers import chat
 from dotenv import load_dotenv
-from app.database import engine, Base
-import os
+from app.database import init_db
+from app.services.http_clients import HttpClients
+from app.services.amadeus_auth import close_token_managers
+from app.services.cached_services import build_search_caches
+from app.services.cache import InMemoryCacheBackend
+from app.services.persistence import RecommendationLogWriter, shutdown_writer
+from app.services.visa_service import served_destinations
+from app.services.location_index import get_location_index
+from app.services.route_graph import get_route_graph
+from app.services.provider_registry import ProviderRegistry
+from app.config.settings import Settings
+from app.services.conversation_store import build_conversation_store
+from app.services.prefetch import SearchPrefetcher
+import asyncio
 
 # Load environment variables from .env file
 load_dotenv(dotenv_path="app/.env")
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Create tables and indexes
+init_db()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pooled upstream HTTP clients shared by all requests
+    app.state.http_clients = HttpClients()
+    # Provider search results shared across requests
+    app.state.search_caches = build_search_caches()
+    # Audit rows are written behind the response in batches
+    app.state.log_writer = RecommendationLogWriter.from_env()
+    app.state.log_writer.start()
+    # One long-lived instance per service, from the provider chosen in settings
+    settings = Settings.from_env()
+    app.state.providers = ProviderRegistry.build(settings, app.state.http_clients, app.state.search_caches)
+    # Partially filled trips between turns, and cache warming once route + dates are known
+    app.state.conversations = build_conversation_store()
+    app.state.prefetcher = SearchPrefetcher()
+    # Provider warm-ups (Amadeus token, dateparser data), the location index and route graph now rather than on the first request
+    await app.state.providers.warm_up()
+    await asyncio.to_thread(get_location_index)
+    await asyncio.to_thread(get_route_graph)
+    # Visa rules are cached on disk; optionally warmed in the background
+    prefetch = None
+    if settings.visa_prefetch_on_startup:
+        prefetch = asyncio.create_task(app.state.providers.visa.store.prefetch(served_destinations()))
+    yield
+    if prefetch:
+        prefetch.cancel()
+    await app.state.prefetcher.stop()
+    await app.state.log_writer.stop()
+    shutdown_writer()
+    await app.state.providers.aclose()
+    await close_token_managers()
+    await app.state.http_clients.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(chat.router)
 
 @app.get("/")
 def read_root():
     return {"message": "Travel Buddie API"}
+
+@app.get("/metrics")
+def read_metrics(request: Request):
+    caches = request.app.state.search_caches
+    metrics = {
+        "search_cache": {name: cache.stats.as_dict() for name, cache in caches.items()}
+    }
+    backend = caches["flights"].backend
+    if isinstance(backend, InMemoryCacheBackend):
+        metrics["search_cache"]["memory"] = {
+            "entries": len(backend),
+            "bytes": backend.total_bytes,
+            "evictions": backend.evictions
+        }
+    metrics["trip_log"] = request.app.state.log_writer.metrics()
+    metrics["prefetch"] = request.app.state.prefetcher.metrics()
+    providers = request.app.state.providers
+    metrics["providers"] = providers.describe()
+    if hasattr(providers.nlp, "metrics"):
+        metrics["nlp"] = providers.nlp.metrics()
+    return metrics
@@ -0,0 +1,81 @@
+from pydantic import BaseModel, ConfigDict, Field, computed_field
+from typing import List, Optional
+from app.models.trip_request import TripExtraction
+from app.models.visa_info import VisaInfo
+
+# What /chat returns. The recommendation models read the bundle dataclasses
+# (app/models/recommendation.py) directly via from_attributes, and FastAPI
+# serializes a response_model straight to JSON bytes in pydantic-core.
+
+class LegSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    airline: str
+    origin: str
+    destination: str
+    departure: str
+    arrival: str
+
+class FlightSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    airline: str
+    price: int
+    layovers: int
+    via: Optional[str] = None
+    legs: Optional[List[LegSummary]] = None
+    departure: str = Field(exclude=True)
+    return_date: Optional[str] = None  # Flexible-date searches only
+
+    @computed_field
+    @property
+    def departure_date(self) -> Optional[str]:
+        # Dates only vary per offer in flexible-date searches
+        return self.departure[:10] if self.return_date else None
+
+class HotelSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    name: str
+    price_per_night: int
+    rating: float
+
+class CarRentalSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    company: str
+    car_type: str
+    price_per_day: int
+
+class Recommendation(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    flight: FlightSummary
+    hotel: HotelSummary
+    car_rental: Optional[CarRentalSummary] = None
+    total_price: int
+    reasoning: str
+
+class PriceCalendarDay(BaseModel):
+    departure_date: str
+    return_date: str
+    price: int
+
+class ChatResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    message: str
+    conversation_id: str
+    extracted_data: TripExtraction
+    missing_fields: Optional[List[str]] = None  # Set when more details are needed
+    recommendations: List[Recommendation] = []
+    price_calendar: Optional[List[PriceCalendarDay]] = None
+    visa_info: Optional[VisaInfo] = None
+
+class BundlesEvent(BaseModel):
+    """The "bundles" event of /chat/stream."""
+    model_config = ConfigDict(from_attributes=True)
+
+    message: str
+    recommendations: List[Recommendation] = []
+    price_calendar: Optional[List[PriceCalendarDay]] = None
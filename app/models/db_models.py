@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -18,11 +18,16 @@ class TripRequestDB(Base):
     
     recommendations = relationship("RecommendationDB", back_populates="trip_request")
 
+    __table_args__ = (
+        Index("ix_trip_requests_route_start", "origin", "destination", "start_date"),
+        Index("ix_trip_requests_created_at", "created_at"),
+    )
+
 class RecommendationDB(Base):
     __tablename__ = "recommendations"
 
     id = Column(Integer, primary_key=True, index=True)
-    trip_request_id = Column(Integer, ForeignKey("trip_requests.id"))
+    trip_request_id = Column(Integer, ForeignKey("trip_requests.id"), index=True)
     flight_airline = Column(String)
     flight_price = Column(Float)
     hotel_name = Column(String)
@@ -1,14 +1,21 @@
+from dataclasses import dataclass
 from typing import Optional, List
-from pydantic import BaseModel
 
-class LegInfo(BaseModel):
+# Offers and bundles are created in bulk (provider parsing, leg joins,
+# scoring), so they are slotted dataclasses rather than validating models:
+# no validation pass and no per-instance __dict__. Providers build them from
+# data they have already parsed; the API layer turns them into JSON.
+
+@dataclass(slots=True)
+class LegInfo:
     airline: str
     origin: str
     destination: str
     departure: str
     arrival: str
 
-class FlightOffer(BaseModel):
+@dataclass(slots=True)
+class FlightOffer:
     airline: str
     price: int
     departure: str
@@ -16,23 +23,27 @@ class FlightOffer(BaseModel):
     layovers: int
     legs: Optional[List[LegInfo]] = None  # For multi-leg itineraries
     via: Optional[str] = None  # Hub used for connecting flight
+    return_date: Optional[str] = None  # Set by flexible-date searches, where it varies per offer
 
-class HotelOffer(BaseModel):
+@dataclass(slots=True)
+class HotelOffer:
     name: str
     price_per_night: int
     rating: float
     distance_km: float
 
-class CarRentalOffer(BaseModel):
+@dataclass(slots=True)
+class CarRentalOffer:
     company: str
     car_type: str
     price_per_day: int
     rating: float
 
-class TripBundle(BaseModel):
+@dataclass(slots=True)
+class TripBundle:
     flight: FlightOffer
     hotel: HotelOffer
-    car_rental: Optional[CarRentalOffer] = None
     total_price: int
     score: float
     reasoning: str
+    car_rental: Optional[CarRentalOffer] = None
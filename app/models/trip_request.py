@@ -1,6 +1,13 @@
 from pydantic import BaseModel
 from typing import List, Optional
 
+# Fields a search can't run without
+REQUIRED_FIELDS = ["origin", "destination", "start_date", "end_date", "travelers"]
+# Every field filled from the user's messages
+TRIP_SLOTS = REQUIRED_FIELDS + ["budget", "nationality", "flexible_days"]
+# Widest date window a flexible search will cover, in days either side
+MAX_FLEXIBLE_DAYS = 7
+
 class TripExtraction(BaseModel):
     origin: Optional[str] = None
     destination: Optional[str] = None
@@ -9,5 +16,6 @@ class TripExtraction(BaseModel):
     travelers: Optional[int] = None
     budget: Optional[int] = None
     nationality: Optional[str] = None
+    flexible_days: Optional[int] = None  # "around mid-December": days either side of the dates
     reply_message: Optional[str] = None
     missing_fields: List[str] = []
@@ -1,20 +1,31 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import List, Optional, Tuple, Union
 from app.services.scoring_service import create_bundles
+from app.services.flight_utils import price_calendar
 from app.services.interfaces import IFlightsService, IHotelsService, INLPService, ICarRentalService
-from app.dependencies import get_flights_service, get_hotels_service, get_nlp_service, get_cars_service, get_visa_service
+from app.dependencies import get_flights_service, get_hotels_service, get_nlp_service, get_cars_service, get_visa_service, get_log_writer, get_conversation_store, get_prefetcher
 from app.services.visa_service import TravelbriefingVisaService
+from app.services.search_pipeline import TripSearchPipeline
+from app.services.conversation_store import IConversationStore, merge_trips, new_conversation_id
+from app.services.prefetch import SearchPrefetcher
+from app.models.recommendation import TripBundle
+from app.models.chat_response import ChatResponse, BundlesEvent
+from app.config.locations import normalize_to_iata, iata_to_name
 import asyncio
+import json
+from dataclasses import asdict
 
 router = APIRouter()
 
 class ChatRequest(BaseModel):
     message: str
+    # Returned by the previous turn; lets a follow-up fill in just the missing details
+    conversation_id: Optional[str] = None
 
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.db_models import TripRequestDB, RecommendationDB
-from app.models.trip_request import TripExtraction
+from app.services.persistence import RecommendationLogWriter
+from app.models.trip_request import TripExtraction, REQUIRED_FIELDS
 
 def validate_trip_data(trip: TripExtraction) -> TripExtraction:
     """
@@ -25,10 +36,9 @@ def validate_trip_data(trip: TripExtraction) -> TripExtraction:
     if trip.reply_message:
         return trip
 
-    required_fields = ["origin", "destination", "start_date", "end_date", "travelers"]
     missing = list(trip.missing_fields) if trip.missing_fields else []
 
-    for field in required_fields:
+    for field in REQUIRED_FIELDS:
         if getattr(trip, field) is None and field not in missing:
             missing.append(field)
 
@@ -38,143 +48,49 @@ def validate_trip_data(trip: TripExtraction) -> TripExtraction:
     trip.missing_fields = missing
     return trip
 
-@router.post("/chat")
-async def chat_endpoint(
-    request: ChatRequest,
-    flights_service: IFlightsService = Depends(get_flights_service),
-    hotels_service: IHotelsService = Depends(get_hotels_service),
-    cars_service: ICarRentalService = Depends(get_cars_service),
-    nlp_service: INLPService = Depends(get_nlp_service),
-    visa_service: TravelbriefingVisaService = Depends(get_visa_service),
-    db: Session = Depends(get_db)
-):
-    # 1. Parse
-    trip = await nlp_service.extract(request.message)
+async def _parse_trip(nlp_service: INLPService, message: str, known: Optional[TripExtraction] = None) -> TripExtraction:
+    # 1. Parse (only what this message adds, when earlier turns are known)
+    trip = await nlp_service.extract(message, known)
+    if known:
+        trip = merge_trips(known, trip)
     
     # 2. Validate (Post-LLM check)
     trip = validate_trip_data(trip)
     
     # 3. Normalize locations to IATA codes
-    from app.config.locations import normalize_to_iata
     if trip.origin:
         trip.origin = normalize_to_iata(trip.origin)
     if trip.destination:
         trip.destination = normalize_to_iata(trip.destination)
-    
-    # 4. Check missing
-    if trip.missing_fields:
-        message = trip.reply_message or f"I need more information. Please provide: {', '.join(trip.missing_fields)}"
-        return {
-            "message": message,
-            "missing_fields": trip.missing_fields,
-            "extracted_data": trip.model_dump()
-        }
-        
-    # 4. Search (Concurrent)
-    flights_task = flights_service.search_flights(trip)
-    hotels_task = hotels_service.search_hotels(trip)
-    cars_task = cars_service.search_cars(trip)
-    
-    flights, hotels, cars = await asyncio.gather(flights_task, hotels_task, cars_task)
-    
-    # 6. Fallback to connecting flights if no direct flights found
-    used_connecting = False
-    if not flights:
-        flights = await flights_service.search_connecting_flights(trip)
-        used_connecting = True
-    else:
-        # Check if returned flights have layovers (meaning they are connecting)
-        if flights and all(f.layovers > 0 for f in flights):
-            used_connecting = True
-    
-    # 7. Score
-    bundles = create_bundles(trip, flights, hotels, cars)
-
-    if not bundles:
-        return {
-            "message": "I couldn't find any trips matching your criteria.",
-            "extracted_data": trip.model_dump()
-        }
-
-    # 6. Persist to DB
-    db_trip = TripRequestDB(
-        user_query=request.message,
-        origin=trip.origin,
-        destination=trip.destination,
-        start_date=trip.start_date,
-        end_date=trip.end_date,
-        travelers=trip.travelers,
-        budget=trip.budget
+    return trip
+
+async def _parse_turn(
+    request: ChatRequest, nlp_service: INLPService, conversations: IConversationStore
+) -> Tuple[str, TripExtraction]:
+    """Parse one message in the context of its conversation and store the result."""
+    conversation_id = request.conversation_id or new_conversation_id()
+    known = await conversations.get(conversation_id) if request.conversation_id else None
+    trip = await _parse_trip(nlp_service, request.message, known)
+    await conversations.save(conversation_id, trip)
+    return conversation_id, trip
+
+def _missing_fields_response(trip: TripExtraction, conversation_id: str) -> ChatResponse:
+    message = trip.reply_message or f"I need more information. Please provide: {', '.join(trip.missing_fields)}"
+    return ChatResponse(
+        message=message,
+        missing_fields=trip.missing_fields,
+        extracted_data=trip,
+        conversation_id=conversation_id
     )
-    db.add(db_trip)
-    db.commit()
-    db.refresh(db_trip)
-
-    for b in bundles:
-        db_rec = RecommendationDB(
-            trip_request_id=db_trip.id,
-            flight_airline=b.flight.airline,
-            flight_price=b.flight.price,
-            hotel_name=b.hotel.name,
-            hotel_price=b.hotel.price_per_night,
-            car_company=b.car_rental.company if b.car_rental else None,
-            car_type=b.car_rental.car_type if b.car_rental else None,
-            car_price=b.car_rental.price_per_day if b.car_rental else None,
-            total_price=b.total_price,
-            score=b.score,
-            reasoning=b.reasoning
-        )
-        db.add(db_rec)
 
-    db.commit()
-    
-    # 8. Format response
-    recommendations = []
-    for b in bundles:
-        flight_info = {
-            "airline": b.flight.airline,
-            "price": b.flight.price,
-            "layovers": b.flight.layovers
-        }
-        if b.flight.via:
-            flight_info["via"] = b.flight.via
-        if b.flight.legs:
-            flight_info["legs"] = [leg.model_dump() for leg in b.flight.legs]
-        
-        rec = {
-            "flight": flight_info,
-            "hotel": {
-                "name": b.hotel.name,
-                "price_per_night": b.hotel.price_per_night,
-                "rating": b.hotel.rating
-            },
-            "total_price": b.total_price,
-            "reasoning": b.reasoning
-        }
-        if b.car_rental:
-            rec["car_rental"] = {
-                "company": b.car_rental.company,
-                "car_type": b.car_rental.car_type,
-                "price_per_day": b.car_rental.price_per_day
-            }
-        recommendations.append(rec)
-    
-    # 10. Fetch visa info (if nationality provided)
-    visa_info = None
-    if trip.nationality and trip.destination:
-        visa_info_obj = await visa_service.get_visa_info(trip.destination, trip.nationality)
-        if visa_info_obj:
-            visa_info = visa_info_obj.model_dump()
-    
-    # 11. Build response message
-    from app.config.locations import iata_to_name
+def _build_message(trip: TripExtraction, bundles: List[TripBundle], used_connecting: bool) -> str:
     origin_name = iata_to_name(trip.origin)
     dest_name = iata_to_name(trip.destination)
     
     if used_connecting and bundles:
         if bundles[0].flight.via:
-            via_hub = bundles[0].flight.via
-            via_name = iata_to_name(via_hub)
+            # "ADD-FRA" for two stops
+            via_name = ", then ".join(iata_to_name(hub) for hub in bundles[0].flight.via.split("-"))
             message = (
                 f"There are no direct flights from {origin_name} to {dest_name}, "
                 f"but I found {len(bundles)} great connecting options! "
@@ -201,14 +117,172 @@ async def chat_endpoint(
                     message += f"Option {i}: {origin_name} → {dest_name} with {layovers} stop(s) (${b.flight.price})\n"
     else:
         message = f"Found {len(bundles)} great options for you!"
+        if bundles and bundles[0].flight.return_date:
+            best = bundles[0].flight
+            message += f" Best dates: {best.departure[:10]} to {best.return_date}."
+    return message
+
+NO_RESULTS_MESSAGE = "I couldn't find any trips matching your criteria."
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(
+    request: ChatRequest,
+    flights_service: IFlightsService = Depends(get_flights_service),
+    hotels_service: IHotelsService = Depends(get_hotels_service),
+    cars_service: ICarRentalService = Depends(get_cars_service),
+    nlp_service: INLPService = Depends(get_nlp_service),
+    visa_service: TravelbriefingVisaService = Depends(get_visa_service),
+    log_writer: RecommendationLogWriter = Depends(get_log_writer),
+    conversations: IConversationStore = Depends(get_conversation_store),
+    prefetcher: SearchPrefetcher = Depends(get_prefetcher)
+) -> ChatResponse:
+    conversation_id, trip = await _parse_turn(request, nlp_service, conversations)
     
-    response = {
-        "message": message,
-        "recommendations": recommendations,
-        "extracted_data": trip.model_dump()
-    }
-    
-    if visa_info:
-        response["visa_info"] = visa_info
+    # 4. Check missing (and warm the caches if the route and dates are already known)
+    if trip.missing_fields:
+        prefetcher.maybe_prefetch(trip, flights_service, hotels_service, cars_service)
+        return _missing_fields_response(trip, conversation_id)
+        
+    # 5. Search: every provider (and visa) starts now, connecting flights may start speculatively
+    pipeline = TripSearchPipeline(trip, flights_service, hotels_service, cars_service, visa_service)
+    try:
+        (flights, used_connecting), hotels, cars = await asyncio.gather(
+            pipeline.flights(), pipeline.hotels, pipeline.cars
+        )
+        
+        # 6. Score
+        bundles = create_bundles(trip, flights, hotels, cars)
+
+        if not bundles:
+            return ChatResponse(message=NO_RESULTS_MESSAGE, extracted_data=trip, conversation_id=conversation_id)
+
+        # 7. Persist to DB (queued, written in batches in the background)
+        await log_writer.enqueue(request.message, trip, bundles)
+        
+        # 8. Visa info (if nationality provided), fetched in parallel with the searches
+        visa_info_obj = await pipeline.visa_info()
+    finally:
+        pipeline.cancel()
     
-    return response
+    # 9. Build response (recommendations are read straight off the bundles)
+    return ChatResponse(
+        message=_build_message(trip, bundles, used_connecting),
+        recommendations=bundles,
+        extracted_data=trip,
+        conversation_id=conversation_id,
+        price_calendar=price_calendar(flights) or None,
+        visa_info=visa_info_obj
+    )
+
+def _sse(event: str, data: Union[dict, BaseModel]) -> str:
+    payload = data.model_dump_json() if isinstance(data, BaseModel) else json.dumps(data)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(
+    request: ChatRequest,
+    http_request: Request,
+    flights_service: IFlightsService = Depends(get_flights_service),
+    hotels_service: IHotelsService = Depends(get_hotels_service),
+    cars_service: ICarRentalService = Depends(get_cars_service),
+    nlp_service: INLPService = Depends(get_nlp_service),
+    visa_service: TravelbriefingVisaService = Depends(get_visa_service),
+    log_writer: RecommendationLogWriter = Depends(get_log_writer),
+    conversations: IConversationStore = Depends(get_conversation_store),
+    prefetcher: SearchPrefetcher = Depends(get_prefetcher)
+):
+    """
+    Streaming variant of /chat using Server-Sent Events. Events, in order:
+    extraction, then hotels / cars / hub_flights / flights as each search
+    finishes, then bundles, visa (if any) and done. If extraction has missing
+    fields the stream is extraction, message, done. Searches are cancelled
+    when the client disconnects.
+    """
+    async def events():
+        conversation_id, trip = await _parse_turn(request, nlp_service, conversations)
+        yield _sse("extraction", {"extracted_data": trip.model_dump(), "conversation_id": conversation_id})
+
+        if trip.missing_fields:
+            prefetcher.maybe_prefetch(trip, flights_service, hotels_service, cars_service)
+            yield _sse("message", _missing_fields_response(trip, conversation_id))
+            yield _sse("done", {})
+            return
+
+        # Connecting searches report each hub as soon as its legs are combined
+        hub_results: asyncio.Queue = asyncio.Queue()
+        pipeline = TripSearchPipeline(
+            trip, flights_service, hotels_service, cars_service, visa_service,
+            on_connecting_hub=lambda hub, offers: hub_results.put_nowait((hub, offers))
+        )
+        flights_task = asyncio.create_task(pipeline.flights())
+        next_hub = asyncio.create_task(hub_results.get())
+
+        def take_queued_hubs() -> List[Tuple[str, list]]:
+            # next_hub holds at most one result; others may be queued behind it
+            nonlocal next_hub
+            hubs = []
+            if next_hub.done():
+                hubs.append(next_hub.result())
+            else:
+                next_hub.cancel()  # An item it was about to take stays in the queue
+            while not hub_results.empty():
+                hubs.append(hub_results.get_nowait())
+            next_hub = asyncio.create_task(hub_results.get())
+            return hubs
+
+        waiting = {pipeline.hotels: "hotels", pipeline.cars: "cars", flights_task: "flights"}
+        results = {}
+        try:
+            while waiting:
+                done, _ = await asyncio.wait(set(waiting) | {next_hub}, return_when=asyncio.FIRST_COMPLETED)
+                if await http_request.is_disconnected():
+                    return
+
+                if next_hub in done:
+                    hub, offers = next_hub.result()
+                    yield _sse("hub_flights", {"via": hub, "flights": [asdict(f) for f in offers]})
+                    next_hub = asyncio.create_task(hub_results.get())
+
+                for task in done & waiting.keys():
+                    name = waiting.pop(task)
+                    results[name] = task.result()
+                    if name == "flights":
+                        # Every hub is reported before the flights it makes up
+                        for hub, offers in take_queued_hubs():
+                            yield _sse("hub_flights", {"via": hub, "flights": [asdict(f) for f in offers]})
+                        flights, used_connecting = results[name]
+                        yield _sse("flights", {"flights": [asdict(f) for f in flights], "connecting": used_connecting})
+                    else:
+                        yield _sse(name, {name: [asdict(offer) for offer in results[name]]})
+
+            for hub, offers in take_queued_hubs():
+                yield _sse("hub_flights", {"via": hub, "flights": [asdict(f) for f in offers]})
+            next_hub.cancel()
+
+            flights, used_connecting = results["flights"]
+            bundles = create_bundles(trip, flights, results["hotels"], results["cars"])
+            if not bundles:
+                yield _sse("bundles", {"message": NO_RESULTS_MESSAGE, "recommendations": []})
+                yield _sse("done", {})
+                return
+
+            await log_writer.enqueue(request.message, trip, bundles)
+            yield _sse("bundles", BundlesEvent(
+                message=_build_message(trip, bundles, used_connecting),
+                recommendations=bundles,
+                price_calendar=price_calendar(flights) or None
+            ))
+
+            visa_info_obj = await pipeline.visa_info()
+            if visa_info_obj:
+                yield _sse("visa", {"visa_info": visa_info_obj.model_dump()})
+            yield _sse("done", {})
+        finally:
+            next_hub.cancel()
+            pipeline.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import time
+import httpx
+from typing import Dict, Optional, Tuple
+
+# Refresh the token this many seconds before Amadeus says it expires
+REFRESH_MARGIN_SECONDS = float(os.getenv("AMADEUS_TOKEN_REFRESH_MARGIN", "120"))
+# Never hand out a token closer than this to its expiry
+EXPIRY_SAFETY_SECONDS = 5.0
+
+
+class AmadeusTokenManager:
+    """
+    Process-wide cache for an Amadeus OAuth access token.
+    Concurrent callers share a single in-flight auth request, and the token is
+    refreshed in the background shortly before it expires.
+    """
+
+    def __init__(self, base_url: str, client_id: str, client_secret: str,
+                 refresh_margin: float = REFRESH_MARGIN_SECONDS):
+        self.base_url = base_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_margin = refresh_margin
+        self.auth_calls = 0
+
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _is_valid(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at - EXPIRY_SAFETY_SECONDS
+
+    def _is_fresh(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at - self.refresh_margin
+
+    async def get_token(self, client: httpx.AsyncClient) -> str:
+        if self._is_fresh():
+            return self._token
+
+        if self._is_valid():
+            # Still usable: hand it out and let the background refresh replace it
+            self._schedule_refresh(client, delay=0)
+            return self._token
+
+        async with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            if not self._is_valid():
+                await self._fetch(client)
+            return self._token
+
+    def invalidate(self, token: str):
+        """Drop a token the API rejected so the next caller fetches a new one."""
+        if self._token == token:
+            self._token = None
+            self._expires_at = 0.0
+
+    async def _fetch(self, client: httpx.AsyncClient):
+        self.auth_calls += 1
+        response = await client.post(
+            f"{self.base_url}/v1/security/oauth2/token",
+            data={
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret
+            },
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        lifetime = float(data.get("expires_in", 1799))
+        self._token = data["access_token"]
+        self._expires_at = time.monotonic() + lifetime
+        # A token that lives less than the margin is refreshed halfway through, not back to back
+        delay = lifetime - self.refresh_margin if lifetime > self.refresh_margin else lifetime / 2
+        self._schedule_refresh(client, delay=delay)
+
+    def _schedule_refresh(self, client: httpx.AsyncClient, delay: float):
+        pending = self._refresh_task
+        if pending and not pending.done() and pending is not asyncio.current_task():
+            if delay == 0:
+                # A refresh is already queued, don't start a second one
+                return
+            # A new token arrived, so the old timer is out of date
+            pending.cancel()
+        self._refresh_task = asyncio.create_task(self._refresh_later(client, delay))
+
+    async def _refresh_later(self, client: httpx.AsyncClient, delay: float):
+        await asyncio.sleep(delay)
+        try:
+            async with self._lock:
+                if not self._is_fresh():
+                    await self._fetch(client)
+        except Exception as e:
+            # Callers fall back to fetching on demand once the token expires
+            print(f"Amadeus token refresh failed: {e}")
+
+    async def aclose(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+
+_managers: Dict[Tuple[str, str], AmadeusTokenManager] = {}
+
+
+def get_token_manager(base_url: str, client_id: str, client_secret: str) -> AmadeusTokenManager:
+    """Return the shared token manager for these credentials."""
+    key = (base_url, client_id)
+    manager = _managers.get(key)
+    if manager is None:
+        manager = AmadeusTokenManager(base_url, client_id, client_secret)
+        _managers[key] = manager
+    return manager
+
+
+async def close_token_managers():
+    """Stop background refreshes (called on app shutdown)."""
+    for manager in _managers.values():
+        await manager.aclose()
+    _managers.clear()
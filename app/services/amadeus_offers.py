@@ -0,0 +1,47 @@
+import json
+from typing import Callable, List
+from app.models.recommendation import FlightOffer, LegInfo
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson is optional, the stdlib parser gives the same result
+    _loads = json.loads
+
+
+def decode_offers(body: bytes, airline: Callable[[str], str] = str) -> List[FlightOffer]:
+    """
+    Turn a /v2/shopping/flight-offers response body into FlightOffers.
+
+    search_flights and _fetch_one_way both decode through here. Only the
+    outbound itinerary's segments and the total price are read. Each segment
+    becomes a LegInfo when the offer has more than one. airline formats the
+    first segment's carrier code.
+    """
+    offers = []
+    for offer in _loads(body).get("data", ()):
+        segments = offer["itineraries"][0]["segments"]
+        first, last = segments[0], segments[-1]
+
+        legs = None
+        if len(segments) > 1:
+            legs = [
+                LegInfo(
+                    airline=segment["carrierCode"],
+                    origin=segment["departure"]["iataCode"],
+                    destination=segment["arrival"]["iataCode"],
+                    departure=segment["departure"]["at"],
+                    arrival=segment["arrival"]["at"]
+                )
+                for segment in segments
+            ]
+
+        offers.append(FlightOffer(
+            airline=airline(first["carrierCode"]),
+            price=int(float(offer["price"]["total"])),
+            departure=first["departure"]["at"],
+            arrival=last["arrival"]["at"],
+            layovers=len(segments) - 1,
+            legs=legs
+        ))
+    return offers
@@ -1,197 +1,229 @@
+import asyncio
 import httpx
 import os
-from typing import List
+from typing import List, Optional
 from app.models.trip_request import TripExtraction
 from app.models.recommendation import FlightOffer
-from app.services.interfaces import IFlightsService
+from app.services.interfaces import IFlightsService, HubResultCallback
+from app.services.http_clients import build_client
+from app.services.amadeus_auth import get_token_manager
+from app.services.amadeus_offers import decode_offers
+from app.services.cache import TTLCache
+from app.config.settings import AMADEUS_SANDBOX_URL
+
+# One-way searches in flight at once for a flexible-date search
+FLEXIBLE_SEARCH_CONCURRENCY = int(os.getenv("FLEXIBLE_SEARCH_CONCURRENCY", "4"))
 
 class AmadeusFlightsService(IFlightsService):
-    def __init__(self):
-        self.client_id = os.getenv("AMADEUS_CLIENT_ID")
-        self.client_secret = os.getenv("AMADEUS_CLIENT_SECRET")
-        self.base_url = "https://test.api.amadeus.com" # Sandbox environment
-        self.token = None
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        leg_cache: Optional[TTLCache] = None,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        base_url: str = AMADEUS_SANDBOX_URL
+    ):
+        # Credentials come from Settings in the app; scripts can rely on the env vars
+        self.client_id = client_id or os.getenv("AMADEUS_CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("AMADEUS_CLIENT_SECRET")
+        self.base_url = base_url
         
         if not self.client_id or not self.client_secret:
             raise ValueError("AMADEUS_CLIENT_ID and AMADEUS_CLIENT_SECRET must be set when using AmadeusFlightsService")
 
-    async def _authenticate(self):
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/v1/security/oauth2/token",
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret
-                },
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
+        # Shared pooled client from the app lifespan; standalone use (e.g. scripts) gets its own
+        self._owns_client = client is None
+        self.client = client or build_client("amadeus")
+
+        # Token is cached process-wide, not per service instance
+        self.tokens = get_token_manager(self.base_url, self.client_id, self.client_secret)
+
+        # One-way leg results shared across connecting searches for different routes
+        self.leg_cache = leg_cache
+
+    async def warm_up(self):
+        """Fetch the access token at startup so the first search doesn't wait for it."""
+        await self.tokens.get_token(self.client)
+
+    async def aclose(self):
+        """Close the HTTP client if this service created it."""
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def _get_flight_offers(self, params: dict, token: str) -> httpx.Response:
+        response = await self.client.get(
+            f"{self.base_url}/v2/shopping/flight-offers",
+            headers={"Authorization": f"Bearer {token}"},
+            params=params
+        )
+
+        if response.status_code == 401:
+            # Token was rejected early, drop it and retry once with a new one
+            self.tokens.invalidate(token)
+            token = await self.tokens.get_token(self.client)
+            response = await self.client.get(
+                f"{self.base_url}/v2/shopping/flight-offers",
+                headers={"Authorization": f"Bearer {token}"},
+                params=params
             )
-            response.raise_for_status()
-            self.token = response.json()["access_token"]
+
+        return response
 
     async def search_flights(self, trip: TripExtraction) -> List[FlightOffer]:
-        if not self.token:
-            await self._authenticate()
+        token = await self.tokens.get_token(self.client)
+            
+        params = {
+            "originLocationCode": trip.origin,
+            "destinationLocationCode": trip.destination,
+            "departureDate": trip.start_date,
+            "adults": trip.travelers,
+            "currencyCode": "USD",
+            "max": 5
+        }
+        
+        # Amadeus returnDate is optional, but if provided it makes it a round trip
+        if trip.end_date:
+             params["returnDate"] = trip.end_date
+
+        try:
+            response = await self._get_flight_offers(params, token)
             
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            params = {
-                "originLocationCode": trip.origin,
-                "destinationLocationCode": trip.destination,
-                "departureDate": trip.start_date,
-                "adults": trip.travelers,
-                "currencyCode": "USD",
-                "max": 5
-            }
+            response.raise_for_status()
+            # "Airline XX" is a placeholder for IATA lookup
+            return decode_offers(response.content, airline=lambda code: f"Airline {code}")
             
-            # Amadeus returnDate is optional, but if provided it makes it a round trip
-            if trip.end_date:
-                 params["returnDate"] = trip.end_date
-
-            try:
-                response = await client.get(
-                    f"{self.base_url}/v2/shopping/flight-offers",
-                    headers={"Authorization": f"Bearer {self.token}"},
-                    params=params
-                )
-                
-                if response.status_code == 401:
-                    # Token might have expired, retry once
-                    await self._authenticate()
-                    response = await client.get(
-                        f"{self.base_url}/v2/shopping/flight-offers",
-                        headers={"Authorization": f"Bearer {self.token}"},
-                        params=params
-                    )
-                
-                response.raise_for_status()
-                data = response.json()
-                
-                offers = []
-                for offer in data.get("data", []):
-                    itineraries = offer["itineraries"]
-                    price = float(offer["price"]["total"])
-                    
-                    # First segment of first itinerary (Outbound)
-                    first_seg = itineraries[0]["segments"][0]
-                    departure = first_seg["departure"]["at"]
-                    
-                    # Last segment of first itinerary
-                    last_seg = itineraries[0]["segments"][-1]
-                    arrival = last_seg["arrival"]["at"]
-                    
-                    airline_code = first_seg["carrierCode"]
-                    layovers = len(itineraries[0]["segments"]) - 1
-                    
-                    offers.append(FlightOffer(
-                        airline=f"Airline {airline_code}", # Placeholder for IATA lookup
-                        price=int(price),
-                        departure=departure,
-                        arrival=arrival,
-                        layovers=layovers
-                    ))
-                    
-                return offers
-                
-            except httpx.HTTPStatusError as e:
-                print(f"Amadeus API Status Error: {e.response.status_code} - {e.response.text}")
-                return []
-            except Exception as e:
-                import traceback
-                traceback.print_exc()
-                print(f"Error searching flights: {e}")
-                return []
+        except httpx.HTTPStatusError as e:
+            print(f"Amadeus API Status Error: {e.response.status_code} - {e.response.text}")
+            return []
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"Error searching flights: {e}")
+            return []
 
     async def _search_one_way(self, origin: str, destination: str, date: str, travelers: int) -> List[FlightOffer]:
-        """Search one-way flights for a leg."""
-        if not self.token:
-            await self._authenticate()
+        """
+        Search one-way flights for a leg.
+        With a leg cache, the same leg requested by different routes (or by
+        concurrent requests) is fetched from Amadeus only once.
+        """
+        if self.leg_cache is None:
+            return await self._fetch_one_way(origin, destination, date, travelers)
+
+        key = f"leg:{origin}:{destination}:{date}:{travelers}"
+        offers = await self.leg_cache.get_or_fetch(
+            key, lambda: self._fetch_one_way(origin, destination, date, travelers)
+        )
+        return list(offers)
+
+    async def _fetch_one_way(self, origin: str, destination: str, date: str, travelers: int) -> List[FlightOffer]:
+        token = await self.tokens.get_token(self.client)
             
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            params = {
-                "originLocationCode": origin,
-                "destinationLocationCode": destination,
-                "departureDate": date,
-                "adults": travelers,
-                "currencyCode": "USD",
-                "max": 3
-            }
+        params = {
+            "originLocationCode": origin,
+            "destinationLocationCode": destination,
+            "departureDate": date,
+            "adults": travelers,
+            "currencyCode": "USD",
+            "max": 3
+        }
+        
+        try:
+            response = await self._get_flight_offers(params, token)
             
-            try:
-                response = await client.get(
-                    f"{self.base_url}/v2/shopping/flight-offers",
-                    headers={"Authorization": f"Bearer {self.token}"},
-                    params=params
-                )
-                
-                if response.status_code == 401:
-                    await self._authenticate()
-                    response = await client.get(
-                        f"{self.base_url}/v2/shopping/flight-offers",
-                        headers={"Authorization": f"Bearer {self.token}"},
-                        params=params
-                    )
-                
-                response.raise_for_status()
-                data = response.json()
-                
-                offers = []
-                for offer in data.get("data", []):
-                    itineraries = offer["itineraries"]
-                    price = float(offer["price"]["total"])
-                    first_seg = itineraries[0]["segments"][0]
-                    last_seg = itineraries[0]["segments"][-1]
-                    
-                    offers.append(FlightOffer(
-                        airline=first_seg["carrierCode"],
-                        price=int(price),
-                        departure=first_seg["departure"]["at"],
-                        arrival=last_seg["arrival"]["at"],
-                        layovers=len(itineraries[0]["segments"]) - 1
-                    ))
-                    
-                return offers
-            except Exception as e:
-                print(f"Error searching one-way flights {origin}->{destination}: {e}")
-                return []
-
-    async def search_connecting_flights(self, trip: TripExtraction) -> List[FlightOffer]:
-        """Search for connecting flights via major hubs."""
-        from app.config.hubs import get_hubs_for_origin
-        from app.services.flight_utils import is_valid_layover, combine_legs
+            response.raise_for_status()
+            return decode_offers(response.content)
+        except Exception as e:
+            print(f"Error searching one-way flights {origin}->{destination}: {e}")
+            return []
+
+    async def search_flexible_dates(self, trip: TripExtraction, window_days: int) -> List[FlightOffer]:
+        """
+        Round trips departing and returning within window_days of the trip's dates.
+        Every date is one one-way search per direction (through the leg cache,
+        so dates already searched cost nothing), at most FLEXIBLE_SEARCH_CONCURRENCY
+        at a time. Outbound and return are then paired per date, keeping the
+        trip length close to the one asked for; prices are the sum of the two
+        one-way fares.
+        """
+        from app.services.flight_utils import date_window, pair_round_trips, trip_length
+
+        departures = date_window(trip.start_date, window_days)
+        returns = date_window(trip.end_date, window_days)
+        semaphore = asyncio.Semaphore(FLEXIBLE_SEARCH_CONCURRENCY)
+
+        async def search_day(origin: str, destination: str, date: str):
+            async with semaphore:
+                return date, await self._search_one_way(origin, destination, date, trip.travelers)
+
+        results = await asyncio.gather(
+            *(search_day(trip.origin, trip.destination, date) for date in departures),
+            *(search_day(trip.destination, trip.origin, date) for date in returns)
+        )
+        return pair_round_trips(dict(results[:len(departures)]), dict(results[len(departures):]), trip_length(trip))
+
+    async def search_connecting_flights(
+        self, trip: TripExtraction, on_hub_result: Optional[HubResultCallback] = None
+    ) -> List[FlightOffer]:
+        """
+        Search for connecting flights along the best-ranked routes.
+        Every leg of every route is searched concurrently (bounded by a semaphore)
+        and remaining searches are cancelled once enough itineraries are found.
+        on_hub_result is called as soon as each route's itineraries are combined.
+        """
+        from app.config.hubs import MAX_HUBS, HUB_SEARCH_CONCURRENCY, TARGET_ITINERARIES
+        from app.services.flight_utils import join_legs, combine_path, route_label
         from app.services.flights_service import MockFlightsService
+        from app.services.route_graph import get_route_graph
 
-        hubs = get_hubs_for_origin(trip.origin)[:2]
-        connecting_flights = []
-        consecutive_failures = 0
+        routes = get_route_graph().rank_routes(trip.origin, trip.destination, MAX_HUBS)
+        labels = [route_label(stops) for stops in routes]
+        semaphore = asyncio.Semaphore(HUB_SEARCH_CONCURRENCY)
 
-        for hub in hubs:
-            # Search origin -> hub
-            leg1_offers = await self._search_one_way(trip.origin, hub, trip.start_date, trip.travelers)
+        async def search_leg(origin: str, destination: str) -> List[FlightOffer]:
+            async with semaphore:
+                return await self._search_one_way(origin, destination, trip.start_date, trip.travelers)
+
+        async def search_route(stops):
+            # Search every leg of the route at the same time
+            airports = [trip.origin, *stops, trip.destination]
+            leg_offers = await asyncio.gather(*(
+                search_leg(a, b) for a, b in zip(airports, airports[1:])
+            ))
+            return airports, leg_offers
+
+        connecting_flights = []
+        failed_routes = 0
+        tasks = [asyncio.create_task(search_route(stops)) for stops in routes]
 
-            if not leg1_offers:
-                consecutive_failures += 1
-                continue
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                airports, leg_offers = await next_result
 
-            # Search hub -> destination
-            leg2_offers = await self._search_one_way(hub, trip.destination, trip.start_date, trip.travelers)
+                if not all(leg_offers):
+                    failed_routes += 1
+                    continue
 
-            if not leg2_offers:
-                consecutive_failures += 1
-                continue
+                # Combine valid itineraries
+                route_flights = [combine_path(legs, airports) for legs in join_legs(leg_offers)]
+                connecting_flights.extend(route_flights)
+                if route_flights and on_hub_result:
+                    on_hub_result(route_flights[0].via, route_flights)
 
-            consecutive_failures = 0  # Reset on success
+                if len(connecting_flights) >= TARGET_ITINERARIES:
+                    break
+        finally:
+            # Cancel route searches still in flight (no-op for finished ones)
+            for task in tasks:
+                task.cancel()
 
-            # Combine valid itineraries
-            for leg1 in leg1_offers[:2]:  # Limit combinations
-                for leg2 in leg2_offers[:2]:
-                    if is_valid_layover(leg1.arrival, leg2.departure):
-                        combined = combine_legs(leg1, leg2, hub, trip.origin, trip.destination)
-                        connecting_flights.append(combined)
+        # Keep route ranking order regardless of which search finished first
+        connecting_flights.sort(key=lambda f: labels.index(f.via))
 
         # If all attempts failed, fall back to mock data
-        if not connecting_flights and consecutive_failures >= len(hubs):
+        if not connecting_flights and failed_routes >= len(routes):
             print(f"All Amadeus connecting flight searches failed, falling back to mock data")
             mock_service = MockFlightsService()
-            connecting_flights = await mock_service.search_connecting_flights(trip)
+            connecting_flights = await mock_service.search_connecting_flights(trip, on_hub_result)
 
         return connecting_flights
@@ -0,0 +1,324 @@
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Protocol
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fresh_until: float  # Wall-clock time, so entries can be shared across processes
+    stale_until: float  # Served while a background refresh runs until this time
+    size: int = 0
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0  # Misses that joined a fetch already in flight
+    refreshes: int = 0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        served = self.hits + self.stale_hits + self.coalesced
+        data["hit_rate"] = round(served / lookups, 3) if lookups else 0.0
+        return data
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        ...
+
+    async def set(self, key: str, entry: CacheEntry):
+        ...
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU store bounded by entry count and by approximate memory
+    (pickled size of each value).
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() >= entry.stale_until:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry):
+        if not entry.size:
+            entry.size = len(pickle.dumps(entry.value, protocol=pickle.HIGHEST_PROTOCOL))
+        if entry.size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self.total_bytes += entry.size
+
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Shared store for running several API workers behind one cache.
+    Needs the optional `redis` package (pip install redis).
+    """
+
+    def __init__(self, url: str, prefix: str = "travel-buddie:"):
+        import redis.asyncio as redis
+        self.redis = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            data = await self.redis.get(self.prefix + key)
+        except Exception as e:
+            print(f"Redis cache get error: {e}")
+            return None
+        return pickle.loads(data) if data else None
+
+    async def set(self, key: str, entry: CacheEntry):
+        expire = max(1, int(entry.stale_until - time.time()))
+        try:
+            await self.redis.set(self.prefix + key, pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL), ex=expire)
+        except Exception as e:
+            print(f"Redis cache set error: {e}")
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Single-file store that survives restarts. Queries run on a worker thread
+    so a slow disk or a commit never blocks the event loop; one lock
+    serializes them on the shared connection.
+    """
+
+    def __init__(self, path: str, table: str = "cache_entries"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.table = table
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # A cache can lose its last writes on power loss; WAL keeps it consistent
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, entry BLOB NOT NULL, stale_until REAL NOT NULL)"
+        )
+        # Expired rows are only otherwise removed when read
+        self.conn.execute(f"DELETE FROM {table} WHERE stale_until < ?", (time.time(),))
+
+    def _get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self.conn.execute(f"SELECT entry, stale_until FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if time.time() >= row[1]:
+                self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+        return pickle.loads(row[0])
+
+    def _set(self, key: str, entry: CacheEntry):
+        blob = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, entry, stale_until) VALUES (?, ?, ?)",
+                (key, blob, entry.stale_until)
+            )
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            return await asyncio.to_thread(self._get, key)
+        except sqlite3.Error as e:
+            print(f"SQLite cache get error: {e}")
+            return None
+
+    async def set(self, key: str, entry: CacheEntry):
+        try:
+            await asyncio.to_thread(self._set, key, entry)
+        except sqlite3.Error as e:
+            print(f"SQLite cache set error: {e}")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class TieredCacheBackend(CacheBackend):
+    """Memory in front of a slower persistent store. Disk hits are promoted to memory."""
+
+    def __init__(self, front: CacheBackend, back: CacheBackend):
+        self.front = front
+        self.back = back
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = await self.front.get(key)
+        if entry is None:
+            entry = await self.back.get(key)
+            if entry is not None:
+                await self.front.set(key, entry)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry):
+        await self.front.set(key, entry)
+        await self.back.set(key, entry)
+
+
+# A fetch nobody is waiting for any more (every caller was cancelled, or a
+# stale-while-revalidate refresh) is cancelled after this many seconds
+ORPHAN_FETCH_TIMEOUT = float(os.getenv("CACHE_ORPHAN_FETCH_TIMEOUT", "30"))
+
+
+@dataclass
+class _Call:
+    future: asyncio.Future
+    waiters: int = 0
+    orphan_timer: Optional[asyncio.TimerHandle] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one upstream request.
+    Late callers await the call already in flight instead of starting another.
+    A call keeps running when its callers are cancelled, so it can still fill
+    the cache, but only for orphan_timeout seconds.
+    """
+
+    def __init__(self, orphan_timeout: float = ORPHAN_FETCH_TIMEOUT):
+        self.orphan_timeout = orphan_timeout
+        self._inflight: Dict[str, _Call] = {}
+
+    async def do(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._inflight.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fetch()))
+            self._inflight[key] = call
+            call.future.add_done_callback(lambda future: self._finished(key, call, future))
+        if call.orphan_timer:
+            call.orphan_timer.cancel()
+            call.orphan_timer = None
+
+        call.waiters += 1
+        try:
+            # Shield so one cancelled caller doesn't cancel the request for everyone else
+            return await asyncio.shield(call.future)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.future.done():
+                call.orphan_timer = asyncio.get_running_loop().call_later(self.orphan_timeout, call.future.cancel)
+
+    def _finished(self, key: str, call: _Call, future: asyncio.Future):
+        if self._inflight.get(key) is call:
+            del self._inflight[key]
+        if call.orphan_timer:
+            call.orphan_timer.cancel()
+        if not future.cancelled():
+            future.exception()  # Retrieved, so an orphaned failure isn't reported as unhandled
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+
+class TTLCache:
+    """
+    Read-through cache with a fresh TTL and a stale-while-revalidate window.
+    Fresh hits return immediately. Stale hits return the old value and refresh
+    in the background. Misses fetch inline, and concurrent misses for the same
+    key share one fetch. Empty results are not stored, so an upstream outage
+    is not cached.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, stale_ttl: float = 0.0,
+                 orphan_timeout: float = ORPHAN_FETCH_TIMEOUT):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stats = CacheStats()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._inflight = SingleFlight(orphan_timeout)
+
+    async def get_or_fetch(
+        self, key: str, fetch: Callable[[], Awaitable[Any]], refresh: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Any:
+        """
+        refresh replaces fetch for background refreshes. Pass it when fetch is
+        tied to the calling request (e.g. reports progress to it), since the
+        refresh outlives that request.
+        """
+        entry = await self.backend.get(key)
+        now = time.time()
+
+        if entry and now < entry.fresh_until:
+            self.stats.hits += 1
+            return entry.value
+
+        if entry and now < entry.stale_until:
+            self.stats.stale_hits += 1
+            self._refresh_in_background(key, refresh or fetch)
+            return entry.value
+
+        if key in self._inflight:
+            self.stats.coalesced += 1
+        else:
+            self.stats.misses += 1
+        return await self._inflight.do(key, lambda: self._fetch_and_store(key, fetch))
+
+    async def _fetch_and_store(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetch()
+        await self._store(key, value)
+        return value
+
+    async def _store(self, key: str, value: Any):
+        if not value:
+            return
+        now = time.time()
+        await self.backend.set(key, CacheEntry(
+            value=value,
+            fresh_until=now + self.ttl,
+            stale_until=now + self.ttl + self.stale_ttl
+        ))
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Awaitable[Any]]):
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                await self._store(key, await asyncio.wait_for(fetch(), self._inflight.orphan_timeout))
+                self.stats.refreshes += 1
+            except Exception as e:
+                print(f"Background cache refresh failed for {key}: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
@@ -0,0 +1,107 @@
+import os
+from typing import Dict, List, Optional
+from app.models.trip_request import TripExtraction
+from app.models.recommendation import FlightOffer, HotelOffer, CarRentalOffer
+from app.services.interfaces import IFlightsService, IHotelsService, ICarRentalService, HubResultCallback
+from app.services.cache import TTLCache, CacheBackend, InMemoryCacheBackend, RedisCacheBackend
+
+# Fresh / stale-while-revalidate windows in seconds per provider.
+# Flight prices move fastest, so they get the shortest TTL.
+CACHE_TTLS = {
+    "flights": (float(os.getenv("FLIGHTS_CACHE_TTL", "900")), float(os.getenv("FLIGHTS_CACHE_STALE_TTL", "300"))),
+    "hotels": (float(os.getenv("HOTELS_CACHE_TTL", "1800")), float(os.getenv("HOTELS_CACHE_STALE_TTL", "600"))),
+    "cars": (float(os.getenv("CARS_CACHE_TTL", "3600")), float(os.getenv("CARS_CACHE_STALE_TTL", "1800"))),
+    # One-way hub legs (e.g. HRE->JNB), shared by every connecting-flight search
+    "legs": (float(os.getenv("LEGS_CACHE_TTL", "900")), float(os.getenv("LEGS_CACHE_STALE_TTL", "300"))),
+}
+
+
+def build_search_caches() -> Dict[str, TTLCache]:
+    """
+    Build one TTL cache per provider on a shared backend.
+    SEARCH_CACHE_BACKEND=redis uses SEARCH_CACHE_REDIS_URL, otherwise results
+    stay in process memory.
+    """
+    backend: CacheBackend
+    if os.getenv("SEARCH_CACHE_BACKEND") == "redis":
+        backend = RedisCacheBackend(os.getenv("SEARCH_CACHE_REDIS_URL", "redis://localhost:6379/0"))
+    else:
+        backend = InMemoryCacheBackend(
+            max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000")),
+            max_bytes=int(os.getenv("SEARCH_CACHE_MAX_MB", "64")) * 1024 * 1024
+        )
+    return {name: TTLCache(backend, ttl, stale_ttl) for name, (ttl, stale_ttl) in CACHE_TTLS.items()}
+
+
+def _key(*parts) -> str:
+    return ":".join("" if p is None else str(p).upper() for p in parts)
+
+
+class CachedFlightsService(IFlightsService):
+    """Caches flight searches by route, dates and traveler count."""
+
+    def __init__(self, inner: IFlightsService, cache: TTLCache):
+        self.inner = inner
+        self.cache = cache
+
+    async def search_flights(self, trip: TripExtraction) -> List[FlightOffer]:
+        key = _key("flights", trip.origin, trip.destination, trip.start_date, trip.end_date, trip.travelers)
+        return list(await self.cache.get_or_fetch(key, lambda: self.inner.search_flights(trip)))
+
+    async def search_connecting_flights(
+        self, trip: TripExtraction, on_hub_result: Optional[HubResultCallback] = None
+    ) -> List[FlightOffer]:
+        key = _key("connecting", trip.origin, trip.destination, trip.start_date, trip.travelers)
+        if not on_hub_result:
+            return list(await self.cache.get_or_fetch(key, lambda: self.inner.search_connecting_flights(trip)))
+
+        reported = set()
+
+        def report(hub: str, flights: List[FlightOffer]):
+            reported.add(hub)
+            on_hub_result(hub, flights)
+
+        flights = list(await self.cache.get_or_fetch(
+            key,
+            lambda: self.inner.search_connecting_flights(trip, report),
+            # A stale entry's refresh outlives this request, so it must not report to it
+            refresh=lambda: self.inner.search_connecting_flights(trip)
+        ))
+
+        # Cache hits (or joining another caller's fetch) never saw the live
+        # callbacks, so replay the hubs from the result
+        by_hub: Dict[str, List[FlightOffer]] = {}
+        for flight in flights:
+            if flight.via and flight.via not in reported:
+                by_hub.setdefault(flight.via, []).append(flight)
+        for hub, hub_flights in by_hub.items():
+            on_hub_result(hub, hub_flights)
+        return flights
+
+    async def search_flexible_dates(self, trip: TripExtraction, window_days: int) -> List[FlightOffer]:
+        key = _key("flexible", trip.origin, trip.destination, trip.start_date, trip.end_date, trip.travelers, window_days)
+        return list(await self.cache.get_or_fetch(key, lambda: self.inner.search_flexible_dates(trip, window_days)))
+
+
+class CachedHotelsService(IHotelsService):
+    """Caches hotel searches by destination, dates and traveler count."""
+
+    def __init__(self, inner: IHotelsService, cache: TTLCache):
+        self.inner = inner
+        self.cache = cache
+
+    async def search_hotels(self, trip: TripExtraction) -> List[HotelOffer]:
+        key = _key("hotels", trip.destination, trip.start_date, trip.end_date, trip.travelers)
+        return list(await self.cache.get_or_fetch(key, lambda: self.inner.search_hotels(trip)))
+
+
+class CachedCarRentalService(ICarRentalService):
+    """Caches car rental searches by destination and dates."""
+
+    def __init__(self, inner: ICarRentalService, cache: TTLCache):
+        self.inner = inner
+        self.cache = cache
+
+    async def search_cars(self, trip: TripExtraction) -> List[CarRentalOffer]:
+        key = _key("cars", trip.destination, trip.start_date, trip.end_date)
+        return list(await self.cache.get_or_fetch(key, lambda: self.inner.search_cars(trip)))
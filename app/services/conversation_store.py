@@ -0,0 +1,67 @@
+import os
+import time
+import uuid
+from typing import Optional, Protocol
+from app.models.trip_request import TripExtraction, TRIP_SLOTS
+from app.services.cache import CacheBackend, CacheEntry, InMemoryCacheBackend, RedisCacheBackend
+
+# Conversations idle for longer than this start over
+CONVERSATION_TTL = float(os.getenv("CONVERSATION_TTL", "1800"))
+
+
+class IConversationStore(Protocol):
+    async def get(self, conversation_id: str) -> Optional[TripExtraction]:
+        ...
+
+    async def save(self, conversation_id: str, trip: TripExtraction):
+        ...
+
+
+class ConversationStore(IConversationStore):
+    """
+    Partially filled trips keyed by conversation id, so a follow-up like
+    "2 people" only has to supply what's missing. Sits on any cache
+    backend: process memory by default, Redis when several workers share
+    conversations. Every save restarts the idle TTL.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = CONVERSATION_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    async def get(self, conversation_id: str) -> Optional[TripExtraction]:
+        entry = await self.backend.get(f"conversation:{conversation_id}")
+        if entry is None or time.time() >= entry.stale_until:
+            return None
+        return TripExtraction(**entry.value)
+
+    async def save(self, conversation_id: str, trip: TripExtraction):
+        expires = time.time() + self.ttl
+        await self.backend.set(
+            f"conversation:{conversation_id}",
+            CacheEntry(value=trip.model_dump(), fresh_until=expires, stale_until=expires)
+        )
+
+
+def build_conversation_store() -> ConversationStore:
+    """CONVERSATION_BACKEND=redis uses CONVERSATION_REDIS_URL, otherwise memory."""
+    backend: CacheBackend
+    if os.getenv("CONVERSATION_BACKEND") == "redis":
+        backend = RedisCacheBackend(os.getenv("CONVERSATION_REDIS_URL", "redis://localhost:6379/0"))
+    else:
+        backend = InMemoryCacheBackend(max_entries=int(os.getenv("CONVERSATION_MAX_ENTRIES", "10000")))
+    return ConversationStore(backend)
+
+
+def new_conversation_id() -> str:
+    return uuid.uuid4().hex
+
+
+def merge_trips(known: TripExtraction, delta: TripExtraction) -> TripExtraction:
+    """
+    Fill in a stored trip with what the latest message added. New values win,
+    so "actually make it 3 people" corrects the earlier answer. The reply and
+    missing fields are left for validation to recompute on the merged trip.
+    """
+    updates = {slot: getattr(delta, slot) for slot in TRIP_SLOTS if getattr(delta, slot) is not None}
+    return known.model_copy(update={**updates, "reply_message": None, "missing_fields": []})
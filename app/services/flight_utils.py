@@ -1,62 +1,162 @@
+import calendar
+import os
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 from app.models.recommendation import FlightOffer, LegInfo
+from app.models.trip_request import TripExtraction
 
 MIN_LAYOVER_HOURS = 1.5
 MAX_LAYOVER_HOURS = 8
+# Flexible-date trips may be this many nights shorter or longer than asked for
+FLEXIBLE_NIGHTS_TOLERANCE = int(os.getenv("FLEXIBLE_NIGHTS_TOLERANCE", "1"))
 
-def parse_datetime(dt_str: str) -> datetime:
-    """Parse ISO datetime string."""
-    # Handle various formats
-    for fmt in ["%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M"]:
-        try:
-            return datetime.strptime(dt_str, fmt)
-        except ValueError:
-            continue
-    raise ValueError(f"Unable to parse datetime: {dt_str}")
+def route_label(stops) -> str:
+    """The via value for a route: "DXB", or "ADD-FRA" for two stops."""
+    return "-".join(stops)
+
+def to_epoch(dt_str: str) -> Optional[int]:
+    """ISO datetime string as seconds, or None if it can't be parsed."""
+    try:
+        return calendar.timegm(datetime.fromisoformat(dt_str).timetuple())
+    except (TypeError, ValueError):
+        return None
 
-def is_valid_layover(arrival_time: str, departure_time: str) -> bool:
+def join_legs(leg_offers: List[List[FlightOffer]]) -> List[List[FlightOffer]]:
     """
-    Check if layover time is valid (between MIN and MAX hours).
+    Every sequence of one offer per leg with a valid layover at each stop.
+    Each offer's times are parsed once, and each later leg is sorted by
+    departure so the offers inside an arrival's layover window are found by
+    binary search instead of checking every pair.
     """
-    try:
-        arrival = parse_datetime(arrival_time)
-        departure = parse_datetime(departure_time)
-        
-        layover = departure - arrival
-        layover_hours = layover.total_seconds() / 3600
-        
-        return MIN_LAYOVER_HOURS <= layover_hours <= MAX_LAYOVER_HOURS
-    except Exception:
-        return False
-
-def combine_legs(leg1: FlightOffer, leg2: FlightOffer, hub: str, origin: str = None, destination: str = None) -> FlightOffer:
+    min_layover = int(MIN_LAYOVER_HOURS * 3600)
+    max_layover = int(MAX_LAYOVER_HOURS * 3600)
+
+    # (chain so far, arrival of its last leg)
+    chains = []
+    for offer in leg_offers[0]:
+        arrival = to_epoch(offer.arrival)
+        if arrival is not None:
+            chains.append(([offer], arrival))
+
+    for offers in leg_offers[1:]:
+        timed = []
+        for offer in offers:
+            departure, arrival = to_epoch(offer.departure), to_epoch(offer.arrival)
+            if departure is not None and arrival is not None:
+                timed.append((departure, arrival, offer))
+        timed.sort(key=lambda t: t[0])
+        departures = [t[0] for t in timed]
+
+        next_chains = []
+        for chain, arrival in chains:
+            first = bisect_left(departures, arrival + min_layover)
+            last = bisect_right(departures, arrival + max_layover)
+            for _, next_arrival, offer in timed[first:last]:
+                next_chains.append((chain + [offer], next_arrival))
+        chains = next_chains
+
+    return [chain for chain, _ in chains]
+
+def combine_path(legs: List[FlightOffer], airports: List[str]) -> FlightOffer:
     """
-    Combine two flight offers into a single connecting flight.
+    Combine one offer per leg into a single connecting flight.
+    airports is the full path, origin and destination included.
     """
-    leg1_info = LegInfo(
-        airline=leg1.airline,
-        origin=origin or "???",
-        destination=hub,
-        departure=leg1.departure,
-        arrival=leg1.arrival
-    )
-    
-    leg2_info = LegInfo(
-        airline=leg2.airline,
-        origin=hub,
-        destination=destination or "???",
-        departure=leg2.departure,
-        arrival=leg2.arrival
-    )
-    
-    total_price = leg1.price + leg2.price
-    
+    leg_infos = []
+    for i, leg in enumerate(legs):
+        if leg.legs:
+            # Offer that itself has stops: keep its segments
+            leg_infos.extend(leg.legs)
+        else:
+            leg_infos.append(LegInfo(
+                airline=leg.airline,
+                origin=airports[i],
+                destination=airports[i + 1],
+                departure=leg.departure,
+                arrival=leg.arrival
+            ))
+    stops = airports[1:-1]
+
     return FlightOffer(
-        airline=f"{leg1.airline} + {leg2.airline}",
-        price=total_price,
-        departure=leg1.departure,
-        arrival=leg2.arrival,
-        layovers=1,
-        via=hub,
-        legs=[leg1_info, leg2_info]
+        airline=" + ".join(leg.airline for leg in legs),
+        price=sum(leg.price for leg in legs),
+        departure=legs[0].departure,
+        arrival=legs[-1].arrival,
+        layovers=len(stops) + sum(leg.layovers for leg in legs),
+        via=route_label(stops),
+        legs=leg_infos
     )
+
+def trip_length(trip: TripExtraction) -> int:
+    """Nights between the trip's start and end dates."""
+    start = datetime.strptime(trip.start_date, "%Y-%m-%d")
+    end = datetime.strptime(trip.end_date, "%Y-%m-%d")
+    return (end - start).days
+
+def date_window(center: str, window_days: int) -> List[str]:
+    """YYYY-MM-DD dates within window_days of center, skipping any already past."""
+    day = datetime.strptime(center, "%Y-%m-%d").date()
+    today = datetime.now().date()
+    dates = [day + timedelta(days=offset) for offset in range(-window_days, window_days + 1)]
+    return [d.isoformat() for d in dates if d >= today]
+
+def _dedupe(offers: List[FlightOffer]) -> List[FlightOffer]:
+    # Overlapping searches can return the same flight more than once
+    seen = set()
+    unique = []
+    for offer in offers:
+        key = (offer.airline, offer.departure, offer.arrival, offer.price)
+        if key not in seen:
+            seen.add(key)
+            unique.append(offer)
+    return unique
+
+def pair_round_trips(
+    outbound: Dict[str, List[FlightOffer]],
+    inbound: Dict[str, List[FlightOffer]],
+    nights: int,
+    tolerance: int = FLEXIBLE_NIGHTS_TOLERANCE
+) -> List[FlightOffer]:
+    """
+    Round trips from one-way results keyed by date: for every departure date
+    and return date that keep the trip within tolerance nights of the
+    requested length, the cheapest outbound plus the cheapest return.
+    Each offer's return_date says which pair it is. Sorted by departure
+    date, then return date.
+    """
+    cheapest_out = {day: min(_dedupe(offers), key=lambda o: o.price) for day, offers in outbound.items() if offers}
+    cheapest_back = {day: min(_dedupe(offers), key=lambda o: o.price) for day, offers in inbound.items() if offers}
+
+    round_trips = []
+    for out_day, out in sorted(cheapest_out.items()):
+        for back_day, back in sorted(cheapest_back.items()):
+            length = (datetime.fromisoformat(back_day) - datetime.fromisoformat(out_day)).days
+            if length < 1 or abs(length - nights) > tolerance:
+                continue
+            airline = out.airline if out.airline == back.airline else f"{out.airline} / {back.airline}"
+            round_trips.append(FlightOffer(
+                airline=airline,
+                price=out.price + back.price,
+                departure=out.departure,
+                arrival=out.arrival,
+                layovers=out.layovers,
+                legs=out.legs,
+                via=out.via,
+                return_date=back_day
+            ))
+    return round_trips
+
+def price_calendar(flights: List[FlightOffer]) -> List[dict]:
+    """Cheapest round trip per departure date, for flights from a flexible-date search."""
+    best: Dict[str, FlightOffer] = {}
+    for flight in flights:
+        if not flight.return_date:
+            continue
+        day = flight.departure[:10]
+        if day not in best or flight.price < best[day].price:
+            best[day] = flight
+    return [
+        {"departure_date": day, "return_date": flight.return_date, "price": flight.price}
+        for day, flight in sorted(best.items())
+    ]
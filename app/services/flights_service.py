@@ -1,8 +1,11 @@
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Optional
 from app.models.trip_request import TripExtraction
 from app.models.recommendation import FlightOffer, LegInfo
-from app.services.interfaces import IFlightsService
-from app.config.hubs import get_hubs_for_origin
+from app.services.interfaces import IFlightsService, HubResultCallback
+from app.config.hubs import MAX_HUBS
+from app.services.flight_utils import date_window, pair_round_trips, route_label, trip_length
+from app.services.route_graph import get_route_graph
 
 class MockFlightsService(IFlightsService):
     async def search_flights(self, trip: TripExtraction) -> List[FlightOffer]:
@@ -42,41 +45,67 @@ class MockFlightsService(IFlightsService):
         )
 
         return [f1, f2, f3]
+
+    async def search_flexible_dates(self, trip: TripExtraction, window_days: int) -> List[FlightOffer]:
+        """
+        Mock flexible-date search: one-way fares that vary by day, paired
+        into round trips the same way the Amadeus service does.
+        """
+        if trip.origin in ["JFK", "NYC"] and trip.destination in ["LON", "LHR"]:
+            return []
+
+        def one_way(date: str) -> List[FlightOffer]:
+            # Fares swing up to $75 either way from day to day, the two airlines in opposite directions
+            swing = (datetime.fromisoformat(date).toordinal() * 37 % 7 - 3) * 25
+            return [
+                FlightOffer(airline="Emirates", price=550 + swing, departure=f"{date}T14:00",
+                            arrival=f"{date}T23:00", layovers=0),
+                FlightOffer(airline="FlyDubai", price=550 - swing, departure=f"{date}T06:00",
+                            arrival=f"{date}T20:00", layovers=2)
+            ]
+
+        outbound = {date: one_way(date) for date in date_window(trip.start_date, window_days)}
+        inbound = {date: one_way(date) for date in date_window(trip.end_date, window_days)}
+        return pair_round_trips(outbound, inbound, trip_length(trip))
     
-    async def search_connecting_flights(self, trip: TripExtraction) -> List[FlightOffer]:
+    async def search_connecting_flights(
+        self, trip: TripExtraction, on_hub_result: Optional[HubResultCallback] = None
+    ) -> List[FlightOffer]:
         """
-        Search for connecting flights via major hubs.
+        Search for connecting flights along the best-ranked routes.
         """
-        hubs = get_hubs_for_origin(trip.origin)[:2]  # Try top 2 hubs
+        routes = get_route_graph().rank_routes(trip.origin, trip.destination, MAX_HUBS)
         connecting_flights = []
         
-        for hub in hubs:
-            # Mock: Create a connecting itinerary via this hub
-            leg1 = LegInfo(
-                airline="South African Airways",
-                origin=trip.origin,
-                destination=hub,
-                departure=f"{trip.start_date}T08:00",
-                arrival=f"{trip.start_date}T12:00"
-            )
+        for rank, stops in enumerate(routes):
+            # Mock: a connecting itinerary along this route, 3h at each stop
+            airports = [trip.origin, *stops, trip.destination]
+            departure = datetime.fromisoformat(f"{trip.start_date}T08:00")
+            legs = []
+            for i, (leg_origin, leg_destination) in enumerate(zip(airports, airports[1:])):
+                last = i == len(stops)
+                arrival = departure + timedelta(hours=8 if last else 4)
+                legs.append(LegInfo(
+                    airline="South African Airways" if i == 0 else ("Emirates" if leg_origin == "DXB" else "Ethiopian"),
+                    origin=leg_origin,
+                    destination=leg_destination,
+                    departure=departure.strftime("%Y-%m-%dT%H:%M"),
+                    arrival=arrival.strftime("%Y-%m-%dT%H:%M")
+                ))
+                departure = arrival + timedelta(hours=3)
             
-            leg2 = LegInfo(
-                airline="Emirates" if hub == "DXB" else "Ethiopian",
-                origin=hub,
-                destination=trip.destination,
-                departure=f"{trip.start_date}T15:00",
-                arrival=f"{trip.start_date}T23:00"
+            # Combined offer, better-ranked routes priced lower
+            hub_flight = FlightOffer(
+                airline=" + ".join(leg.airline for leg in legs),
+                price=1800 + 300 * rank,
+                departure=legs[0].departure,
+                arrival=legs[-1].arrival,
+                layovers=len(stops),
+                via=route_label(stops),
+                legs=legs
             )
-            
-            # Combined offer
-            connecting_flights.append(FlightOffer(
-                airline=f"{leg1.airline} + {leg2.airline}",
-                price=1800 if hub == "JNB" else 2100,
-                departure=leg1.departure,
-                arrival=leg2.arrival,
-                layovers=1,
-                via=hub,
-                legs=[leg1, leg2]
-            ))
+            connecting_flights.append(hub_flight)
+            if on_hub_result:
+                on_hub_result(hub_flight.via, [hub_flight])
         
         return connecting_flights
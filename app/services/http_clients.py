@@ -0,0 +1,74 @@
+import os
+import httpx
+from typing import Dict
+
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]")
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Connection settings per upstream host. Each value can be overridden with
+# an env var named <UPSTREAM>_<SETTING>, e.g. AMADEUS_MAX_CONNECTIONS=50
+UPSTREAMS = {
+    "amadeus": {
+        "timeout": 60.0,
+        "connect_timeout": 10.0,
+        "max_connections": 20,
+        "max_keepalive_connections": 10,
+        "keepalive_expiry": 30.0,
+    },
+    "travelbriefing": {
+        "timeout": 15.0,
+        "connect_timeout": 5.0,
+        "max_connections": 10,
+        "max_keepalive_connections": 5,
+        "keepalive_expiry": 30.0,
+    },
+}
+
+
+def _setting(upstream: str, name: str, default):
+    value = os.getenv(f"{upstream.upper()}_{name.upper()}")
+    if value is None:
+        return default
+    return type(default)(value)
+
+
+def build_client(upstream: str) -> httpx.AsyncClient:
+    """Build a pooled keep-alive client configured for one upstream."""
+    defaults = UPSTREAMS[upstream]
+    settings = {name: _setting(upstream, name, default) for name, default in defaults.items()}
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(settings["timeout"], connect=settings["connect_timeout"]),
+        limits=httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_keepalive_connections"],
+            keepalive_expiry=settings["keepalive_expiry"],
+        ),
+        http2=HTTP2_AVAILABLE and os.getenv("HTTP2_ENABLED", "true") == "true",
+    )
+
+
+class HttpClients:
+    """
+    Application-scoped pool of HTTP clients, one per upstream.
+    Created in the FastAPI lifespan so every request reuses warm connections.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def get(self, upstream: str) -> httpx.AsyncClient:
+        client = self._clients.get(upstream)
+        if client is None or client.is_closed:
+            client = build_client(upstream)
+            self._clients[upstream] = client
+        return client
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
@@ -0,0 +1,95 @@
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from app.models.trip_request import TripExtraction, REQUIRED_FIELDS
+from app.services.interfaces import INLPService
+from app.services.nlp_service import RegexNLPService
+from app.services.openai_service import OpenAINLPService
+
+# Fields scoring below this are re-extracted by the LLM
+CONFIDENCE_THRESHOLD = float(os.getenv("NLP_CONFIDENCE_THRESHOLD", "0.8"))
+
+# Optional fields only escalate when the message seems to mention them.
+# Most messages carry no nationality, and asking the LLM won't invent one.
+OPTIONAL_FIELD_HINTS = {
+    "budget": re.compile(r'budget|\$|£|€|\busd\b|dollars?|euros?|pounds?|\bafford', re.IGNORECASE),
+    "nationality": re.compile(r'citizen|passport|nationality|\bnational\b|\bi\'?m from\b|\bi am from\b', re.IGNORECASE),
+}
+
+
+@dataclass
+class EscalationStats:
+    messages: int = 0
+    escalated: int = 0
+    llm_errors: int = 0
+    fields: Counter = field(default_factory=Counter)  # How often each field went to the LLM
+
+    def as_dict(self) -> dict:
+        return {
+            "messages": self.messages,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / self.messages, 3) if self.messages else 0.0,
+            "llm_errors": self.llm_errors,
+            "escalated_fields": dict(self.fields),
+        }
+
+
+class HybridNLPService(INLPService):
+    """
+    Regex extractor first, LLM only for what it couldn't fill.
+    Each field the regex pass scores below the confidence threshold is sent
+    to the LLM, and the LLM's answer replaces it. Well-formed messages
+    ("HRE to LHR from 2026-12-01 to 2026-12-10 for 2 people $3000") never
+    leave the process. If the LLM call fails, the regex result is used as is.
+    """
+
+    def __init__(self, fast: RegexNLPService, llm: OpenAINLPService, threshold: float = CONFIDENCE_THRESHOLD):
+        self.fast = fast
+        self.llm = llm
+        self.threshold = threshold
+        self.stats = EscalationStats()
+
+    def _fields_to_escalate(
+        self, text: str, confidence: Dict[str, float], known: Optional[TripExtraction]
+    ) -> List[str]:
+        # The search can't run without the required fields, so a missing one always escalates
+        fields = [name for name in REQUIRED_FIELDS if confidence[name] < self.threshold]
+        for name, hint in OPTIONAL_FIELD_HINTS.items():
+            if confidence[name] < self.threshold and hint.search(text):
+                fields.append(name)
+        if known is not None:
+            # Not mentioned this turn but answered earlier in the conversation
+            fields = [name for name in fields if confidence[name] > 0 or getattr(known, name) is None]
+        return fields
+
+    async def extract(self, text: str, known: Optional[TripExtraction] = None) -> TripExtraction:
+        trip, confidence = await self.fast.extract_with_confidence(text)
+        self.stats.messages += 1
+
+        fields = self._fields_to_escalate(text, confidence, known)
+        if not fields:
+            return trip
+
+        self.stats.escalated += 1
+        self.stats.fields.update(fields)
+        llm_trip = await self.llm.extract(text, fields=fields)
+        if llm_trip.reply_message == OpenAINLPService.ERROR_REPLY:
+            self.stats.llm_errors += 1
+            return trip
+
+        merged = trip.model_copy(update={name: getattr(llm_trip, name) for name in fields})
+        merged.missing_fields = [name for name in REQUIRED_FIELDS if getattr(merged, name) is None]
+        # The LLM's follow-up question only makes sense if something is still missing
+        merged.reply_message = llm_trip.reply_message if merged.missing_fields else None
+        return merged
+
+    def metrics(self) -> dict:
+        return {**self.stats.as_dict(), "llm": self.llm.metrics()}
+
+    async def warm_up(self):
+        await self.fast.warm_up()
+
+    async def aclose(self):
+        await self.llm.aclose()
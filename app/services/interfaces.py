@@ -1,12 +1,22 @@
-from typing import List, Protocol
+from typing import Callable, List, Optional, Protocol
 from app.models.trip_request import TripExtraction
 from app.models.recommendation import FlightOffer, HotelOffer, CarRentalOffer
 
+# Called with (hub, itineraries via that hub) as each hub's search completes
+HubResultCallback = Callable[[str, List[FlightOffer]], None]
+
 class IFlightsService(Protocol):
     async def search_flights(self, trip: TripExtraction) -> List[FlightOffer]:
         ...
     
-    async def search_connecting_flights(self, trip: TripExtraction) -> List[FlightOffer]:
+    async def search_connecting_flights(
+        self, trip: TripExtraction, on_hub_result: Optional[HubResultCallback] = None
+    ) -> List[FlightOffer]:
+        ...
+
+    # Round trips for every date pair within window_days of the trip's dates,
+    # each with its return_date set
+    async def search_flexible_dates(self, trip: TripExtraction, window_days: int) -> List[FlightOffer]:
         ...
 
 class IHotelsService(Protocol):
@@ -14,7 +24,8 @@ class IHotelsService(Protocol):
         ...
 
 class INLPService(Protocol):
-    async def extract(self, text: str) -> TripExtraction:
+    # known: the trip so far in this conversation, so only the gaps need extracting
+    async def extract(self, text: str, known: Optional[TripExtraction] = None) -> TripExtraction:
         ...
 
 class ICarRentalService(Protocol):
@@ -0,0 +1,228 @@
+import csv
+import difflib
+import os
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+DATA_DIR = os.getenv("LOCATIONS_DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data"))
+
+# Place names that are also everyday words. In free text they only count
+# when capitalised as written here ("Nice", not "a nice hotel").
+AMBIGUOUS_NAMES = {"nice", "split", "male", "cork", "victoria", "jordan", "sofia", "charlotte", "austin", "florence", "phoenix"}
+
+# Fuzzy fallback for misspellings ("Hararee"): minimum difflib similarity
+FUZZY_CUTOFF = 0.85
+
+
+@dataclass(frozen=True)
+class Location:
+    iata: str
+    name: str  # Airport name
+    city: str
+    country: str
+    country_code: str
+    region: str  # Same keys as config.hubs.HUBS
+    latitude: float
+    longitude: float
+
+
+@dataclass(frozen=True)
+class LocationMatch:
+    start: int
+    end: int
+    text: str  # As written in the message
+    location: Location
+    kind: str  # "iata", "city", "alias", "airport" or "country"
+
+
+def _fold(text: str) -> str:
+    # Lowercase without changing length, so match offsets line up with the original text
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+class _Automaton:
+    """Aho-Corasick matcher: finds every pattern in one pass over the text."""
+
+    def __init__(self, patterns: List[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[int]] = [[]]
+        self.lengths = [len(p) for p in patterns]
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = next_state
+            self.out[state].append(pattern_id)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.out[next_state] = self.out[next_state] + self.out[self.fail[next_state]]
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """(start, end, pattern id) for every occurrence, overlapping ones included."""
+        found = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for pattern_id in self.out[state]:
+                found.append((i + 1 - self.lengths[pattern_id], i + 1, pattern_id))
+        return found
+
+
+class LocationIndex:
+    """
+    Every place name we know (IATA and metro codes, cities, airport names,
+    aliases, countries) compiled into one automaton. find_all() scans a
+    message once, so the cost depends on the message length, not on how
+    many airports are loaded.
+
+    The first airport listed for a city is that city's airport
+    ("London" -> LHR), and countries resolve to their main airport.
+    """
+
+    def __init__(self, airports_path: str, countries_path: str):
+        with open(countries_path, newline="", encoding="utf-8") as f:
+            countries = list(csv.DictReader(f))
+        country_info = {row["code"]: row for row in countries}
+
+        self.airports: Dict[str, Location] = {}
+        self._codes: Dict[str, Location] = {}  # IATA + metro codes, exact case
+        self._names: Dict[str, Tuple[Location, str]] = {}  # Folded name -> (location, kind)
+        self._exact: Dict[str, str] = {}  # Folded name -> spelling it must match in free text
+
+        aliases: List[Tuple[str, Location]] = []
+        airport_names: List[Tuple[str, Location]] = []
+        with open(airports_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                country = country_info.get(row["country_code"], {})
+                location = Location(
+                    iata=row["iata"],
+                    name=row["name"],
+                    city=row["city"],
+                    country=country.get("name", row["country_code"]),
+                    country_code=row["country_code"],
+                    region=country.get("region", ""),
+                    latitude=float(row["latitude"]),
+                    longitude=float(row["longitude"]),
+                )
+                self.airports[location.iata] = location
+                self._codes[location.iata] = location
+                self._add_name(location.city, location, "city")
+                for alias in filter(None, row["aliases"].split("|")):
+                    aliases.append((alias, location))
+                airport_names.append((location.name, location))
+                short_name = location.name.replace(" International Airport", "").replace(" Airport", "")
+                if short_name != location.name:
+                    airport_names.append((short_name, location))
+
+        # Cities win over aliases, aliases over airport names, and those over countries
+        for alias, location in aliases:
+            if alias.isupper() and len(alias) <= 3:
+                self._codes.setdefault(alias, location)  # Metro codes like LON, NYC
+            else:
+                self._add_name(alias, location, "alias")
+        for name, location in airport_names:
+            self._add_name(name, location, "airport")
+        for row in countries:
+            main = self.airports.get(row["main_airport"])
+            if main:
+                for name in [row["name"]] + list(filter(None, row["aliases"].split("|"))):
+                    self._add_name(name, main, "country")
+
+        self._name_list = list(self._names)
+        self._patterns = self._name_list + list(self._codes)
+        self._automaton = _Automaton(self._name_list + [code.lower() for code in self._codes])
+
+    def _add_name(self, name: str, location: Location, kind: str):
+        key = _fold(name)
+        if key in self._names:
+            return
+        self._names[key] = (location, kind)
+        if len(name) <= 3 or key in AMBIGUOUS_NAMES:
+            self._exact[key] = name
+
+    def by_iata(self, code: str) -> Optional[Location]:
+        return self._codes.get(code.upper()) if code else None
+
+    def resolve(self, name: str, fuzzy: bool = True) -> Optional[Location]:
+        """Look up one place name or code (case-insensitive, optionally fuzzy)."""
+        match = self.lookup(name, fuzzy)
+        return match[0] if match else None
+
+    def lookup(self, name: str, fuzzy: bool = True) -> Optional[Tuple[Location, str]]:
+        """Like resolve(), but also says how it matched ("city", "country", "fuzzy"...)."""
+        if not name:
+            return None
+        name = name.strip()
+        found = self._names.get(_fold(name))
+        if found:
+            return found
+        code = self._codes.get(name.upper())
+        if code and len(name) <= 3:
+            return code, "iata"
+        if fuzzy and len(name) >= 4:
+            close = difflib.get_close_matches(_fold(name), self._name_list, n=1, cutoff=FUZZY_CUTOFF)
+            if close:
+                return self._names[close[0]][0], "fuzzy"
+        return None
+
+    def find_all(self, text: str) -> List[LocationMatch]:
+        """
+        Every place mentioned in the text, leftmost-longest and non-overlapping
+        ("New York" rather than "York"). Codes only match in upper case
+        ("fly from LHR", not "man").
+        """
+        candidates = []
+        for start, end, pattern_id in self._automaton.find(_fold(text)):
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            written = text[start:end]
+            pattern = self._patterns[pattern_id]
+            if pattern_id < len(self._name_list):
+                if pattern in self._exact and written != self._exact[pattern]:
+                    continue
+                location, kind = self._names[pattern]
+            else:
+                if written != pattern:
+                    continue
+                location, kind = self._codes[pattern], "iata"
+            candidates.append(LocationMatch(start, end, written, location, kind))
+
+        candidates.sort(key=lambda m: (m.start, -(m.end - m.start)))
+        matches, covered = [], 0
+        for match in candidates:
+            if match.start >= covered:
+                matches.append(match)
+                covered = match.end
+        return matches
+
+    def __len__(self) -> int:
+        return len(self.airports)
+
+
+@lru_cache(maxsize=None)
+def get_location_index() -> LocationIndex:
+    """The bundled index, loaded on first use."""
+    return LocationIndex(os.path.join(DATA_DIR, "airports.csv"), os.path.join(DATA_DIR, "countries.csv"))
@@ -1,11 +1,154 @@
+import asyncio
+import os
 import re
-import dateparser
-from datetime import datetime
-from app.models.trip_request import TripExtraction
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from dateparser.date import DateDataParser
+from app.models.trip_request import TripExtraction, MAX_FLEXIBLE_DAYS
 from app.services.interfaces import INLPService
+from app.services.location_index import LocationMatch, get_location_index
+
+# Patterns are compiled once at import instead of on every message
+BUDGET_PATTERN = re.compile(r'\$(\d+)|(\d+)\s*(?:dollars|usd)', re.IGNORECASE)
+TRAVELERS_PATTERN = re.compile(r'(\d+)\s*(?:people|person|travelers|pax)', re.IGNORECASE)
+DATE_RANGE_PATTERN = re.compile(r'from\s+(.*?)\s+to\s+(.*?)(?:\s+for|\s+with|\s*$)', re.IGNORECASE)
+# A known place is the origin / destination when it directly follows these
+ORIGIN_KEYWORD = re.compile(r'\bfrom\s+(?:the\s+)?$', re.IGNORECASE)
+DESTINATION_KEYWORD = re.compile(r'\bto\s+(?:the\s+)?$', re.IGNORECASE)
+# Without a "from", a known place directly before "to" is the origin ("HRE to LHR")
+BEFORE_TO_KEYWORD = re.compile(r'\s+to\b', re.IGNORECASE)
+# Date flexibility: "± 3 days", "+/- 2 days", "3 days either side", or just "around" / "flexible"
+FLEXIBLE_DAYS_PATTERN = re.compile(
+    r'(?:±|\+/-|\+-|plus or minus|give or take)\s*(\d+)\s*days?|(\d+)\s*days?\s*(?:either side|either way|each way)',
+    re.IGNORECASE
+)
+FLEXIBLE_HINT = re.compile(r'\b(?:around|roughly|approximately|flexible)\b', re.IGNORECASE)
+# Fallback for misspelt or unknown places: the word after from / to
+ORIGIN_PATTERN = re.compile(r'\bfrom\s+([A-Za-z]+)')
+DESTINATION_PATTERN = re.compile(r'\bto\s+([A-Za-z]+)')
+
+# Languages dateparser may try. Restricting them skips language detection,
+# which is most of its per-call cost. Comma separated, e.g. "en,fr"
+DATEPARSER_LANGUAGES = [lang.strip() for lang in os.getenv("DATEPARSER_LANGUAGES", "en").split(",") if lang.strip()]
+DATE_CACHE_SIZE = int(os.getenv("DATE_CACHE_SIZE", "2048"))
+# Window for "around" / "flexible" without a number of days
+DEFAULT_FLEXIBLE_DAYS = int(os.getenv("DEFAULT_FLEXIBLE_DAYS", "3"))
+
+# Unambiguous full dates parsed without dateparser
+FAST_DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%d %B %Y",
+    "%d %b %Y",
+    "%B %d %Y",
+    "%b %d %Y",
+    "%B %d, %Y",
+    "%b %d, %Y",
+)
+
+_date_parser: Optional[DateDataParser] = None
+
+
+def _get_date_parser() -> DateDataParser:
+    global _date_parser
+    if _date_parser is None:
+        _date_parser = DateDataParser(
+            languages=DATEPARSER_LANGUAGES,
+            settings={'PREFER_DATES_FROM': 'future'}
+        )
+    return _date_parser
+
+
+def _parse_fast(phrase: str) -> Optional[str]:
+    for fmt in FAST_DATE_FORMATS:
+        try:
+            return datetime.strptime(phrase, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date_phrase(phrase: str, today: str) -> Optional[str]:
+    # today is part of the cache key because relative phrases ("next month")
+    # resolve differently from one day to the next
+    fast = _parse_fast(phrase)
+    if fast:
+        return fast
+    parsed = _get_date_parser().get_date_data(phrase).date_obj
+    return parsed.strftime("%Y-%m-%d") if parsed else None
+
+
+def parse_date(phrase: str) -> Optional[str]:
+    """Parse a date phrase to YYYY-MM-DD, or None if it isn't a date."""
+    return _parse_date_phrase(phrase.strip(), date.today().isoformat())
+
+
+def warm_up_date_parser():
+    """
+    Load dateparser's language data up front. The first parse otherwise
+    takes a few hundred ms, and would land on the first user's request.
+    """
+    _get_date_parser().get_date_data("in 2 weeks")
+
+
+# Confidence per extracted field, 0 when the field wasn't found
+CONFIDENCE_EXACT = 1.0        # Unambiguous match: ISO date, "$3000", a known city or code
+CONFIDENCE_DATEPARSER = 0.7   # Free-form date phrase ("next month") resolved by dateparser
+CONFIDENCE_FUZZY_PLACE = 0.7  # Misspelt city matched by similarity ("Hararee")
+CONFIDENCE_COUNTRY = 0.6      # A country, mapped to its main airport; the user may mean another city
+CONFIDENCE_UNKNOWN_PLACE = 0.5  # Capitalised word after from/to that isn't a known place
+CONFIDENCE_BAD_RANGE = 0.3    # Dates parsed but the trip ends before it starts
+
+
+def _keyword_locations(text: str) -> Tuple[Optional[LocationMatch], Optional[LocationMatch]]:
+    """
+    Known places written right after "from" and "to", in one scan of the text.
+    When no place follows "from", the first one written right before "to" is
+    the origin.
+    """
+    origin = destination = before_to = None
+    for match in get_location_index().find_all(text):
+        before = text[max(0, match.start - 12):match.start]
+        if origin is None and ORIGIN_KEYWORD.search(before):
+            origin = match
+        elif destination is None and DESTINATION_KEYWORD.search(before):
+            destination = match
+        elif before_to is None and BEFORE_TO_KEYWORD.match(text, match.end):
+            before_to = match
+    return origin or before_to, destination
+
+
+def _resolve_location(match: Optional[LocationMatch], text: str, fallback: re.Pattern) -> Tuple[Optional[str], float]:
+    """IATA code (or the raw name if unknown) and its confidence."""
+    if match:
+        return match.location.iata, CONFIDENCE_COUNTRY if match.kind == "country" else CONFIDENCE_EXACT
+
+    word = fallback.search(text)
+    if not word:
+        return None, 0.0
+    word = word.group(1)
+    # Short lowercase words ("for", "man") would collide with airport codes
+    found = get_location_index().lookup(word) if len(word) >= 4 or word.isupper() else None
+    if found:
+        location, kind = found
+        return location.iata, CONFIDENCE_FUZZY_PLACE if kind == "fuzzy" else CONFIDENCE_EXACT
+    if word[0].isupper():
+        return word, CONFIDENCE_UNKNOWN_PLACE
+    return None, 0.0
+
 
 class RegexNLPService(INLPService):
-    async def extract(self, text: str) -> TripExtraction:
+    async def warm_up(self):
+        await asyncio.to_thread(warm_up_date_parser)
+
+    async def extract(self, text: str, known: Optional[TripExtraction] = None) -> TripExtraction:
+        trip, _ = await self.extract_with_confidence(text)
+        return trip
+
+    async def extract_with_confidence(self, text: str) -> Tuple[TripExtraction, Dict[str, float]]:
+        """Extract a trip plus a 0-1 confidence for each field."""
         data = {
             "origin": None,
             "destination": None,
@@ -13,67 +156,72 @@ class RegexNLPService(INLPService):
             "end_date": None,
             "travelers": None,
             "budget": None,
+            "flexible_days": None,
             "missing_fields": []
         }
+        confidence = {
+            field: 0.0
+            for field in ("origin", "destination", "start_date", "end_date", "travelers", "budget", "nationality", "flexible_days")
+        }
         
         # 1. Extract Budget
-        budget_match = re.search(r'\$(\d+)|(\d+)\s*(?:dollars|usd)', text, re.IGNORECASE)
+        budget_match = BUDGET_PATTERN.search(text)
         if budget_match:
             amount = budget_match.group(1) or budget_match.group(2)
             data["budget"] = int(amount)
+            confidence["budget"] = CONFIDENCE_EXACT
         
         # 2. Extract Travelers
-        travelers_match = re.search(r'(\d+)\s*(?:people|person|travelers|pax)', text, re.IGNORECASE)
+        travelers_match = TRAVELERS_PATTERN.search(text)
         if travelers_match:
             data["travelers"] = int(travelers_match.group(1))
+            confidence["travelers"] = CONFIDENCE_EXACT
             
-        # 3. Extract Dates using dateparser
-        date_range_match = re.search(r'from\s+(.*?)\s+to\s+(.*?)(?:\s+for|\s+with|\s*$)', text, re.IGNORECASE)
-        
-        clean_text = text
+        # 3. Extract Dates (fast formats first, then dateparser, both cached).
+        # "± 3 days" and "around" aren't part of the dates themselves.
+        flexible_match = FLEXIBLE_DAYS_PATTERN.search(text)
+        clean_text = FLEXIBLE_DAYS_PATTERN.sub(" ", text) if flexible_match else text
+        date_range_match = DATE_RANGE_PATTERN.search(clean_text)
         
         if date_range_match:
-            start_str = date_range_match.group(1).strip()
-            end_str = date_range_match.group(2).strip()
+            start_str = FLEXIBLE_HINT.sub(" ", date_range_match.group(1))
+            end_str = FLEXIBLE_HINT.sub(" ", date_range_match.group(2))
+            start_date = parse_date(start_str)
+            end_date = parse_date(end_str) if start_date else None
             
-            start_dt = dateparser.parse(start_str, settings={'PREFER_DATES_FROM': 'future'})
-            end_dt = dateparser.parse(end_str, settings={'PREFER_DATES_FROM': 'future'})
-            
-            if start_dt and end_dt:
-                 data["start_date"] = start_dt.strftime("%Y-%m-%d")
-                 data["end_date"] = end_dt.strftime("%Y-%m-%d")
-                 clean_text = text.replace(date_range_match.group(0), " ")
-        
-        # 4. Extract Locations
-        origin_candidates = re.findall(r'\bfrom\s+([A-Z][a-z]+)', clean_text)
-        if origin_candidates:
-            data["origin"] = origin_candidates[0]
-
-        dest_candidates = re.findall(r'\bto\s+([A-Z][a-z]+)', clean_text)
-        if dest_candidates:
-            data["destination"] = dest_candidates[0]
-
-        # Mock Airport Codes
-        airport_codes = {
-            "Harare": "HRE",
-            "London": "LHR",
-            "Paris": "CDG",
-            "New York": "JFK",
-            "Tokyo": "NRT"
-        }
+            if start_date and end_date:
+                 data["start_date"] = start_date
+                 data["end_date"] = end_date
+                 clean_text = clean_text.replace(date_range_match.group(0), " ")
+
+                 if end_date < start_date:
+                     date_confidence = CONFIDENCE_BAD_RANGE
+                 elif _parse_fast(start_str.strip()) and _parse_fast(end_str.strip()):
+                     date_confidence = CONFIDENCE_EXACT
+                 else:
+                     date_confidence = CONFIDENCE_DATEPARSER
+                 confidence["start_date"] = confidence["end_date"] = date_confidence
+
+        if flexible_match:
+            data["flexible_days"] = min(int(flexible_match.group(1) or flexible_match.group(2)), MAX_FLEXIBLE_DAYS)
+            confidence["flexible_days"] = CONFIDENCE_EXACT
+        elif data["start_date"] and FLEXIBLE_HINT.search(text):
+            data["flexible_days"] = DEFAULT_FLEXIBLE_DAYS
+            confidence["flexible_days"] = CONFIDENCE_DATEPARSER
         
-        if data["origin"] in airport_codes:
-            data["origin"] = airport_codes[data["origin"]]
+        # 4. Extract Locations (multi-word names, aliases and codes via the location index)
+        origin_match, dest_match = _keyword_locations(clean_text)
+        data["origin"], confidence["origin"] = _resolve_location(origin_match, clean_text, ORIGIN_PATTERN)
+        data["destination"], confidence["destination"] = _resolve_location(dest_match, clean_text, DESTINATION_PATTERN)
         
         # 5. Check missing fields
-        required = ["origin", "destination", "start_date", "end_date", "travelers", "budget"]
         if data["missing_fields"]:
             missing_str = ", ".join(data["missing_fields"])
             data["reply_message"] = f"I need more information. Please provide: {missing_str}"
         else:
             data["reply_message"] = None
             
-        return TripExtraction(**data)
+        return TripExtraction(**data), confidence
 
 # Backwards compatibility for tests if needed, but we should update tests
 def extract_trip_data(text: str) -> TripExtraction:
@@ -1,30 +1,90 @@
+import hashlib
 import os
+from functools import lru_cache
+from typing import List, Optional
 from openai import AsyncOpenAI
-from app.models.trip_request import TripExtraction
+from app.models.trip_request import TripExtraction, REQUIRED_FIELDS
 from app.services.interfaces import INLPService
+from app.services.cache import TTLCache, InMemoryCacheBackend, SQLiteCacheBackend, TieredCacheBackend
 
 from datetime import datetime
 
+# Extraction cache. Keys include the current date (the prompt does too), so
+# entries never outlive the day they were made for. An empty path keeps the
+# cache in memory only.
+EXTRACTION_CACHE_TTL = float(os.getenv("OPENAI_CACHE_TTL", "86400"))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("OPENAI_CACHE_MAX_ENTRIES", "2048"))
+EXTRACTION_CACHE_PATH = os.getenv("OPENAI_CACHE_PATH", ".cache/openai_extractions.sqlite3")
+
+
+def build_extraction_cache(path: Optional[str] = EXTRACTION_CACHE_PATH) -> TTLCache:
+    backend = InMemoryCacheBackend(max_entries=EXTRACTION_CACHE_MAX_ENTRIES)
+    if path:
+        backend = TieredCacheBackend(backend, SQLiteCacheBackend(path, table="extractions"))
+    return TTLCache(backend, ttl=EXTRACTION_CACHE_TTL)
+
+
+def normalize_message(text: str) -> str:
+    """Collapse the differences that don't change the extraction: case, whitespace, trailing punctuation."""
+    return " ".join(text.split()).casefold().rstrip(" .!?")
+
+
+@lru_cache(maxsize=64)
+def _system_prompt(current_date: str, fields: Optional[tuple] = None) -> str:
+    prompt = f"You are a helpful travel assistant. Current date is {current_date}. Extract trip details from the user's message. If a field is missing, leave it as null. For dates, use YYYY-MM-DD format. For origin/destination, use IATA codes if possible, otherwise city names. If the user is flexible about dates (e.g. 'around mid-December', '± 2 days'), set flexible_days to the number of days either side (3 if they don't say). For nationality, extract country name if the user mentions where they are from (e.g. 'I'm from Zimbabwe', 'as a US citizen'). If the destination is a country or broad region (e.g. Japan, Europe), set destination to null and ask for a specific city in `reply_message`. If fields are missing, generate a polite, conversational question asking for them in `reply_message`. If all fields are present, set `reply_message` to null."
+    if fields:
+        prompt += f" Only these fields need extracting: {', '.join(fields)}. Other fields may be left null."
+    return prompt
+
+
 class OpenAINLPService(INLPService):
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    ERROR_REPLY = "I'm having trouble processing your request right now. Please try again later."
+
+    def __init__(self, client: Optional[AsyncOpenAI] = None, cache: Optional[TTLCache] = None, api_key: Optional[str] = None):
+        self._owns_client = client is None
+        self.client = client or AsyncOpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        # Retries and duplicate messages are answered from here; identical
+        # messages arriving together share one OpenAI call
+        self.cache = cache if cache is not None else build_extraction_cache()
         
-    async def extract(self, text: str) -> TripExtraction:
+    async def extract(
+        self, text: str, known: Optional[TripExtraction] = None, fields: Optional[List[str]] = None
+    ) -> TripExtraction:
+        """
+        Extract trip details. With `fields`, the model is told only those are
+        needed (used when the regex extractor already filled the rest). With
+        `known`, only the required fields it is still missing are asked for.
+        """
+        if fields is None and known is not None:
+            fields = [name for name in REQUIRED_FIELDS if getattr(known, name) is None] or None
         current_date = datetime.now().strftime("%Y-%m-%d")
+        field_key = tuple(fields) if fields else None
+        digest = hashlib.sha256(normalize_message(text).encode()).hexdigest()
+        key = f"extract:{current_date}:{','.join(field_key or ())}:{digest}"
         try:
-            response = await self.client.beta.chat.completions.parse(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": f"You are a helpful travel assistant. Current date is {current_date}. Extract trip details from the user's message. If a field is missing, leave it as null. For dates, use YYYY-MM-DD format. For origin/destination, use IATA codes if possible, otherwise city names. For nationality, extract country name if the user mentions where they are from (e.g. 'I'm from Zimbabwe', 'as a US citizen'). If the destination is a country or broad region (e.g. Japan, Europe), set destination to null and ask for a specific city in `reply_message`. If fields are missing, generate a polite, conversational question asking for them in `reply_message`. If all fields are present, set `reply_message` to null."},
-                    {"role": "user", "content": text}
-                ],
-                response_format=TripExtraction,
-            )
-            
-            return response.choices[0].message.parsed
+            data = await self.cache.get_or_fetch(key, lambda: self._complete(text, current_date, field_key))
+            return TripExtraction(**data)
         except Exception as e:
             print(f"OpenAI NLP Error: {e}")
-            # Fallback to empty extraction with error message
-            return TripExtraction(
-                reply_message="I'm having trouble processing your request right now. Please try again later."
-            )
+            # Fallback to empty extraction with error message (not cached)
+            return TripExtraction(reply_message=self.ERROR_REPLY)
+
+    def metrics(self) -> dict:
+        return {"cache": self.cache.stats.as_dict()}
+
+    async def aclose(self):
+        """Close the OpenAI client's connection pool if this service created it."""
+        if self._owns_client:
+            await self.client.close()
+
+    async def _complete(self, text: str, current_date: str, fields: Optional[tuple]) -> dict:
+        response = await self.client.beta.chat.completions.parse(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": _system_prompt(current_date, fields)},
+                {"role": "user", "content": text}
+            ],
+            response_format=TripExtraction,
+        )
+        # Cached as a plain dict so every caller gets its own TripExtraction
+        return response.choices[0].message.parsed.model_dump()
@@ -0,0 +1,213 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import insert
+from app.database import SessionLocal
+from app.models.db_models import TripRequestDB, RecommendationDB
+from app.models.trip_request import TripExtraction
+from app.models.recommendation import TripBundle
+
+# SQLite allows one writer at a time, so every write runs on a single
+# dedicated thread instead of blocking the event loop
+_writer: Optional[ThreadPoolExecutor] = None
+
+def _get_writer() -> ThreadPoolExecutor:
+    global _writer
+    if _writer is None:
+        _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+    return _writer
+
+@dataclass
+class TripLogRecord:
+    """A trip request and its recommendations, flattened to plain column values."""
+    trip: dict
+    recommendations: List[dict]
+
+def _recommendation_row(b: TripBundle) -> dict:
+    return {
+        "flight_airline": b.flight.airline,
+        "flight_price": b.flight.price,
+        "hotel_name": b.hotel.name,
+        "hotel_price": b.hotel.price_per_night,
+        "car_company": b.car_rental.company if b.car_rental else None,
+        "car_type": b.car_rental.car_type if b.car_rental else None,
+        "car_price": b.car_rental.price_per_day if b.car_rental else None,
+        "total_price": b.total_price,
+        "score": b.score,
+        "reasoning": b.reasoning
+    }
+
+def build_record(user_query: str, trip: TripExtraction, bundles: List[TripBundle]) -> TripLogRecord:
+    return TripLogRecord(
+        trip={
+            "user_query": user_query,
+            "origin": trip.origin,
+            "destination": trip.destination,
+            "start_date": trip.start_date,
+            "end_date": trip.end_date,
+            "travelers": trip.travelers,
+            "budget": trip.budget,
+            "created_at": datetime.utcnow()  # Request time, not flush time
+        },
+        recommendations=[_recommendation_row(b) for b in bundles]
+    )
+
+def _save_batch(records: List[TripLogRecord]) -> List[int]:
+    """Insert a batch of trips and their recommendations in one transaction."""
+    db = SessionLocal()
+    try:
+        # Multi-row insert; RETURNING ids in parameter order to link recommendations
+        trip_ids = db.scalars(
+            insert(TripRequestDB).returning(TripRequestDB.id, sort_by_parameter_order=True),
+            [record.trip for record in records]
+        ).all()
+
+        rows = [
+            {**row, "trip_request_id": trip_id}
+            for trip_id, record in zip(trip_ids, records)
+            for row in record.recommendations
+        ]
+        if rows:
+            db.execute(insert(RecommendationDB), rows)
+
+        db.commit()
+        return list(trip_ids)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+async def save_trip(user_query: str, trip: TripExtraction, bundles: List[TripBundle]) -> int:
+    """Persist a trip request and its recommendations now, on the writer thread."""
+    loop = asyncio.get_running_loop()
+    trip_ids = await loop.run_in_executor(_get_writer(), _save_batch, [build_record(user_query, trip, bundles)])
+    return trip_ids[0]
+
+def shutdown_writer():
+    """Wait for queued writes to finish (called on app shutdown)."""
+    global _writer
+    if _writer is not None:
+        _writer.shutdown(wait=True)
+        _writer = None
+
+# Queued by stop() to wake an idle flusher; never written
+_STOP = object()
+
+@dataclass
+class LogWriterStats:
+    queued: int = 0
+    written: int = 0
+    dropped: int = 0
+    failed: int = 0
+    batches: int = 0
+
+class RecommendationLogWriter:
+    """
+    Write-behind queue for trip/recommendation audit rows.
+    Requests enqueue a record and return at once. A background task flushes
+    batches when batch_size records are waiting or flush_interval seconds
+    have passed, whichever comes first. The queue is bounded. When it is full,
+    drop_policy decides what happens:
+      - "drop_oldest": discard the oldest queued record (default)
+      - "drop_newest": discard the incoming record
+      - "block": make the request wait for room (backpressure)
+    stop() drains everything still queued.
+    """
+
+    DROP_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+    def __init__(self, max_queue: int = 1000, batch_size: int = 50,
+                 flush_interval: float = 1.0, drop_policy: str = "drop_oldest"):
+        if drop_policy not in self.DROP_POLICIES:
+            raise ValueError(f"drop_policy must be one of {self.DROP_POLICIES}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.stats = LogWriterStats()
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @classmethod
+    def from_env(cls) -> "RecommendationLogWriter":
+        return cls(
+            max_queue=int(os.getenv("LOG_QUEUE_MAX", "1000")),
+            batch_size=int(os.getenv("LOG_BATCH_SIZE", "50")),
+            flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "1.0")),
+            drop_policy=os.getenv("LOG_DROP_POLICY", "drop_oldest")
+        )
+
+    def start(self):
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def enqueue(self, user_query: str, trip: TripExtraction, bundles: List[TripBundle]):
+        if self._task is None:
+            # No flusher running (e.g. outside the app lifespan), write directly
+            await save_trip(user_query, trip, bundles)
+            self.stats.written += 1
+            return
+
+        record = build_record(user_query, trip, bundles)
+        if self._queue.full() and self.drop_policy != "block":
+            self.stats.dropped += 1
+            if self.drop_policy == "drop_newest":
+                return
+            self._queue.get_nowait()
+
+        await self._queue.put(record)
+        self.stats.queued += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    record = self._queue.get_nowait()
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0 or self._stopping:
+                        break
+                    try:
+                        record = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if record is not _STOP:
+                    batch.append(record)
+
+            if batch:
+                await self._flush(batch)
+            elif self._stopping:
+                return
+
+    async def _flush(self, batch: List[TripLogRecord]):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(_get_writer(), _save_batch, batch)
+            self.stats.written += len(batch)
+            self.stats.batches += 1
+        except Exception as e:
+            self.stats.failed += len(batch)
+            print(f"Failed to write {len(batch)} trip log records: {e}")
+
+    async def stop(self):
+        """Flush everything still queued and stop the background task."""
+        self._stopping = True
+        if self._task:
+            try:
+                # Wake the flusher if it is idle, instead of waiting out flush_interval
+                self._queue.put_nowait(_STOP)
+            except asyncio.QueueFull:
+                pass  # A full queue means the flusher isn't waiting for records
+            await self._task
+            self._task = None
+
+    def metrics(self) -> dict:
+        return {**asdict(self.stats), "pending": self._queue.qsize()}
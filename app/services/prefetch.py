@@ -0,0 +1,82 @@
+import asyncio
+import os
+from dataclasses import dataclass, asdict
+from typing import Set
+from app.models.trip_request import TripExtraction
+from app.services.interfaces import IFlightsService, IHotelsService, ICarRentalService
+from app.services.search_pipeline import search_direct
+
+# Traveler count assumed when prefetching before the user has said.
+# Search caches are keyed on it, so a wrong guess just means a cache miss.
+PREFETCH_TRAVELERS = int(os.getenv("PREFETCH_TRAVELERS", "1"))
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true") == "true"
+MAX_PREFETCHES = int(os.getenv("MAX_PREFETCHES", "20"))
+
+
+@dataclass
+class PrefetchStats:
+    started: int = 0
+    skipped: int = 0  # Too many prefetches already running
+    failed: int = 0
+
+
+class SearchPrefetcher:
+    """
+    Starts provider searches for a trip that is still missing details, once
+    the route and dates are known. The searches go through the cached
+    services, so when the last slot is filled the real search is a cache hit
+    (or joins the prefetch still in flight).
+    """
+
+    def __init__(self, enabled: bool = PREFETCH_ENABLED, max_running: int = MAX_PREFETCHES):
+        self.enabled = enabled
+        self.max_running = max_running
+        self.stats = PrefetchStats()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def ready(trip: TripExtraction) -> bool:
+        return all((trip.origin, trip.destination, trip.start_date, trip.end_date))
+
+    def maybe_prefetch(
+        self,
+        trip: TripExtraction,
+        flights_service: IFlightsService,
+        hotels_service: IHotelsService,
+        cars_service: ICarRentalService
+    ):
+        if not self.enabled or not self.ready(trip):
+            return
+        if len(self._tasks) >= self.max_running:
+            self.stats.skipped += 1
+            return
+
+        if trip.travelers is None:
+            trip = trip.model_copy(update={"travelers": PREFETCH_TRAVELERS})
+        task = asyncio.create_task(self._prefetch(trip, flights_service, hotels_service, cars_service))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.stats.started += 1
+
+    async def _prefetch(self, trip, flights_service, hotels_service, cars_service):
+        async def flights():
+            # Same fallback as the real search: connecting only if there's no direct flight
+            if not await search_direct(flights_service, trip):
+                await flights_service.search_connecting_flights(trip)
+
+        results = await asyncio.gather(
+            flights(), hotels_service.search_hotels(trip), cars_service.search_cars(trip),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                self.stats.failed += 1
+                print(f"Prefetch failed for {trip.origin}->{trip.destination}: {result}")
+
+    def metrics(self) -> dict:
+        return {**asdict(self.stats), "running": len(self._tasks)}
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,133 @@
+import asyncio
+from typing import Callable, Dict
+from app.config.settings import Settings
+from app.services.interfaces import IFlightsService, IHotelsService, INLPService, ICarRentalService
+from app.services.flights_service import MockFlightsService
+from app.services.amadeus_service import AmadeusFlightsService
+from app.services.hotels_service import MockHotelsService
+from app.services.car_rental_service import MockCarRentalService
+from app.services.nlp_service import RegexNLPService
+from app.services.openai_service import OpenAINLPService
+from app.services.hybrid_nlp_service import HybridNLPService
+from app.services.visa_service import TravelbriefingVisaService
+from app.services.visa_store import VisaRulesStore
+from app.services.http_clients import HttpClients
+from app.services.cache import TTLCache
+from app.services.cached_services import CachedFlightsService, CachedHotelsService, CachedCarRentalService
+
+# Provider name -> factory(settings, http_clients, caches), one table per service.
+# FLIGHTS_PROVIDER, HOTELS_PROVIDER, ... pick the entry (see config/settings.py).
+Factory = Callable[[Settings, HttpClients, Dict[str, TTLCache]], object]
+
+FLIGHTS_PROVIDERS: Dict[str, Factory] = {
+    "mock": lambda settings, http_clients, caches: MockFlightsService(),
+    "amadeus": lambda settings, http_clients, caches: AmadeusFlightsService(
+        client=http_clients.get("amadeus"),
+        leg_cache=caches["legs"],
+        client_id=settings.amadeus_client_id,
+        client_secret=settings.amadeus_client_secret,
+        base_url=settings.amadeus_base_url
+    ),
+}
+
+HOTELS_PROVIDERS: Dict[str, Factory] = {
+    "mock": lambda settings, http_clients, caches: MockHotelsService(),
+}
+
+CARS_PROVIDERS: Dict[str, Factory] = {
+    "mock": lambda settings, http_clients, caches: MockCarRentalService(),
+}
+
+NLP_PROVIDERS: Dict[str, Factory] = {
+    "regex": lambda settings, http_clients, caches: RegexNLPService(),
+    "openai": lambda settings, http_clients, caches: OpenAINLPService(api_key=settings.openai_api_key),
+    "hybrid": lambda settings, http_clients, caches: HybridNLPService(
+        RegexNLPService(), OpenAINLPService(api_key=settings.openai_api_key)
+    ),
+}
+
+VISA_PROVIDERS: Dict[str, Factory] = {
+    "travelbriefing": lambda settings, http_clients, caches: TravelbriefingVisaService(
+        client=http_clients.get("travelbriefing"),
+        store=VisaRulesStore(http_clients.get("travelbriefing"), settings.travelbriefing_base_url)
+    ),
+}
+
+
+def _build(kind: str, providers: Dict[str, Factory], name: str, *args):
+    factory = providers.get(name)
+    if factory is None:
+        raise ValueError(f"{kind.upper()}_PROVIDER must be one of {sorted(providers)}, got {name!r}")
+    return factory(*args)
+
+
+class ProviderRegistry:
+    """
+    The service instances every request uses, built once in the app lifespan.
+    Search providers are wrapped in their result caches. Providers with a
+    warm_up() hook (Amadeus token, dateparser data) run it at startup, and
+    those with aclose() are closed on shutdown, before the shared HTTP clients.
+    """
+
+    def __init__(
+        self,
+        flights: IFlightsService,
+        hotels: IHotelsService,
+        cars: ICarRentalService,
+        nlp: INLPService,
+        visa: TravelbriefingVisaService,
+        providers: Dict[str, object]
+    ):
+        self.flights = flights
+        self.hotels = hotels
+        self.cars = cars
+        self.nlp = nlp
+        self.visa = visa
+        # The unwrapped provider instances, by service name, for warm-up and shutdown
+        self.providers = providers
+
+    @classmethod
+    def build(cls, settings: Settings, http_clients: HttpClients, caches: Dict[str, TTLCache]) -> "ProviderRegistry":
+        args = (settings, http_clients, caches)
+        providers = {
+            "flights": _build("flights", FLIGHTS_PROVIDERS, settings.flights_provider, *args),
+            "hotels": _build("hotels", HOTELS_PROVIDERS, settings.hotels_provider, *args),
+            "cars": _build("cars", CARS_PROVIDERS, settings.cars_provider, *args),
+            "nlp": _build("nlp", NLP_PROVIDERS, settings.nlp_provider, *args),
+            "visa": _build("visa", VISA_PROVIDERS, settings.visa_provider, *args),
+        }
+        return cls(
+            flights=CachedFlightsService(providers["flights"], caches["flights"]),
+            hotels=CachedHotelsService(providers["hotels"], caches["hotels"]),
+            cars=CachedCarRentalService(providers["cars"], caches["cars"]),
+            nlp=providers["nlp"],
+            visa=providers["visa"],
+            providers=providers
+        )
+
+    def _hooks(self, name: str) -> Dict[str, Callable]:
+        return {
+            service: getattr(provider, name)
+            for service, provider in self.providers.items()
+            if hasattr(provider, name)
+        }
+
+    async def warm_up(self):
+        """Run every provider's warm-up hook concurrently. A failed warm-up is logged, not fatal."""
+        hooks = self._hooks("warm_up")
+        results = await asyncio.gather(*(hook() for hook in hooks.values()), return_exceptions=True)
+        for service, result in zip(hooks, results):
+            if isinstance(result, Exception):
+                print(f"Warm-up failed for {service} provider: {result}")
+
+    async def aclose(self):
+        """Close every provider that holds its own clients or background work."""
+        hooks = self._hooks("aclose")
+        results = await asyncio.gather(*(hook() for hook in hooks.values()), return_exceptions=True)
+        for service, result in zip(hooks, results):
+            if isinstance(result, Exception):
+                print(f"Error closing {service} provider: {result}")
+
+    def describe(self) -> Dict[str, str]:
+        """Provider class behind each service, for /metrics."""
+        return {service: type(provider).__name__ for service, provider in self.providers.items()}
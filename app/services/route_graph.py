@@ -0,0 +1,216 @@
+import csv
+import heapq
+import math
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from app.config.hubs import ALL_HUBS, MAX_HUBS, MAX_DETOUR, COVERAGE_WEIGHT, HOP_PENALTY_KM, MAX_STOPS, ROUTES_DATA_PATH
+from app.services.location_index import LocationIndex, get_location_index
+
+EARTH_RADIUS_KM = 6371.0
+
+# Stops between origin and destination: ("DXB",) or ("ADD", "FRA")
+Route = Tuple[str, ...]
+Path = Tuple[str, ...]
+
+
+def great_circle_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Haversine distance between two points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    h = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+def read_routes(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    (origin, destination) pairs from an origin,destination CSV with a header,
+    or from an OpenFlights routes.dat (no header; nonstop rows only).
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".dat"):
+            # airline, airline id, source, source id, destination, destination id, codeshare, stops, equipment
+            for row in csv.reader(f):
+                if len(row) > 7 and row[7] == "0":
+                    yield row[2], row[4]
+        else:
+            for row in csv.DictReader(f):
+                yield row["origin"], row["destination"]
+
+
+class RouteGraph:
+    """
+    Scheduled airport-to-airport routes (ROUTES_DATA_PATH), loaded once
+    into adjacency maps weighted by great-circle distance. Without route
+    data the graph is empty and every search ranks the major hubs by detour.
+
+    rank_hubs() only offers hubs that fly both legs, best first by how far
+    out of the way they are and how many routes they serve. When there
+    aren't enough of those, rank_routes() tops up with two-stop paths from
+    k_shortest_paths() (Yen's algorithm).
+    """
+
+    def __init__(self, routes_path: Optional[str], index: LocationIndex):
+        self.index = index
+        self.outbound: Dict[str, Dict[str, float]] = {}  # Origin -> {destination: km}
+        self.inbound: Dict[str, Set[str]] = {}  # Destination -> origins
+
+        for origin, destination in read_routes(routes_path) if routes_path else ():
+            km = self.distance(origin, destination)
+            if km is None:
+                continue
+            self.outbound.setdefault(origin, {})[destination] = km
+            self.inbound.setdefault(destination, set()).add(origin)
+
+        self._max_degree = max((len(routes) for routes in self.outbound.values()), default=1)
+
+    def _airport(self, code: str) -> Optional[str]:
+        # Metro codes (LON, NYC) resolve to their main airport
+        location = self.index.by_iata(code)
+        return location.iata if location else None
+
+    def distance(self, a: str, b: str) -> Optional[float]:
+        x, y = self.index.airports.get(a), self.index.airports.get(b)
+        if not x or not y:
+            return None
+        return great_circle_km(x.latitude, x.longitude, y.latitude, y.longitude)
+
+    def rank_hubs(self, origin: str, destination: str, limit: int = MAX_HUBS) -> List[str]:
+        """One-stop hubs with routes to both ends, best first."""
+        origin, destination = self._airport(origin), self._airport(destination)
+        if not origin or not destination or origin == destination:
+            return []
+
+        direct = self.distance(origin, destination)
+        candidates = set(self.outbound.get(origin, {})) & self.inbound.get(destination, set())
+        scored = []
+        for hub in candidates:
+            detour = (self.outbound[origin][hub] + self.outbound[hub][destination]) / direct
+            if detour > MAX_DETOUR:
+                continue
+            coverage = len(self.outbound[hub]) / self._max_degree
+            scored.append((detour - COVERAGE_WEIGHT * coverage, hub))
+        scored.sort()
+        return [hub for _, hub in scored[:limit]]
+
+    def rank_nearby_hubs(self, origin: str, destination: str, limit: int = MAX_HUBS) -> List[str]:
+        """
+        Major hubs (config.hubs.ALL_HUBS) least out of the way, for airports
+        without route data. Ranked on coordinates alone, so nothing says the
+        hub actually flies both legs.
+        """
+        origin, destination = self._airport(origin), self._airport(destination)
+        if not origin or not destination or origin == destination:
+            return []
+
+        direct = self.distance(origin, destination)
+        scored = []
+        for hub in ALL_HUBS:
+            first, second = self.distance(origin, hub), self.distance(hub, destination)
+            if hub in (origin, destination) or first is None or second is None:
+                continue
+            detour = (first + second) / direct
+            if detour <= MAX_DETOUR:
+                scored.append((detour, hub))
+        scored.sort()
+        return [hub for _, hub in scored[:limit]]
+
+    def rank_routes(self, origin: str, destination: str, limit: int = MAX_HUBS) -> List[Route]:
+        """
+        Routes worth probing for a connecting search: ranked one-stop hubs,
+        then two-stop paths if there are fewer than limit. Airports missing
+        from the route data (all of them, without any) fall back to
+        rank_nearby_hubs().
+        """
+        start, end = self._airport(origin), self._airport(destination)
+        if start not in self.outbound or end not in self.inbound or start == end:
+            return [(hub,) for hub in self.rank_nearby_hubs(origin, destination, limit)]
+
+        routes: List[Route] = [(hub,) for hub in self.rank_hubs(start, end, limit)]
+        if len(routes) < limit and MAX_STOPS >= 2:
+            # Yen yields the direct flight and every one-stop path before longer ones
+            one_stop = len(set(self.outbound[start]) & self.inbound[end])
+            for path in self.k_shortest_paths(start, end, k=2 + one_stop + limit, max_stops=MAX_STOPS):
+                stops = path[1:-1]
+                if len(stops) >= 2:
+                    routes.append(stops)
+                    if len(routes) >= limit:
+                        break
+
+        if not routes:
+            return [(hub,) for hub in self.rank_nearby_hubs(origin, destination, limit)]
+        return routes
+
+    def k_shortest_paths(self, origin: str, destination: str, k: int, max_stops: int = MAX_STOPS) -> List[Path]:
+        """
+        Yen's k shortest loopless paths with at most max_stops stops. Each leg
+        costs its distance plus HOP_PENALTY_KM, so a short detour beats an
+        extra stop.
+        """
+        first = self._shortest_path(origin, destination, set(), set(), max_stops + 1)
+        if not first:
+            return []
+
+        found: List[Tuple[float, Path]] = [first]
+        candidates: List[Tuple[float, Path]] = []
+        seen = {first[1]}
+
+        while len(found) < k:
+            _, previous = found[-1]
+            for i in range(len(previous) - 1):
+                root = previous[:i + 1]
+                # Don't repeat the next leg of any path already found from this root
+                banned_edges = {(path[i], path[i + 1]) for _, path in found if path[:i + 1] == root}
+                spur = self._shortest_path(root[-1], destination, set(root[:-1]), banned_edges, max_stops + 1 - i)
+                if not spur:
+                    continue
+                path = root[:-1] + spur[1]
+                if path not in seen:
+                    seen.add(path)
+                    heapq.heappush(candidates, (self._cost(root) + spur[0], path))
+            if not candidates:
+                break
+            found.append(heapq.heappop(candidates))
+
+        return [path for _, path in found]
+
+    def _cost(self, path: Path) -> float:
+        return sum(self.outbound[a][b] + HOP_PENALTY_KM for a, b in zip(path, path[1:]))
+
+    def _shortest_path(
+        self,
+        source: str,
+        target: str,
+        banned_nodes: Set[str],
+        banned_edges: Set[Tuple[str, str]],
+        max_legs: int
+    ) -> Optional[Tuple[float, Path]]:
+        # Dijkstra over (airport, legs flown) so the leg limit is respected
+        heap = [(0.0, 0, source, (source,))]
+        fewest_legs: Dict[str, int] = {}
+        while heap:
+            cost, legs, node, path = heapq.heappop(heap)
+            if node == target:
+                return cost, path
+            # Reached earlier at lower cost with no more legs used
+            if legs >= fewest_legs.get(node, max_legs + 1):
+                continue
+            fewest_legs[node] = legs
+            if legs == max_legs:
+                continue
+            for nxt, km in self.outbound.get(node, {}).items():
+                if nxt in banned_nodes or nxt in path or (node, nxt) in banned_edges:
+                    continue
+                if legs + 1 == max_legs and nxt != target:
+                    continue
+                heapq.heappush(heap, (cost + km + HOP_PENALTY_KM, legs + 1, nxt, path + (nxt,)))
+        return None
+
+    def __len__(self) -> int:
+        return sum(len(routes) for routes in self.outbound.values())
+
+
+@lru_cache(maxsize=None)
+def get_route_graph() -> RouteGraph:
+    """The route graph from ROUTES_DATA_PATH, loaded on first use."""
+    return RouteGraph(ROUTES_DATA_PATH or None, get_location_index())
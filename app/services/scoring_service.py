@@ -1,68 +1,196 @@
-from typing import List, Optional
+import heapq
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from app.models.trip_request import TripExtraction
 from app.models.recommendation import FlightOffer, HotelOffer, CarRentalOffer, TripBundle
 
-def create_bundles(
-    trip: TripExtraction, 
-    flights: List[FlightOffer], 
-    hotels: List[HotelOffer],
-    cars: Optional[List[CarRentalOffer]] = None
-) -> List[TripBundle]:
-    bundles = []
-    
-    # Calculate nights
+TOP_K = 3
+# A car's rating counts for a quarter of a hotel's: where you sleep matters more
+CAR_RATING_WEIGHT = 5
+
+def _nights(start_date: Optional[str], end_date: Optional[str]) -> int:
     try:
-        start = datetime.strptime(trip.start_date, "%Y-%m-%d")
-        end = datetime.strptime(trip.end_date, "%Y-%m-%d")
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
         nights = (end - start).days
         if nights < 1: nights = 1
     except:
         nights = 1 # Fallback
-    
-    # Use first car if available
-    car = cars[0] if cars else None
+    return nights
+
+def _trip_nights(trip: TripExtraction) -> int:
+    return _nights(trip.start_date, trip.end_date)
+
+def _flight_nights(flight: FlightOffer, trip_nights: int) -> int:
+    """Nights at the destination for this flight: flexible-date offers carry their own dates."""
+    if flight.return_date:
+        return _nights(flight.departure[:10], flight.return_date)
+    return trip_nights
+
+def _budget_score(budget: Optional[int], total_price: int) -> float:
+    """Soft budget score. Never increases as total_price grows, which is what makes pruning safe."""
+    if not budget:
+        return 0
+    budget_diff = budget - total_price
+    if budget_diff >= 0:
+        return budget_diff / 10
+    return budget_diff / 5  # Penalty for over budget
+
+def _rank(
+    budget: Optional[int],
+    flight_prices: List[int],
+    hotel_costs: List[int],
+    hotel_ratings: List[float],
+    car_costs: List[int],
+    car_ratings: List[float],
+    k: int
+) -> List[Tuple[float, int, int, int]]:
+    """
+    Exact top-k flight x hotel pairs, each with its best car, via branch and
+    bound over the flight x hotel x car product.
+
+    Score = hotel rating * 20 + car rating * CAR_RATING_WEIGHT + budget score
+    of the total price. The budget score only falls as the price rises, so
+    pricing a partial bundle with the cheapest flight and car, and scoring it
+    with the best-rated car, gives an upper bound. Hotels are visited best
+    bound first, flights cheapest first and cars best rated first. A branch
+    is dropped once its bound rounds below the current k-th best score (for
+    cars, below the pair's best so far). Equal scores rank by (flight, hotel)
+    input order, and a pair's tied cars by car order.
+
+    Returns (score, flight index, hotel index, car index), best first.
+    """
+    n_hotels = len(hotel_costs)
+    flight_order = sorted(range(len(flight_prices)), key=lambda i: flight_prices[i])
+    car_scores = [rating * CAR_RATING_WEIGHT for rating in car_ratings]
+    car_order = sorted(range(len(car_costs)), key=lambda c: -car_scores[c])
+    cheapest_flight = flight_prices[flight_order[0]]
+    cheapest_car = min(car_costs)
+
+    base_scores = [rating * 20 for rating in hotel_ratings]
+    best_car_score = car_scores[car_order[0]]
+    hotel_bounds = sorted(
+        ((base_scores[j] + best_car_score + _budget_score(budget, cheapest_flight + hotel_costs[j] + cheapest_car), j)
+         for j in range(n_hotels)),
+        key=lambda bound: -bound[0]
+    )
+
+    # Min-heap of (rounded score, -position, car): heap[0] is the current k-th best
+    heap: List[Tuple[float, int, int]] = []
+
+    def pruned(bound: float) -> bool:
+        return len(heap) == k and round(bound, 2) < heap[0][0]
+
+    for hotel_bound, j in hotel_bounds:
+        if pruned(hotel_bound):
+            break  # Hotels are in bound order, so no later hotel can do better
+        base = base_scores[j]
+        for i in flight_order:
+            partial = flight_prices[i] + hotel_costs[j]
+            cheapest_total = _budget_score(budget, partial + cheapest_car)
+            if pruned(base + best_car_score + cheapest_total):
+                break  # Flights are cheapest first, so the rest of this hotel scores lower
+
+            # The pair's best car as (rounded score, -car index)
+            best = None
+            for c in car_order:
+                if best and round(base + car_scores[c] + cheapest_total, 2) < best[0]:
+                    break  # Cars are best rated first, so no later car can do better
+                car = (round(base + car_scores[c] + _budget_score(budget, partial + car_costs[c]), 2), -c)
+                if best is None or car > best:
+                    best = car
+
+            score, c = best[0], -best[1]
+            item = (score, -(i * n_hotels + j), c)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    ranked = []
+    for score, neg_position, c in sorted(heap, reverse=True):
+        i, j = divmod(-neg_position, n_hotels)
+        ranked.append((score, i, j, c))
+    return ranked
+
+def _build_bundle(
+    trip: TripExtraction,
+    flight: FlightOffer,
+    hotel: HotelOffer,
+    car: Optional[CarRentalOffer],
+    nights: int,
+    score: float
+) -> TripBundle:
     car_total = (car.price_per_day * nights) if car else 0
-    
-    for flight in flights:
-        for hotel in hotels:
-            # Calculate total price
-            total_price = flight.price + (hotel.price_per_night * nights) + car_total
-            
-            # Score (Soft Budget)
-            base_score = hotel.rating * 20
-            
-            if trip.budget:
-                budget_diff = trip.budget - total_price
-                if budget_diff >= 0:
-                    budget_score = budget_diff / 10
-                    over_budget = False
-                else:
-                    budget_score = budget_diff / 5  # Penalty for over budget
-                    over_budget = True
-            else:
-                budget_score = 0
-                over_budget = False
-                
-            score = base_score + budget_score
-            
-            # Reasoning
-            if over_budget:
-                reasoning = f"Flight with {flight.airline} and {hotel.name}. Over budget by ${abs(int(trip.budget - total_price))}."
-            else:
-                reasoning = f"Flight with {flight.airline} and {hotel.name}. Hotel rating {hotel.rating}/5."
-            
-            bundles.append(TripBundle(
-                flight=flight,
-                hotel=hotel,
-                car_rental=car,
-                total_price=total_price,
-                score=round(score, 2),
-                reasoning=reasoning
-            ))
-            
-    # Sort by score desc
-    bundles.sort(key=lambda x: x.score, reverse=True)
-    
-    # Return top 3 (always return something)
-    return bundles[:3] if bundles else []
+    total_price = flight.price + (hotel.price_per_night * nights) + car_total
+    over_budget = bool(trip.budget) and trip.budget - total_price < 0
+
+    # Reasoning
+    if over_budget:
+        reasoning = f"Flight with {flight.airline} and {hotel.name}. Over budget by ${abs(int(trip.budget - total_price))}."
+    else:
+        reasoning = f"Flight with {flight.airline} and {hotel.name}. Hotel rating {hotel.rating}/5."
+    if flight.return_date:
+        reasoning += f" {flight.departure[:10]} to {flight.return_date}, {nights} night{'s' if nights != 1 else ''}."
+
+    return TripBundle(
+        flight=flight,
+        hotel=hotel,
+        car_rental=car,
+        total_price=total_price,
+        score=score,
+        reasoning=reasoning
+    )
+
+def create_bundles(
+    trip: TripExtraction,
+    flights: List[FlightOffer],
+    hotels: List[HotelOffer],
+    cars: Optional[List[CarRentalOffer]] = None,
+    top_k: int = TOP_K
+) -> List[TripBundle]:
+    """
+    Return the top_k bundles, at most one per flight and hotel pair, each
+    with the car that scores best for that pair.
+    Score = hotel rating * 20 + car rating * CAR_RATING_WEIGHT + soft budget
+    score (bonus under budget, double penalty over), so a better-rated car
+    can beat a cheaper one when the budget allows. TripBundle objects and
+    reasoning text are only built for the winners.
+
+    Hotel and car costs depend on the number of nights, which differs per
+    flight after a flexible-date search. Flights are grouped by nights, each
+    group is ranked on its own, and the groups' winners are merged.
+    """
+    if not flights or not hotels:
+        return []
+
+    trip_nights = _trip_nights(trip)
+    groups: Dict[int, List[int]] = {}
+    for i, flight in enumerate(flights):
+        groups.setdefault(_flight_nights(flight, trip_nights), []).append(i)
+
+    # No cars means one "no car" option that adds nothing to the price
+    car_options = list(cars) if cars else [None]
+    hotel_ratings = [h.rating for h in hotels]
+    car_ratings = [car.rating if car else 0 for car in car_options]
+
+    winners = []
+    for nights, flight_ids in groups.items():
+        ranked = _rank(
+            trip.budget,
+            [flights[i].price for i in flight_ids],
+            [h.price_per_night * nights for h in hotels],
+            hotel_ratings,
+            [(car.price_per_day * nights) if car else 0 for car in car_options],
+            car_ratings,
+            top_k
+        )
+        winners.extend((score, flight_ids[i], j, c, nights) for score, i, j, c in ranked)
+
+    # Best score first, ties in input order like _rank
+    winners.sort(key=lambda w: (-w[0], w[1], w[2]))
+
+    return [
+        _build_bundle(trip, flights[i], hotels[j], car_options[c], nights, score)
+        for score, i, j, c, nights in winners[:top_k]
+    ]
@@ -0,0 +1,98 @@
+import asyncio
+import os
+from typing import List, Optional, Tuple
+from app.models.trip_request import TripExtraction, MAX_FLEXIBLE_DAYS
+from app.models.recommendation import FlightOffer
+from app.models.visa_info import VisaInfo
+from app.services.interfaces import IFlightsService, IHotelsService, ICarRentalService, HubResultCallback
+
+# When to start the connecting-flight search:
+#   "off"     - only after direct search comes back empty (old behaviour)
+#   "eager"   - at the same time as direct search
+#   "delayed" - if direct search hasn't finished after CONNECTING_SPECULATION_DELAY seconds
+SPECULATION_POLICY = os.getenv("CONNECTING_SPECULATION", "delayed")
+SPECULATION_DELAY = float(os.getenv("CONNECTING_SPECULATION_DELAY", "2.0"))
+
+
+def search_direct(flights_service: IFlightsService, trip: TripExtraction):
+    """The direct-flight search for a trip: every date pair in the window when the user is flexible."""
+    if trip.flexible_days:
+        return flights_service.search_flexible_dates(trip, min(trip.flexible_days, MAX_FLEXIBLE_DAYS))
+    return flights_service.search_flights(trip)
+
+
+class TripSearchPipeline:
+    """
+    Runs the provider searches for one trip as a dependency graph instead of
+    a fixed sequence. Each search starts as soon as its inputs are known:
+    visa needs destination + nationality, hotels and cars need destination +
+    dates, direct flights need the full route (and search the whole date
+    window for flexible trips). Connecting flights may start
+    speculatively while direct search is still running.
+    Call cancel() when done so abandoned searches don't keep running.
+    """
+
+    def __init__(
+        self,
+        trip: TripExtraction,
+        flights_service: IFlightsService,
+        hotels_service: IHotelsService,
+        cars_service: ICarRentalService,
+        visa_service=None,
+        speculation: str = SPECULATION_POLICY,
+        speculation_delay: float = SPECULATION_DELAY,
+        on_connecting_hub: Optional[HubResultCallback] = None
+    ):
+        self.trip = trip
+        self.flights_service = flights_service
+        self.on_connecting_hub = on_connecting_hub
+
+        self.visa: Optional[asyncio.Task] = None
+        if visa_service and trip.nationality and trip.destination:
+            self.visa = asyncio.create_task(visa_service.get_visa_info(trip.destination, trip.nationality))
+
+        self.direct = asyncio.create_task(search_direct(flights_service, trip))
+        self.hotels = asyncio.create_task(hotels_service.search_hotels(trip))
+        self.cars = asyncio.create_task(cars_service.search_cars(trip))
+
+        self.connecting: Optional[asyncio.Task] = None
+        self._speculator: Optional[asyncio.Task] = None
+        if speculation == "eager":
+            self._start_connecting()
+        elif speculation == "delayed":
+            self._speculator = asyncio.create_task(self._speculate_after(speculation_delay))
+
+    def _start_connecting(self):
+        if self.connecting is None:
+            self.connecting = asyncio.create_task(
+                self.flights_service.search_connecting_flights(self.trip, self.on_connecting_hub)
+            )
+
+    async def _speculate_after(self, delay: float):
+        done, _ = await asyncio.wait({self.direct}, timeout=delay)
+        if not done:
+            self._start_connecting()
+
+    async def flights(self) -> Tuple[List[FlightOffer], bool]:
+        """Direct flights if there are any, otherwise connecting ones. Also returns whether they are connecting."""
+        flights = await self.direct
+        if self._speculator:
+            self._speculator.cancel()
+
+        if flights:
+            if self.connecting:
+                self.connecting.cancel()
+            # Check if returned flights have layovers (meaning they are connecting)
+            return flights, all(f.layovers > 0 for f in flights)
+
+        # Fallback to connecting flights if no direct flights found
+        self._start_connecting()
+        return await self.connecting, True
+
+    async def visa_info(self) -> Optional[VisaInfo]:
+        return await self.visa if self.visa else None
+
+    def cancel(self):
+        for task in (self.visa, self.direct, self.hotels, self.cars, self.connecting, self._speculator):
+            if task and not task.done():
+                task.cancel()
@@ -1,25 +1,32 @@
+import os
 import httpx
-from typing import Optional
+from typing import List, Optional
 from app.models.visa_info import VisaInfo
+from app.services.http_clients import build_client
+from app.services.location_index import get_location_index
+from app.services.visa_store import VisaRulesStore
 
-# Country name to code mapping (for common countries)
-COUNTRY_CODES = {
-    "zimbabwe": "ZW",
-    "south africa": "ZA",
-    "kenya": "KE",
-    "usa": "US",
-    "united states": "US",
-    "uk": "GB",
-    "united kingdom": "GB",
-    "china": "CN",
-    "india": "IN",
-    "japan": "JP",
-    "germany": "DE",
-    "france": "FR",
-}
+def _travelbriefing_name(country: str) -> str:
+    """Travelbriefing's spelling of a country name: "United Kingdom" -> "United-Kingdom"."""
+    return country.replace(" ", "-")
+
+def served_destinations() -> List[str]:
+    """Every Travelbriefing country we can route travellers to."""
+    return sorted({_travelbriefing_name(location.country) for location in get_location_index().airports.values()})
 
 class TravelbriefingVisaService:
-    BASE_URL = "https://travelbriefing.org"
+    BASE_URL = os.getenv("TRAVELBRIEFING_BASE_URL", "https://travelbriefing.org")
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, store: Optional[VisaRulesStore] = None):
+        self._owns_client = client is None
+        self.client = client or build_client("travelbriefing")
+        # Shared store from the app lifespan; standalone use gets a private one
+        self.store = store or VisaRulesStore(self.client, self.BASE_URL)
+
+    async def aclose(self):
+        """Close the HTTP client if this service created it."""
+        if self._owns_client:
+            await self.client.aclose()
     
     async def get_visa_info(self, destination: str, nationality: str) -> Optional[VisaInfo]:
         """
@@ -27,81 +34,35 @@ class TravelbriefingVisaService:
         """
         # Normalize destination (Travelbriefing uses country names)
         dest_name = self._normalize_country(destination)
-        nat_code = COUNTRY_CODES.get(nationality.lower(), nationality.upper())
-        
-        try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/{dest_name}",
-                    params={"format": "json"}
-                )
-                
-                if response.status_code != 200:
-                    print(f"Travelbriefing API error: {response.status_code}")
-                    return None
-                
-                data = response.json()
-                
-                # Parse visa info
-                visa_data = data.get("visa", {})
-                
-                # Find visa requirement for this nationality
-                visa_required = True
-                visa_type = "Traditional visa"
-                notes = None
-                
-                # Check visa-free list
-                visa_free = visa_data.get("visa-free", [])
-                for entry in visa_free:
-                    if entry.get("code") == nat_code:
-                        visa_required = False
-                        visa_type = "Visa-free"
-                        notes = entry.get("note")
-                        break
-                
-                # Check visa-on-arrival list
-                if visa_required:
-                    voa = visa_data.get("visa-on-arrival", [])
-                    for entry in voa:
-                        if entry.get("code") == nat_code:
-                            visa_type = "Visa on arrival"
-                            notes = entry.get("note")
-                            break
-                
-                # Get passport validity requirement
-                passport = data.get("passport", {})
-                passport_validity = passport.get("validity")
-                
-                return VisaInfo(
-                    destination=dest_name,
-                    nationality=nationality,
-                    visa_required=visa_required,
-                    visa_type=visa_type,
-                    passport_validity=passport_validity,
-                    notes=notes
-                )
-                
-        except Exception as e:
-            print(f"Error fetching visa info: {e}")
+        nat_code = self._country_code(nationality)
+
+        rules = await self.store.get_rules(dest_name)
+        if rules is None:
             return None
+
+        visa_type, notes = rules.lookup(nat_code)
+        return VisaInfo(
+            destination=dest_name,
+            nationality=nationality,
+            visa_required=visa_type != "Visa-free",
+            visa_type=visa_type,
+            passport_validity=rules.passport_validity,
+            notes=notes
+        )
     
     def _normalize_country(self, country: str) -> str:
-        """Convert IATA code or country name to Travelbriefing format."""
-        # IATA to country name mapping
-        iata_to_country = {
-            "NRT": "Japan",
-            "HND": "Japan",
-            "KIX": "Japan",
-            "LHR": "United-Kingdom",
-            "CDG": "France",
-            "JFK": "United-States",
-            "DXB": "United-Arab-Emirates",
-            "JNB": "South-Africa",
-            "HRE": "Zimbabwe",
-        }
-        
-        if country.upper() in iata_to_country:
-            return iata_to_country[country.upper()]
-        
-        # Normalize country name (replace spaces with hyphens, capitalize)
+        """Convert IATA code or place name to Travelbriefing format."""
+        index = get_location_index()
+        location = index.by_iata(country) or index.resolve(country, fuzzy=False)
+        if location:
+            return _travelbriefing_name(location.country)
+
+        # Unknown place: pass the name through (spaces to hyphens, capitalized)
         return country.replace(" ", "-").title()
+
+    def _country_code(self, nationality: str) -> str:
+        """Country name ("Zimbabwe", "UK") to its ISO code; anything else is taken as a code."""
+        found = get_location_index().lookup(nationality, fuzzy=False)
+        if found and found[1] == "country":
+            return found[0].country_code
+        return nationality.upper()
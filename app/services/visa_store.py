@@ -0,0 +1,164 @@
+import asyncio
+import json
+import os
+import time
+import httpx
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+from app.services.cache import SingleFlight
+
+VISA_CACHE_DIR = os.getenv("VISA_CACHE_DIR", ".cache/visa")
+# Visa rules change rarely, so a week is a safe default
+VISA_CACHE_TTL = float(os.getenv("VISA_CACHE_TTL", str(7 * 24 * 3600)))
+
+DEFAULT_VISA_TYPE = "Traditional visa"
+
+
+@dataclass
+class CountryVisaRules:
+    """Visa rules for one destination, indexed by nationality code."""
+    destination: str
+    fetched_at: float
+    passport_validity: Optional[str]
+    requirements: Dict[str, Tuple[str, Optional[str]]]  # code -> (visa type, note)
+
+    def lookup(self, nationality_code: str) -> Tuple[str, Optional[str]]:
+        return self.requirements.get(nationality_code, (DEFAULT_VISA_TYPE, None))
+
+
+def build_rules(destination: str, data: dict, fetched_at: float) -> CountryVisaRules:
+    """Index a Travelbriefing country payload for O(1) nationality lookups."""
+    visa_data = data.get("visa", {})
+
+    def first_by_code(entries) -> Dict[str, Tuple[str, Optional[str]]]:
+        index = {}
+        for entry in entries or []:
+            if entry.get("code"):
+                index.setdefault(entry["code"], entry.get("note"))
+        return index
+
+    requirements = {code: ("Visa on arrival", note) for code, note in first_by_code(visa_data.get("visa-on-arrival")).items()}
+    # Visa-free wins when a nationality appears in both lists
+    requirements.update({code: ("Visa-free", note) for code, note in first_by_code(visa_data.get("visa-free")).items()})
+
+    return CountryVisaRules(
+        destination=destination,
+        fetched_at=fetched_at,
+        passport_validity=data.get("passport", {}).get("validity"),
+        requirements=requirements
+    )
+
+
+class VisaRulesStore:
+    """
+    Local store of Travelbriefing country data.
+    Each destination's full JSON is kept on disk with a long TTL, and its
+    indexed rules are kept in memory. Lookups only reach travelbriefing.org
+    on a cold or expired entry. If that fetch fails, an expired copy is still
+    used.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, base_url: str,
+                 cache_dir: str = VISA_CACHE_DIR, ttl: float = VISA_CACHE_TTL):
+        self.client = client
+        self.base_url = base_url
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self._rules: Dict[str, CountryVisaRules] = {}
+        self._inflight = SingleFlight()
+
+    def _path(self, destination: str) -> Path:
+        return self.cache_dir / f"{destination}.json"
+
+    def _is_fresh(self, rules: CountryVisaRules) -> bool:
+        return time.time() - rules.fetched_at < self.ttl
+
+    async def get_rules(self, destination: str) -> Optional[CountryVisaRules]:
+        rules = self._rules.get(destination)
+        if rules and self._is_fresh(rules):
+            return rules
+
+        # Reading and parsing a full country payload is blocking file I/O
+        rules = await asyncio.to_thread(self._load, destination)
+        if rules and self._is_fresh(rules):
+            self._rules[destination] = rules
+            return rules
+
+        fetched = await self._inflight.do(destination, lambda: self._fetch(destination))
+        if fetched:
+            return fetched
+        # Upstream failed: an old answer beats no answer
+        return rules
+
+    async def _fetch(self, destination: str) -> Optional[CountryVisaRules]:
+        try:
+            response = await self.client.get(
+                f"{self.base_url}/{destination}",
+                params={"format": "json"}
+            )
+            if response.status_code != 200:
+                print(f"Travelbriefing API error: {response.status_code}")
+                return None
+            data = response.json()
+        except Exception as e:
+            print(f"Error fetching visa info: {e}")
+            return None
+
+        fetched_at = time.time()
+        await asyncio.to_thread(self._save, destination, data, fetched_at)
+        rules = build_rules(destination, data, fetched_at)
+        self._rules[destination] = rules
+        return rules
+
+    def _load(self, destination: str) -> Optional[CountryVisaRules]:
+        try:
+            with open(self._path(destination)) as f:
+                cached = json.load(f)
+            return build_rules(destination, cached["data"], cached["fetched_at"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, destination: str, data: dict, fetched_at: float):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write then rename so a crash never leaves a half-written file
+            tmp_path = self._path(destination).with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"fetched_at": fetched_at, "data": data}, f)
+            os.replace(tmp_path, self._path(destination))
+        except OSError as e:
+            print(f"Could not write visa cache for {destination}: {e}")
+
+    async def prefetch(self, destinations: Iterable[str], concurrency: int = 4, force: bool = False) -> Dict[str, bool]:
+        """Warm the store for many destinations. Returns destination -> success."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def warm(destination: str) -> bool:
+            async with semaphore:
+                if force:
+                    return await self._fetch(destination) is not None
+                return await self.get_rules(destination) is not None
+
+        destinations = sorted(set(destinations))
+        results = await asyncio.gather(*(warm(d) for d in destinations))
+        return dict(zip(destinations, results))
+
+
+async def _warm_all(force: bool):
+    from app.services.http_clients import build_client
+    from app.services.visa_service import TravelbriefingVisaService, served_destinations
+
+    async with build_client("travelbriefing") as client:
+        store = VisaRulesStore(client, TravelbriefingVisaService.BASE_URL)
+        results = await store.prefetch(served_destinations(), force=force)
+
+    for destination, ok in results.items():
+        print(f"{'ok  ' if ok else 'FAIL'} {destination}")
+    print(f"Cached {sum(results.values())}/{len(results)} destinations in {store.cache_dir}")
+
+
+if __name__ == "__main__":
+    # Warm-up job: python -m app.services.visa_store [--force]
+    import sys
+    asyncio.run(_warm_all(force="--force" in sys.argv))
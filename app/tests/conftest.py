@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Keep the app's SQLite files and caches out of the working tree during tests.
+# Set before anything imports app.database, which reads DATABASE_URL at import.
+_tmp = tempfile.mkdtemp(prefix="travel-buddie-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'travel_buddie.db')}")
+os.environ.setdefault("VISA_CACHE_DIR", os.path.join(_tmp, "visa"))
+os.environ.setdefault("OPENAI_CACHE_PATH", "")
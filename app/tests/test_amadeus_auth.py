@@ -0,0 +1,109 @@
+import asyncio
+import httpx
+from app.services.amadeus_auth import AmadeusTokenManager, close_token_managers
+from app.services.amadeus_service import AmadeusFlightsService
+
+BASE_URL = "https://amadeus.test"
+
+
+class StubAmadeus:
+    """Stands in for the Amadeus API: issues t1, t2, ... and rejects tokens it is told to."""
+
+    def __init__(self, expires_in: float = 1799, delay: float = 0.0):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.auth_requests = 0
+        self.rejected = set()
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/v1/security/oauth2/token":
+            self.auth_requests += 1
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            return httpx.Response(200, json={"access_token": f"t{self.auth_requests}", "expires_in": self.expires_in})
+        if request.headers["Authorization"].removeprefix("Bearer ") in self.rejected:
+            return httpx.Response(401)
+        return httpx.Response(200, json={"data": []})
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+
+def test_concurrent_callers_share_one_auth_request():
+    async def run():
+        server = StubAmadeus(delay=0.05)
+        manager = AmadeusTokenManager(BASE_URL, "id", "secret")
+        async with server.client() as client:
+            tokens = await asyncio.gather(*(manager.get_token(client) for _ in range(20)))
+            await manager.aclose()
+
+        assert server.auth_requests == 1
+        assert set(tokens) == {"t1"}
+
+    asyncio.run(run())
+
+
+def test_token_is_refreshed_before_it_expires():
+    async def run():
+        server = StubAmadeus(expires_in=10)
+        # Refresh 9.8s early, so 0.2s after the first token arrives
+        manager = AmadeusTokenManager(BASE_URL, "id", "secret", refresh_margin=9.8)
+        async with server.client() as client:
+            assert await manager.get_token(client) == "t1"
+            await asyncio.sleep(0.3)
+            assert server.auth_requests == 2  # Refreshed in the background, with no caller waiting
+            assert await manager.get_token(client) == "t2"
+            await manager.aclose()
+
+        assert server.auth_requests == 2
+
+    asyncio.run(run())
+
+
+def test_token_shorter_lived_than_the_margin_is_not_refreshed_in_a_loop():
+    async def run():
+        server = StubAmadeus(expires_in=60, delay=0.01)
+        # Every token is already inside the margin, so it is refreshed halfway through its life instead
+        manager = AmadeusTokenManager(BASE_URL, "id", "secret", refresh_margin=120)
+        async with server.client() as client:
+            assert await manager.get_token(client) == "t1"
+            assert await asyncio.gather(*(manager.get_token(client) for _ in range(10))) == ["t1"] * 10
+            await asyncio.sleep(0.2)
+            await manager.aclose()
+
+        assert server.auth_requests == 1
+
+    asyncio.run(run())
+
+
+def test_invalidate_only_drops_the_rejected_token():
+    async def run():
+        server = StubAmadeus()
+        manager = AmadeusTokenManager(BASE_URL, "id", "secret")
+        async with server.client() as client:
+            await manager.get_token(client)
+            manager.invalidate("t0")  # A token that was already replaced
+            assert await manager.get_token(client) == "t1"
+            manager.invalidate("t1")
+            assert await manager.get_token(client) == "t2"
+            await manager.aclose()
+
+        assert server.auth_requests == 2
+
+    asyncio.run(run())
+
+
+def test_burst_of_401s_re_authenticates_once():
+    async def run():
+        server = StubAmadeus(delay=0.02)
+        async with server.client() as client:
+            service = AmadeusFlightsService(client=client, client_id="burst", client_secret="secret", base_url=BASE_URL)
+            await service.warm_up()
+            server.rejected.add("t1")  # Revoked upstream before it expired
+            responses = await asyncio.gather(*(service._get_flight_offers({}, "t1") for _ in range(10)))
+            await close_token_managers()
+
+        assert [response.status_code for response in responses] == [200] * 10
+        assert server.auth_requests == 2
+
+    asyncio.run(run())
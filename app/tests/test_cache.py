@@ -0,0 +1,112 @@
+import asyncio
+import time
+from app.models.trip_request import TripExtraction
+from app.models.recommendation import FlightOffer
+from app.services.cache import TTLCache, InMemoryCacheBackend, CacheEntry, SingleFlight
+from app.services.cached_services import CachedFlightsService
+
+TRIP = TripExtraction(origin="JFK", destination="LHR", start_date="2026-12-01", end_date="2026-12-05", travelers=1)
+
+
+def _offer(via: str, price: int) -> FlightOffer:
+    return FlightOffer(airline="X", price=price, departure="2026-12-01T08:00", arrival="2026-12-01T23:00",
+                       layovers=1, via=via)
+
+
+async def _make_stale(cache: TTLCache, key: str, value):
+    now = time.time()
+    await cache.backend.set(key, CacheEntry(value=value, fresh_until=now - 1, stale_until=now + 60))
+
+
+def test_stale_hit_refreshes_through_refresh_fetch():
+    async def run():
+        cache = TTLCache(InMemoryCacheBackend(), ttl=60, stale_ttl=60)
+        await _make_stale(cache, "k", ["old"])
+        calls = []
+
+        async def fetch():
+            calls.append("fetch")
+            return ["from fetch"]
+
+        async def refresh():
+            calls.append("refresh")
+            return ["from refresh"]
+
+        assert await cache.get_or_fetch("k", fetch, refresh=refresh) == ["old"]
+        await asyncio.sleep(0.01)
+        assert calls == ["refresh"]
+        assert await cache.get_or_fetch("k", fetch) == ["from refresh"]
+
+    asyncio.run(run())
+
+
+class _ConnectingFlights:
+    def __init__(self):
+        self.callbacks = []
+
+    async def search_connecting_flights(self, trip, on_hub_result=None):
+        self.callbacks.append(on_hub_result)
+        flights = [_offer("CDG", 900)]
+        if on_hub_result:
+            on_hub_result("CDG", flights)
+        return flights
+
+
+def test_connecting_refresh_does_not_report_to_the_first_caller():
+    async def run():
+        inner = _ConnectingFlights()
+        service = CachedFlightsService(inner, TTLCache(InMemoryCacheBackend(), ttl=60, stale_ttl=60))
+        key = "CONNECTING:JFK:LHR:2026-12-01:1"
+        await _make_stale(service.cache, key, [_offer("CDG", 800)])
+
+        events = []
+        await service.search_connecting_flights(TRIP, lambda hub, flights: events.append(hub))
+        await asyncio.sleep(0.01)
+
+        assert inner.callbacks == [None]  # The background refresh ran without the stream's callback
+        assert events == ["CDG"]  # The caller still saw its hub, replayed from the stale result
+
+    asyncio.run(run())
+
+
+def test_orphaned_fetch_is_cancelled_after_timeout():
+    async def run():
+        flight = SingleFlight(orphan_timeout=0.05)
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def slow():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        caller = asyncio.create_task(flight.do("k", slow))
+        await started.wait()
+        caller.cancel()
+        await asyncio.sleep(0.01)
+        assert "k" in flight and not cancelled.is_set()  # Still running for the grace period
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        assert "k" not in flight
+
+    asyncio.run(run())
+
+
+def test_fetch_with_a_remaining_waiter_is_not_cancelled():
+    async def run():
+        flight = SingleFlight(orphan_timeout=0.02)
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            return "done"
+
+        first = asyncio.create_task(flight.do("k", slow))
+        second = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "done"
+
+    asyncio.run(run())
@@ -0,0 +1,37 @@
+import json
+from fastapi.testclient import TestClient
+from app.config.hubs import MAX_HUBS
+from app.main import app
+from app.services.flight_utils import route_label
+from app.services.route_graph import get_route_graph
+
+
+def _events(client: TestClient, message: str):
+    events = []
+    with client.stream("POST", "/chat/stream", json={"message": message}) as response:
+        event = None
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((event, json.loads(line[len("data: "):])))
+    return events
+
+
+def test_one_hub_flights_event_per_hub():
+    # The mock has no direct JFK -> LHR flights, so it probes the routes rank_routes() picks
+    routes = get_route_graph().rank_routes("JFK", "LHR", MAX_HUBS)
+    with TestClient(app) as client:
+        events = _events(client, "Trip from 2026-12-01 to 2026-12-05 for 1 person $5000, flying from JFK to LHR")
+
+    names = [name for name, _ in events]
+    hubs = [data["via"] for name, data in events if name == "hub_flights"]
+    flights = next(data for name, data in events if name == "flights")
+
+    assert flights["connecting"]
+    assert sorted(hubs) == sorted({flight["via"] for flight in flights["flights"]})
+    assert sorted(hubs) == sorted(route_label(stops) for stops in routes)
+    assert len(hubs) == len(set(hubs)) >= 2
+    # Every hub is reported before the combined flights event
+    assert max(i for i, name in enumerate(names) if name == "hub_flights") < names.index("flights")
+    assert names[-2:] == ["bundles", "done"]
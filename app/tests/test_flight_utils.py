@@ -0,0 +1,65 @@
+import itertools
+import random
+from datetime import datetime
+from app.models.recommendation import FlightOffer
+from app.services.flight_utils import join_legs, MIN_LAYOVER_HOURS, MAX_LAYOVER_HOURS
+
+
+def _valid_layover(arrival: str, departure: str) -> bool:
+    """The pairwise check join_legs replaced."""
+    def parse(value: str) -> datetime:
+        for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M"):
+            try:
+                return datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+        raise ValueError(value)
+
+    try:
+        hours = (parse(departure) - parse(arrival)).total_seconds() / 3600
+    except ValueError:
+        return False
+    return MIN_LAYOVER_HOURS <= hours <= MAX_LAYOVER_HOURS
+
+
+def _brute_force(leg_offers):
+    return [
+        list(combo) for combo in itertools.product(*leg_offers)
+        if all(_valid_layover(a.arrival, b.departure) for a, b in zip(combo, combo[1:]))
+    ]
+
+
+def _random_offers(rng: random.Random, n: int):
+    offers = []
+    for i in range(n):
+        hour, minute = rng.randint(0, 47), rng.choice([0, 15, 30, 45])
+        day, hour = 1 + hour // 24, hour % 24
+        arrival_hour = hour + rng.randint(1, 10)
+        arrival_day, arrival_hour = day + arrival_hour // 24, arrival_hour % 24
+        offers.append(FlightOffer(
+            airline=f"A{i}", price=100, layovers=0,
+            # Both formats Amadeus and the mock produce
+            departure=f"2026-12-{day:02d}T{hour:02d}:{minute:02d}" + rng.choice(["", ":00"]),
+            arrival=f"2026-12-{arrival_day:02d}T{arrival_hour:02d}:{minute:02d}:00"
+        ))
+    offers.append(FlightOffer(airline="bad", price=1, departure="garbage", arrival="garbage", layovers=0))
+    return offers
+
+
+def test_join_legs_matches_pairwise_check():
+    rng = random.Random(1)
+    for round_ in range(40):
+        leg_offers = [_random_offers(rng, rng.randint(1, 25)) for _ in range(rng.choice([2, 3]))]
+        ids = lambda chains: sorted(tuple(id(offer) for offer in chain) for chain in chains)
+        assert ids(join_legs(leg_offers)) == ids(_brute_force(leg_offers)), f"round {round_}"
+
+
+def test_layover_bounds_are_inclusive():
+    first = FlightOffer(airline="A", price=1, departure="2026-12-01T06:00", arrival="2026-12-01T10:00", layovers=0)
+    at_min = FlightOffer(airline="B", price=1, departure="2026-12-01T11:30", arrival="2026-12-01T15:00", layovers=0)
+    at_max = FlightOffer(airline="C", price=1, departure="2026-12-01T18:00", arrival="2026-12-01T22:00", layovers=0)
+    too_soon = FlightOffer(airline="D", price=1, departure="2026-12-01T11:29", arrival="2026-12-01T15:00", layovers=0)
+    too_late = FlightOffer(airline="E", price=1, departure="2026-12-01T18:01", arrival="2026-12-01T22:00", layovers=0)
+
+    chains = join_legs([[first], [too_soon, at_min, at_max, too_late]])
+    assert sorted(chain[1].airline for chain in chains) == ["B", "C"]
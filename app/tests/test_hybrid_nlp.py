@@ -0,0 +1,107 @@
+import asyncio
+from app.models.trip_request import TripExtraction
+from app.services.hybrid_nlp_service import HybridNLPService
+from app.services.nlp_service import RegexNLPService
+from app.services.openai_service import OpenAINLPService
+
+# Message -> fields the regex pass can't fill and the LLM is asked for
+CORPUS = {
+    "HRE to LHR from 2026-12-01 to 2026-12-10 for 2 people $3000": [],
+    "Harare to London from 2026-12-01 to 2026-12-10 for 2 people $3000": [],
+    "Trip from 2026-12-01 to 2026-12-10 for 2 people $3000, flying from Harare to London": [],
+    "from 5 March 2027 to 12 March 2027 with 2 pax $4000 from Tokyo to London": [],
+    "JFK to CDG from 2027-01-10 to 2027-01-17 for 1 person": [],
+    "Paris to New York from 2026/12/20 to 2026/12/28 for 3 travelers": [],
+    "Trip from 2026/12/20 to 2026/12/28 for 2 people $5000": ["origin", "destination"],
+    "from Dec 24, 2026 to Jan 2, 2027 for 5 people $6000 to Paris": ["origin"],
+    "Flying from London to Tokyo for 2 people": ["start_date", "end_date"],
+    "I want to go to Paris": ["origin", "start_date", "end_date", "travelers"],
+}
+
+
+class FakeLLM:
+    """Stands in for OpenAINLPService: records the fields asked for and answers each one."""
+
+    ERROR_REPLY = OpenAINLPService.ERROR_REPLY
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = []
+
+    async def extract(self, text, known=None, fields=None):
+        self.calls.append(fields)
+        if self.fail:
+            return TripExtraction(reply_message=self.ERROR_REPLY)
+        answers = {"origin": "HRE", "destination": "CDG", "start_date": "2026-12-01", "end_date": "2026-12-08",
+                   "travelers": 1, "budget": 2000, "nationality": "ZW"}
+        return TripExtraction(**{name: answers[name] for name in fields}, reply_message="Anything else?")
+
+    def metrics(self) -> dict:
+        return {}
+
+
+def test_escalated_fields_and_rate_on_the_corpus():
+    async def run():
+        llm = FakeLLM()
+        service = HybridNLPService(RegexNLPService(), llm)
+        for message, expected in CORPUS.items():
+            calls = len(llm.calls)
+            await service.extract(message)
+            asked = llm.calls[calls] if len(llm.calls) > calls else []
+            assert asked == expected, message
+
+        metrics = service.metrics()
+        assert metrics["messages"] == len(CORPUS)
+        assert metrics["escalated"] == len(llm.calls) == 4
+        assert metrics["escalation_rate"] == 0.4
+        assert metrics["escalated_fields"] == {"origin": 3, "destination": 1, "start_date": 2, "end_date": 2,
+                                               "travelers": 1}
+
+    asyncio.run(run())
+
+
+def test_llm_answers_are_merged_into_the_regex_result():
+    async def run():
+        service = HybridNLPService(RegexNLPService(), FakeLLM())
+        trip = await service.extract("I want to go to Paris")
+
+        assert (trip.origin, trip.destination) == ("HRE", "CDG")  # Destination kept from the regex pass
+        assert (trip.start_date, trip.end_date, trip.travelers) == ("2026-12-01", "2026-12-08", 1)
+        assert trip.missing_fields == [] and trip.reply_message is None
+
+    asyncio.run(run())
+
+
+def test_optional_fields_escalate_only_when_mentioned():
+    async def run():
+        llm = FakeLLM()
+        service = HybridNLPService(RegexNLPService(), llm)
+        await service.extract("HRE to LHR from 2026-12-01 to 2026-12-10 for 2 people")
+        await service.extract("HRE to LHR from 2026-12-01 to 2026-12-10 for 2 people, I have a Zimbabwean passport")
+
+        assert llm.calls == [["nationality"]]
+
+    asyncio.run(run())
+
+
+def test_fields_known_from_earlier_turns_are_not_escalated():
+    async def run():
+        llm = FakeLLM()
+        service = HybridNLPService(RegexNLPService(), llm)
+        known = TripExtraction(origin="HRE", destination="CDG", travelers=2)
+        await service.extract("from 2026-12-01 to 2026-12-10", known=known)
+
+        assert llm.calls == []
+
+    asyncio.run(run())
+
+
+def test_llm_failure_keeps_the_regex_result():
+    async def run():
+        service = HybridNLPService(RegexNLPService(), FakeLLM(fail=True))
+        trip = await service.extract("I want to go to Paris")
+
+        assert trip.destination == "CDG" and trip.origin is None
+        assert service.metrics()["llm_errors"] == 1
+
+    asyncio.run(run())
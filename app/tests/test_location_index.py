@@ -0,0 +1,54 @@
+import random
+from app.services.location_index import _Automaton, get_location_index
+
+
+def _found(text: str):
+    return [(m.text, m.location.iata, m.kind) for m in get_location_index().find_all(text)]
+
+
+def test_automaton_finds_every_occurrence():
+    rng = random.Random(5)
+    for _ in range(200):
+        patterns = list({"".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 8))})
+        text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 30)))
+
+        expected = sorted(
+            (start, start + len(pattern), pattern_id)
+            for pattern_id, pattern in enumerate(patterns)
+            for start in range(len(text)) if text.startswith(pattern, start)
+        )
+        assert sorted(_Automaton(patterns).find(text)) == expected, (patterns, text)
+
+
+def test_leftmost_longest_without_overlaps():
+    assert _found("Trip to New York City in May") == [("New York City", "JFK", "alias")]
+    assert _found("from London Heathrow to Harare") == [
+        ("London", "LHR", "city"), ("Heathrow", "LHR", "airport"), ("Harare", "HRE", "city")
+    ]
+    assert _found("Harare to Victoria Falls") == [("Harare", "HRE", "city"), ("Victoria Falls", "VFA", "city")]
+
+
+def test_ambiguous_names_only_match_as_written():
+    assert _found("a nice hotel near the beach") == []
+    assert _found("a nice hotel in Nice") == [("Nice", "NCE", "city")]
+
+
+def test_codes_only_match_in_upper_case():
+    assert _found("from LHR to man") == [("LHR", "LHR", "iata")]
+    assert _found("from lhr to MAN") == [("MAN", "MAN", "iata")]
+    assert _found("LON to NYC") == [("LON", "LHR", "iata"), ("NYC", "JFK", "iata")]  # Metro codes
+
+
+def test_matches_need_word_boundaries():
+    assert _found("Pariser Platz, Londoners") == []
+
+
+def test_lookup_falls_back_to_fuzzy_matching():
+    index = get_location_index()
+    assert index.lookup("Hararee")[0].iata == "HRE" and index.lookup("Hararee")[1] == "fuzzy"
+    assert index.lookup("Parris")[0].iata == "CDG"
+    assert index.lookup("Parris", fuzzy=False) is None
+    assert index.lookup("Xyzzyq") is None
+    # Short names are never fuzzy-matched, only exact names and codes
+    assert index.lookup("Nce") == (index.airports["NCE"], "iata")
+    assert index.lookup("Lnd") is None
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import pytest
+from sqlalchemy import delete, select
+from app.database import SessionLocal, init_db
+from app.models.db_models import TripRequestDB, RecommendationDB
+from app.models.trip_request import TripExtraction
+from app.models.recommendation import FlightOffer, HotelOffer, TripBundle
+from app.services import persistence
+from app.services.persistence import RecommendationLogWriter
+
+TRIP = TripExtraction(origin="HRE", destination="LHR", start_date="2026-12-01", end_date="2026-12-05", travelers=1)
+BUNDLE = TripBundle(
+    flight=FlightOffer(airline="Emirates", price=900, departure="2026-12-01T08:00", arrival="2026-12-01T20:00", layovers=0),
+    hotel=HotelOffer(name="Hilton", price_per_night=180, rating=4.5, distance_km=1.0),
+    total_price=1620, score=90.0, reasoning="test"
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_db():
+    init_db()
+    with SessionLocal() as db:
+        db.execute(delete(RecommendationDB))
+        db.execute(delete(TripRequestDB))
+        db.commit()
+
+
+def _saved_queries():
+    with SessionLocal() as db:
+        return db.scalars(select(TripRequestDB.user_query).order_by(TripRequestDB.id)).all()
+
+
+class GatedWrites:
+    """Holds the writer thread inside its first batch until released, so the queue can fill up."""
+
+    def __init__(self, monkeypatch):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        save_batch = persistence._save_batch
+
+        def gated(records):
+            self.entered.set()
+            self.release.wait(5)
+            return save_batch(records)
+
+        monkeypatch.setattr(persistence, "_save_batch", gated)
+
+    async def wait_until_blocked(self):
+        assert await asyncio.to_thread(self.entered.wait, 5)
+
+
+async def _fill_queue(writer: RecommendationLogWriter, gate: GatedWrites):
+    """r0 is taken by the blocked flusher, r1 and r2 fill the queue of 2."""
+    writer.start()
+    await writer.enqueue("r0", TRIP, [])
+    await gate.wait_until_blocked()
+    await writer.enqueue("r1", TRIP, [])
+    await writer.enqueue("r2", TRIP, [])
+
+
+def test_flushes_when_batch_is_full():
+    async def run():
+        writer = RecommendationLogWriter(batch_size=3, flush_interval=30)
+        writer.start()
+        for n in range(3):
+            await writer.enqueue(f"r{n}", TRIP, [BUNDLE])
+        await asyncio.sleep(0.2)  # Long before the 30s interval
+
+        assert writer.stats.batches == 1 and writer.stats.written == 3
+        assert _saved_queries() == ["r0", "r1", "r2"]
+        with SessionLocal() as db:
+            assert len(db.scalars(select(RecommendationDB.trip_request_id)).all()) == 3
+        await writer.stop()
+
+    asyncio.run(run())
+
+
+def test_flushes_a_partial_batch_after_the_interval():
+    async def run():
+        writer = RecommendationLogWriter(batch_size=100, flush_interval=0.05)
+        writer.start()
+        await writer.enqueue("r0", TRIP, [])
+        await writer.enqueue("r1", TRIP, [])
+        assert _saved_queries() == []
+        await asyncio.sleep(0.3)
+
+        assert writer.stats.batches == 1
+        assert _saved_queries() == ["r0", "r1"]
+        await writer.stop()
+
+    asyncio.run(run())
+
+
+def test_drop_oldest(monkeypatch):
+    async def run():
+        gate = GatedWrites(monkeypatch)
+        writer = RecommendationLogWriter(max_queue=2, batch_size=1, flush_interval=30, drop_policy="drop_oldest")
+        try:
+            await _fill_queue(writer, gate)
+            await writer.enqueue("r3", TRIP, [])
+        finally:
+            gate.release.set()
+        await writer.stop()
+
+        assert writer.stats.dropped == 1
+        assert _saved_queries() == ["r0", "r2", "r3"]
+
+    asyncio.run(run())
+
+
+def test_drop_newest(monkeypatch):
+    async def run():
+        gate = GatedWrites(monkeypatch)
+        writer = RecommendationLogWriter(max_queue=2, batch_size=1, flush_interval=30, drop_policy="drop_newest")
+        try:
+            await _fill_queue(writer, gate)
+            await writer.enqueue("r3", TRIP, [])
+        finally:
+            gate.release.set()
+        await writer.stop()
+
+        assert writer.stats.dropped == 1
+        assert _saved_queries() == ["r0", "r1", "r2"]
+
+    asyncio.run(run())
+
+
+def test_block_waits_for_room(monkeypatch):
+    async def run():
+        gate = GatedWrites(monkeypatch)
+        writer = RecommendationLogWriter(max_queue=2, batch_size=1, flush_interval=30, drop_policy="block")
+        try:
+            await _fill_queue(writer, gate)
+            blocked = asyncio.create_task(writer.enqueue("r3", TRIP, []))
+            await asyncio.sleep(0.05)
+            assert not blocked.done()
+        finally:
+            gate.release.set()
+        await asyncio.wait_for(blocked, 5)
+        await writer.stop()
+
+        assert writer.stats.dropped == 0
+        assert _saved_queries() == ["r0", "r1", "r2", "r3"]
+
+    asyncio.run(run())
+
+
+def test_stop_drains_the_queue():
+    async def run():
+        writer = RecommendationLogWriter(batch_size=2, flush_interval=30)
+        writer.start()
+        for n in range(5):
+            await writer.enqueue(f"r{n}", TRIP, [])
+        await writer.stop()
+
+        assert writer.metrics()["pending"] == 0
+        assert writer.stats.written == 5
+        assert _saved_queries() == [f"r{n}" for n in range(5)]
+
+    asyncio.run(run())
+
+
+def test_unknown_drop_policy_is_rejected():
+    with pytest.raises(ValueError):
+        RecommendationLogWriter(drop_policy="drop_random")
@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from app.models.trip_request import TripExtraction
+from app.services import openai_service
+from app.services.openai_service import OpenAINLPService, build_extraction_cache
+
+
+class FakeCompletions:
+    """Stands in for client.beta.chat.completions: counts calls and can fail."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.fail = False
+
+    async def parse(self, model, messages, response_format):
+        self.calls.append(messages)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream error")
+        parsed = TripExtraction(origin="HRE", destination="LHR", travelers=2)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(parsed=parsed))])
+
+
+def _fake_client(delay: float = 0.0):
+    completions = FakeCompletions(delay)
+    return SimpleNamespace(beta=SimpleNamespace(chat=SimpleNamespace(completions=completions))), completions
+
+
+def _frozen_datetime(day: str):
+    class Frozen(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.strptime(day, "%Y-%m-%d")
+    return Frozen
+
+
+def test_normalized_messages_hit_the_cache():
+    async def run():
+        client, completions = _fake_client()
+        service = OpenAINLPService(client=client, cache=build_extraction_cache(path=None))
+        first = await service.extract("Harare to London for 2 people")
+        second = await service.extract("  harare TO london for 2   people!")
+
+        assert len(completions.calls) == 1
+        assert second == first and second is not first  # Each caller gets its own TripExtraction
+        assert service.metrics()["cache"]["hits"] == 1
+
+    asyncio.run(run())
+
+
+def test_a_new_day_misses(monkeypatch):
+    async def run():
+        client, completions = _fake_client()
+        service = OpenAINLPService(client=client, cache=build_extraction_cache(path=None))
+        monkeypatch.setattr(openai_service, "datetime", _frozen_datetime("2026-12-01"))
+        await service.extract("Harare to London next week")
+        await service.extract("Harare to London next week")
+        monkeypatch.setattr(openai_service, "datetime", _frozen_datetime("2026-12-02"))
+        await service.extract("Harare to London next week")
+
+        # "Next week" means something else tomorrow, and the prompt carries the date
+        assert len(completions.calls) == 2
+        assert "2026-12-02" in completions.calls[1][0]["content"]
+
+    asyncio.run(run())
+
+
+def test_concurrent_identical_messages_share_one_call():
+    async def run():
+        client, completions = _fake_client(delay=0.05)
+        service = OpenAINLPService(client=client, cache=build_extraction_cache(path=None))
+        results = await asyncio.gather(*(service.extract("Harare to London for 2 people") for _ in range(5)))
+
+        assert len(completions.calls) == 1
+        assert all(trip.destination == "LHR" for trip in results)
+
+    asyncio.run(run())
+
+
+def test_errors_are_not_cached():
+    async def run():
+        client, completions = _fake_client()
+        service = OpenAINLPService(client=client, cache=build_extraction_cache(path=None))
+        completions.fail = True
+        failed = await service.extract("Harare to London for 2 people")
+        completions.fail = False
+        recovered = await service.extract("Harare to London for 2 people")
+
+        assert failed.reply_message == OpenAINLPService.ERROR_REPLY
+        assert recovered.destination == "LHR"
+        assert len(completions.calls) == 2
+
+    asyncio.run(run())
+
+
+def test_sqlite_tier_survives_a_restart(tmp_path):
+    async def run():
+        path = str(tmp_path / "extractions.sqlite3")
+        client, completions = _fake_client()
+        await OpenAINLPService(client=client, cache=build_extraction_cache(path)).extract("Harare to London for 2 people")
+
+        # A new process: empty memory tier, same file
+        client, restarted = _fake_client()
+        service = OpenAINLPService(client=client, cache=build_extraction_cache(path))
+        trip = await service.extract("harare to london for 2 people")
+
+        assert len(completions.calls) == 1 and not restarted.calls
+        assert trip.origin == "HRE" and trip.travelers == 2
+
+    asyncio.run(run())
@@ -0,0 +1,47 @@
+from app.config.hubs import ALL_HUBS, MAX_DETOUR
+from app.services.location_index import get_location_index
+from app.services.route_graph import RouteGraph
+
+
+def test_without_route_data_ranks_hubs_by_detour():
+    graph = RouteGraph(None, get_location_index())
+    assert len(graph) == 0
+    assert graph.rank_routes("HRE", "LHR", 2) == [("FRA",), ("ADD",)]
+    assert graph.rank_routes("JFK", "LHR", 3) == [("FRA",), ("ATL",)]  # Every other hub is too far out of the way
+    assert graph.rank_routes("GRU", "NRT", 2) == [("JFK",), ("ATL",)]
+    assert graph.rank_routes("Hararee", "LHR", 2) == []  # No coordinates to rank with
+
+    for origin, destination in [("SYD", "LHR"), ("HRE", "CDG"), ("LON", "NYC")]:
+        hubs = graph.rank_nearby_hubs(origin, destination, len(ALL_HUBS))
+        detours = [
+            (graph.distance(graph._airport(origin), hub) + graph.distance(hub, graph._airport(destination)))
+            / graph.distance(graph._airport(origin), graph._airport(destination))
+            for hub in hubs
+        ]
+        assert detours == sorted(detours) and max(detours) <= MAX_DETOUR
+        assert graph._airport(destination) not in hubs
+
+
+def test_ranks_hubs_that_fly_both_legs(tmp_path):
+    routes = tmp_path / "routes.csv"
+    routes.write_text(
+        "origin,destination\n"
+        "HRE,JNB\nJNB,LHR\n"   # One-stop via Johannesburg
+        "HRE,ADD\nADD,LHR\n"   # One-stop via Addis Ababa
+        "HRE,NBO\n"            # Nairobi doesn't reach London
+    )
+    graph = RouteGraph(str(routes), get_location_index())
+    assert sorted(graph.rank_routes("HRE", "LHR", 3)) == [("ADD",), ("JNB",)]
+    assert "NBO" not in graph.rank_hubs("HRE", "LHR")
+
+
+def test_reads_nonstop_openflights_routes(tmp_path):
+    routes = tmp_path / "routes.dat"
+    routes.write_text(
+        "SA,1,HRE,1,JNB,2,,0,737\n"
+        "SA,1,JNB,2,LHR,3,,0,350\n"
+        "XX,9,HRE,1,LHR,3,,1,737\n"  # One stop: not a nonstop route
+    )
+    graph = RouteGraph(str(routes), get_location_index())
+    assert len(graph) == 2
+    assert graph.rank_routes("HRE", "LHR", 1) == [("JNB",)]
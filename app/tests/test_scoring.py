@@ -0,0 +1,92 @@
+import random
+from app.models.trip_request import TripExtraction
+from app.models.recommendation import FlightOffer, HotelOffer, CarRentalOffer
+from app.services.scoring_service import create_bundles, _budget_score, _flight_nights, _trip_nights, CAR_RATING_WEIGHT
+
+
+def _trip(budget=None) -> TripExtraction:
+    return TripExtraction(origin="HRE", destination="LHR", start_date="2026-12-05", end_date="2026-12-10",
+                          travelers=1, budget=budget)
+
+
+def _brute_force(trip, flights, hotels, cars, k=3):
+    """Every flight x hotel x car, keeping each pair's best car (first listed on ties), best first."""
+    car_options = cars or [None]
+    scored = []
+    for i, flight in enumerate(flights):
+        nights = _flight_nights(flight, _trip_nights(trip))
+        for j, hotel in enumerate(hotels):
+            options = []
+            for c, car in enumerate(car_options):
+                total = flight.price + hotel.price_per_night * nights + (car.price_per_day * nights if car else 0)
+                car_score = car.rating * CAR_RATING_WEIGHT if car else 0
+                score = round(hotel.rating * 20 + car_score + _budget_score(trip.budget, total), 2)
+                options.append((-score, c, total))
+            score, c, total = min(options)
+            scored.append((score, i, j, c, total))
+    scored.sort()
+    return [(i, j, c, total) for _, i, j, c, total in scored[:k]]
+
+
+def test_matches_brute_force_on_random_inputs():
+    rng = random.Random(3)
+    for n in range(3000):
+        flexible = n % 2
+        trip = _trip(budget=rng.choice([None, 1500, 2000, 4000]))
+        flights = [
+            FlightOffer(airline=f"A{i}", price=rng.randint(3, 30) * 50,
+                        departure=f"2026-12-0{rng.randint(2, 8)}T10:00", arrival="2026-12-02T08:00", layovers=0,
+                        return_date=f"2026-12-{rng.randint(9, 13)}" if flexible else None)
+            for i in range(rng.randint(1, 12))
+        ]
+        hotels = [
+            HotelOffer(name=f"H{j}", price_per_night=rng.randint(5, 30) * 10,
+                       rating=rng.choice([3.5, 4.0, 4.2, 4.5]), distance_km=1.0)
+            for j in range(rng.randint(1, 6))
+        ]
+        cars = [
+            CarRentalOffer(company=f"C{c}", car_type="Economy", price_per_day=rng.randint(2, 9) * 10,
+                           rating=rng.choice([3.8, 4.0, 4.4]))
+            for c in range(rng.randint(0, 3))
+        ]
+
+        bundles = create_bundles(trip, flights, hotels, cars)
+        got = [
+            (flights.index(b.flight), hotels.index(b.hotel), cars.index(b.car_rental) if b.car_rental else 0,
+             b.total_price)
+            for b in bundles
+        ]
+        assert got == _brute_force(trip, flights, hotels, cars), f"input {n}"
+
+
+def test_top_bundles_are_distinct_flight_hotel_pairs():
+    flights = [
+        FlightOffer(airline="Emirates", price=900, departure="2026-12-05T08:00", arrival="2026-12-05T20:00", layovers=0),
+        FlightOffer(airline="Qatar Airways", price=1000, departure="2026-12-05T09:00", arrival="2026-12-05T21:00", layovers=1),
+    ]
+    hotels = [
+        HotelOffer(name="Hilton", price_per_night=180, rating=4.5, distance_km=1.0),
+        HotelOffer(name="Budget Inn", price_per_night=90, rating=3.8, distance_km=2.0),
+    ]
+    cars = [
+        CarRentalOffer(company="Avis", car_type="SUV", price_per_day=85, rating=4.4),
+        CarRentalOffer(company="Hertz", car_type="Economy", price_per_day=45, rating=4.1),
+        CarRentalOffer(company="Budget", car_type="Compact", price_per_day=50, rating=3.9),
+    ]
+
+    for budget, car in ((None, "Avis"), (5000, "Hertz"), (2000, "Hertz")):
+        bundles = create_bundles(_trip(budget), flights, hotels, cars)
+        pairs = [(b.flight.airline, b.hotel.name) for b in bundles]
+        assert len(bundles) == 3
+        assert len(set(pairs)) == 3, f"budget {budget}: {pairs}"
+        # Without a budget the best-rated car wins; with one, $40 a day outweighs 0.3 stars
+        assert all(b.car_rental.company == car for b in bundles), f"budget {budget}"
+
+
+def test_no_cars():
+    flights = [FlightOffer(airline="Emirates", price=900, departure="2026-12-05T08:00", arrival="2026-12-05T20:00", layovers=0)]
+    hotels = [HotelOffer(name="Hilton", price_per_night=180, rating=4.5, distance_km=1.0)]
+    bundles = create_bundles(_trip(3000), flights, hotels, [])
+    assert len(bundles) == 1
+    assert bundles[0].car_rental is None
+    assert bundles[0].total_price == 900 + 180 * 5
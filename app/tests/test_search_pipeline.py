@@ -0,0 +1,136 @@
+import asyncio
+from app.models.trip_request import TripExtraction
+from app.models.recommendation import FlightOffer
+from app.services.search_pipeline import TripSearchPipeline
+
+TRIP = TripExtraction(origin="HRE", destination="LHR", start_date="2026-12-01", end_date="2026-12-05", travelers=1)
+DIRECT = FlightOffer(airline="BA", price=900, departure="2026-12-01T08:00", arrival="2026-12-01T20:00", layovers=0)
+CONNECTING = FlightOffer(airline="SA + BA", price=700, departure="2026-12-01T08:00", arrival="2026-12-02T06:00",
+                         layovers=1, via="JNB")
+
+
+class FakeFlights:
+    """Records every search, when it started, and whether the connecting search was cancelled."""
+
+    def __init__(self, direct=(DIRECT,), direct_delay: float = 0.0, connecting_delay: float = 0.1):
+        self.direct = list(direct)
+        self.direct_delay = direct_delay
+        self.connecting_delay = connecting_delay
+        self.calls = []
+        self.connecting_cancelled = False
+        self.direct_done = False
+
+    async def search_flights(self, trip):
+        self.calls.append("direct")
+        await asyncio.sleep(self.direct_delay)
+        self.direct_done = True
+        return self.direct
+
+    async def search_flexible_dates(self, trip, window_days):
+        self.calls.append(f"flexible:{window_days}")
+        return self.direct
+
+    async def search_connecting_flights(self, trip, on_hub_result=None):
+        # Whether direct search had finished when this started
+        self.calls.append("connecting" if self.direct_done else "connecting (speculative)")
+        try:
+            await asyncio.sleep(self.connecting_delay)
+        except asyncio.CancelledError:
+            self.connecting_cancelled = True
+            raise
+        return [CONNECTING]
+
+
+class FakeSearch:
+    async def search_hotels(self, trip):
+        return []
+
+    async def search_cars(self, trip):
+        return []
+
+
+def _pipeline(flights: FakeFlights, trip: TripExtraction = TRIP, **kwargs) -> TripSearchPipeline:
+    return TripSearchPipeline(trip, flights, FakeSearch(), FakeSearch(), **kwargs)
+
+
+async def _settle():
+    # Let cancelled tasks run their CancelledError handlers
+    await asyncio.sleep(0.01)
+
+
+def test_off_searches_connecting_only_after_direct_comes_back_empty():
+    async def run():
+        flights = FakeFlights(direct_delay=0.05)
+        assert await _pipeline(flights, speculation="off").flights() == ([DIRECT], False)
+        assert flights.calls == ["direct"]
+
+        flights = FakeFlights(direct=[], direct_delay=0.05)
+        assert await _pipeline(flights, speculation="off").flights() == ([CONNECTING], True)
+        assert flights.calls == ["direct", "connecting"]
+
+    asyncio.run(run())
+
+
+def test_eager_starts_connecting_with_direct_and_cancels_it_on_direct_results():
+    async def run():
+        flights = FakeFlights(direct_delay=0.05)
+        assert await _pipeline(flights, speculation="eager").flights() == ([DIRECT], False)
+        await _settle()
+        assert flights.calls == ["direct", "connecting (speculative)"]
+        assert flights.connecting_cancelled
+
+    asyncio.run(run())
+
+
+def test_eager_reuses_the_speculative_search_when_direct_is_empty():
+    async def run():
+        flights = FakeFlights(direct=[], direct_delay=0.05)
+        assert await _pipeline(flights, speculation="eager").flights() == ([CONNECTING], True)
+        assert flights.calls == ["direct", "connecting (speculative)"]  # Not started a second time
+        assert not flights.connecting_cancelled
+
+    asyncio.run(run())
+
+
+def test_delayed_speculates_only_when_direct_is_slow():
+    async def run():
+        # Direct answers within the delay: connecting never starts
+        flights = FakeFlights(direct_delay=0.01)
+        pipeline = _pipeline(flights, speculation="delayed", speculation_delay=0.1)
+        assert await pipeline.flights() == ([DIRECT], False)
+        await asyncio.sleep(0.15)
+        assert flights.calls == ["direct"]
+        assert pipeline.connecting is None
+
+        # Direct is still running after the delay: connecting starts, then is cancelled by direct's results
+        flights = FakeFlights(direct_delay=0.15, connecting_delay=1.0)
+        assert await _pipeline(flights, speculation="delayed", speculation_delay=0.05).flights() == ([DIRECT], False)
+        await _settle()
+        assert flights.calls == ["direct", "connecting (speculative)"]
+        assert flights.connecting_cancelled
+
+    asyncio.run(run())
+
+
+def test_flexible_trips_search_the_date_window():
+    async def run():
+        flights = FakeFlights()
+        trip = TRIP.model_copy(update={"flexible_days": 2})
+        await _pipeline(flights, trip, speculation="off").flights()
+        assert flights.calls == ["flexible:2"]
+
+    asyncio.run(run())
+
+
+def test_cancel_stops_pending_searches():
+    async def run():
+        flights = FakeFlights(direct_delay=1.0, connecting_delay=1.0)
+        pipeline = _pipeline(flights, speculation="eager")
+        await asyncio.sleep(0.01)
+        pipeline.cancel()
+        await _settle()
+
+        assert pipeline.direct.cancelled()
+        assert flights.connecting_cancelled
+
+    asyncio.run(run())
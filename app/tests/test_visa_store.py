@@ -0,0 +1,173 @@
+import asyncio
+import json
+import threading
+import time
+import httpx
+from app.services.visa_store import VisaRulesStore, DEFAULT_VISA_TYPE
+from app.services.visa_service import TravelbriefingVisaService
+
+BASE_URL = "https://travelbriefing.test"
+
+JAPAN = {
+    "names": {"name": "Japan"},
+    "passport": {"validity": "Valid for the duration of stay"},
+    "visa": {
+        "visa-free": [{"code": "US", "note": "90 days"}, {"code": "GB", "note": "90 days"}],
+        "visa-on-arrival": [{"code": "US", "note": "never used"}, {"code": "ZW", "note": "30 days"}],
+    },
+}
+
+
+class StubServer:
+    """Stands in for travelbriefing.org: counts requests and can be told to fail."""
+
+    def __init__(self, payload: dict = JAPAN, status: int = 200, delay: float = 0.0):
+        self.payload = payload
+        self.status = status
+        self.delay = delay
+        self.requests = []
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return httpx.Response(self.status)
+        return httpx.Response(200, json=self.payload)
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+
+def test_fetch_and_parse(tmp_path):
+    async def run():
+        server = StubServer()
+        async with server.client() as client:
+            store = VisaRulesStore(client, BASE_URL, cache_dir=str(tmp_path))
+            rules = await store.get_rules("Japan")
+
+        assert str(server.requests[0].url) == f"{BASE_URL}/Japan?format=json"
+        assert rules.passport_validity == "Valid for the duration of stay"
+        assert rules.lookup("US") == ("Visa-free", "90 days")  # Visa-free wins over visa on arrival
+        assert rules.lookup("ZW") == ("Visa on arrival", "30 days")
+        assert rules.lookup("NG") == (DEFAULT_VISA_TYPE, None)
+
+    asyncio.run(run())
+
+
+def test_visa_service_answers_from_the_store(tmp_path):
+    async def run():
+        server = StubServer()
+        async with server.client() as client:
+            store = VisaRulesStore(client, BASE_URL, cache_dir=str(tmp_path))
+            service = TravelbriefingVisaService(client=client, store=store)
+            info = await service.get_visa_info("Japan", "ZW")
+
+        assert info.visa_required and info.visa_type == "Visa on arrival"
+        assert info.notes == "30 days"
+
+    asyncio.run(run())
+
+
+def test_disk_cache_round_trip(tmp_path):
+    async def run():
+        server = StubServer()
+        async with server.client() as client:
+            await VisaRulesStore(client, BASE_URL, cache_dir=str(tmp_path)).get_rules("Japan")
+            # A new store (e.g. after a restart) answers from disk without calling upstream
+            rules = await VisaRulesStore(client, BASE_URL, cache_dir=str(tmp_path)).get_rules("Japan")
+
+        assert len(server.requests) == 1
+        assert rules.lookup("GB") == ("Visa-free", "90 days")
+        assert json.loads((tmp_path / "Japan.json").read_text())["data"] == JAPAN
+
+    asyncio.run(run())
+
+
+def _write_expired(tmp_path, payload: dict):
+    (tmp_path / "Japan.json").write_text(json.dumps({"fetched_at": time.time() - 3600, "data": payload}))
+
+
+def test_expired_entry_is_refetched(tmp_path):
+    async def run():
+        _write_expired(tmp_path, {"visa": {"visa-free": [{"code": "US", "note": "old"}]}})
+        server = StubServer()
+        async with server.client() as client:
+            store = VisaRulesStore(client, BASE_URL, cache_dir=str(tmp_path), ttl=60)
+            rules = await store.get_rules("Japan")
+
+        assert len(server.requests) == 1
+        assert rules.lookup("US") == ("Visa-free", "90 days")
+        assert time.time() - rules.fetched_at < 60
+
+    asyncio.run(run())
+
+
+def test_stale_entry_used_when_upstream_fails(tmp_path):
+    async def run():
+        _write_expired(tmp_path, {"visa": {"visa-free": [{"code": "US", "note": "old"}]}})
+        server = StubServer(status=503)
+        async with server.client() as client:
+            store = VisaRulesStore(client, BASE_URL, cache_dir=str(tmp_path), ttl=60)
+            rules = await store.get_rules("Japan")
+            missing = await store.get_rules("Kenya")
+
+        assert len(server.requests) == 2
+        assert rules.lookup("US") == ("Visa-free", "old")
+        assert missing is None  # Nothing cached to fall back on
+
+    asyncio.run(run())
+
+
+def test_concurrent_lookups_share_one_fetch(tmp_path):
+    async def run():
+        server = StubServer(delay=0.05)
+        async with server.client() as client:
+            store = VisaRulesStore(client, BASE_URL, cache_dir=str(tmp_path))
+            results = await asyncio.gather(*(store.get_rules("Japan") for _ in range(10)))
+
+        assert len(server.requests) == 1
+        assert all(rules is results[0] for rules in results)
+
+    asyncio.run(run())
+
+
+def test_destination_country_comes_from_the_location_index(tmp_path):
+    async def run():
+        server = StubServer(payload={"visa": {"visa-free": [{"code": "GB", "note": "90 days"}]}})
+        async with server.client() as client:
+            service = TravelbriefingVisaService(client=client, store=VisaRulesStore(client, BASE_URL, cache_dir=str(tmp_path)))
+            barcelona = await service.get_visa_info("BCN", "United Kingdom")
+            await service.get_visa_info("LON", "UK")
+
+        assert [request.url.path for request in server.requests] == ["/Spain", "/United-Kingdom"]
+        assert barcelona.destination == "Spain"
+        assert barcelona.visa_type == "Visa-free"  # "United Kingdom" looked up as GB
+
+    asyncio.run(run())
+
+
+def test_disk_io_runs_off_the_event_loop(tmp_path, monkeypatch):
+    async def run():
+        loop_thread = threading.current_thread()
+        io_threads = []
+        store_load, store_save = VisaRulesStore._load, VisaRulesStore._save
+
+        def load(self, destination):
+            io_threads.append(threading.current_thread())
+            return store_load(self, destination)
+
+        def save(self, destination, data, fetched_at):
+            io_threads.append(threading.current_thread())
+            store_save(self, destination, data, fetched_at)
+
+        monkeypatch.setattr(VisaRulesStore, "_load", load)
+        monkeypatch.setattr(VisaRulesStore, "_save", save)
+        server = StubServer()
+        async with server.client() as client:
+            await VisaRulesStore(client, BASE_URL, cache_dir=str(tmp_path)).get_rules("Japan")
+
+        assert len(io_threads) == 2  # One miss on disk, one write after the fetch
+        assert loop_thread not in io_threads
+
+    asyncio.run(run())
@@ -0,0 +1,165 @@
+import json
+import random
+import sys
+import time
+from app.models.recommendation import FlightOffer
+from app.services import amadeus_offers
+from app.services.amadeus_offers import decode_offers
+
+# Pass recorded /v2/shopping/flight-offers response bodies as arguments, e.g.
+#   python bench_amadeus_parsing.py recorded/hre_lhr.json recorded/jfk_cdg.json
+# Without any, a payload shaped like a max=250 response is generated.
+# The shared decoder is a refactor, not an optimization: this checks that it
+# stays about as fast as the loop it replaced and produces the same fields.
+OFFERS_PER_PAYLOAD = 250
+ROUNDS = 50
+
+CARRIERS = ["ET", "EK", "QR", "KQ", "SA", "LH", "BA", "AF", "KL", "TK"]
+AIRPORTS = ["HRE", "JNB", "ADD", "NBO", "DXB", "DOH", "IST", "FRA", "LHR", "CDG", "AMS"]
+
+
+def sample_payload(offers: int, seed: int = 7) -> bytes:
+    """A flight-offers response with the nesting Amadeus returns (fare details, dictionaries)."""
+    rng = random.Random(seed)
+    data = []
+    for i in range(offers):
+        stops = rng.choice([0, 1, 1, 2])
+        path = ["HRE"] + rng.sample(AIRPORTS[1:-1], stops) + ["LHR"]
+        hour = rng.randint(0, 12)
+        segments = []
+        for n, (a, b) in enumerate(zip(path, path[1:])):
+            carrier = rng.choice(CARRIERS)
+            segments.append({
+                "departure": {"iataCode": a, "terminal": "1", "at": f"2026-12-01T{hour + 5 * n:02d}:10:00"},
+                "arrival": {"iataCode": b, "terminal": "2", "at": f"2026-12-01T{hour + 5 * n + 3:02d}:40:00"},
+                "carrierCode": carrier,
+                "number": str(rng.randint(100, 999)),
+                "aircraft": {"code": "789"},
+                "operating": {"carrierCode": carrier},
+                "duration": "PT3H30M",
+                "id": str(n + 1),
+                "numberOfStops": 0,
+                "blacklistedInEU": False
+            })
+        total = f"{rng.randint(300, 2500)}.{rng.randint(0, 99):02d}"
+        data.append({
+            "type": "flight-offer",
+            "id": str(i + 1),
+            "source": "GDS",
+            "instantTicketingRequired": False,
+            "nonHomogeneous": False,
+            "oneWay": False,
+            "lastTicketingDate": "2026-11-20",
+            "numberOfBookableSeats": rng.randint(1, 9),
+            "itineraries": [{"duration": "PT14H", "segments": segments}],
+            "price": {
+                "currency": "USD", "total": total, "base": total, "grandTotal": total,
+                "fees": [{"amount": "0.00", "type": "SUPPLIER"}, {"amount": "0.00", "type": "TICKETING"}]
+            },
+            "pricingOptions": {"fareType": ["PUBLISHED"], "includedCheckedBagsOnly": True},
+            "validatingAirlineCodes": [segments[0]["carrierCode"]],
+            "travelerPricings": [{
+                "travelerId": "1",
+                "fareOption": "STANDARD",
+                "travelerType": "ADULT",
+                "price": {"currency": "USD", "total": total, "base": total},
+                "fareDetailsBySegment": [{
+                    "segmentId": s["id"],
+                    "cabin": "ECONOMY",
+                    "fareBasis": "KLOWZW",
+                    "brandedFare": "ECOLIGHT",
+                    "class": "K",
+                    "includedCheckedBags": {"quantity": 1},
+                    "amenities": [
+                        {"description": name, "isChargeable": True, "amenityType": "BAGGAGE",
+                         "amenityProvider": {"name": "BrandedFare"}}
+                        for name in ("CHECKED BAG", "SEAT SELECTION", "MEAL", "CHANGEABLE TICKET")
+                    ]
+                } for s in segments]
+            }]
+        })
+    dictionaries = {
+        "locations": {code: {"cityCode": code, "countryCode": "XX"} for code in AIRPORTS},
+        "aircraft": {"789": "BOEING 787-9"},
+        "currencies": {"USD": "US DOLLAR"},
+        "carriers": {code: f"CARRIER {code}" for code in CARRIERS}
+    }
+    return json.dumps({"meta": {"count": offers}, "data": data, "dictionaries": dictionaries}).encode()
+
+
+def legacy_decode(body: bytes):
+    """The loop search_flights ran before the shared decoder: full json parse, fields read per offer."""
+    offers = []
+    for offer in json.loads(body).get("data", []):
+        itineraries = offer["itineraries"]
+        price = float(offer["price"]["total"])
+        first_seg = itineraries[0]["segments"][0]
+        last_seg = itineraries[0]["segments"][-1]
+        offers.append(FlightOffer(
+            airline=first_seg["carrierCode"],
+            price=int(price),
+            departure=first_seg["departure"]["at"],
+            arrival=last_seg["arrival"]["at"],
+            layovers=len(itineraries[0]["segments"]) - 1
+        ))
+    return offers
+
+
+def run(decode, payloads, rounds: int):
+    latencies = []
+    for _ in range(rounds):
+        for body in payloads:
+            start = time.perf_counter()
+            decode(body)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return latencies
+
+
+def report(name: str, latencies):
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[int(len(latencies) * 0.95)]
+    mean = sum(latencies) / len(latencies)
+    print(f"{name:<14}mean {mean:7.3f} ms | p50 {p50:7.3f} ms | p95 {p95:7.3f} ms")
+
+
+def main():
+    if len(sys.argv) > 1:
+        payloads = [open(path, "rb").read() for path in sys.argv[1:]]
+        source = f"{len(payloads)} recorded payload(s)"
+    else:
+        payloads = [sample_payload(OFFERS_PER_PAYLOAD)]
+        source = f"a generated {OFFERS_PER_PAYLOAD}-offer payload"
+    size_kb = sum(len(body) for body in payloads) / 1024
+    print(f"Benchmarking flight-offer parsing on {source} ({size_kb:.0f} KB) x {ROUNDS} rounds\n")
+
+    legacy = run(legacy_decode, payloads, ROUNDS)
+    decoded = run(decode_offers, payloads, ROUNDS)
+
+    # Same decoder without orjson, as on installs that don't have it
+    loads = amadeus_offers._loads
+    amadeus_offers._loads = json.loads
+    try:
+        stdlib = run(decode_offers, payloads, ROUNDS)
+    finally:
+        amadeus_offers._loads = loads
+
+    report("legacy", legacy)
+    report("decoder", decoded)
+    report("decoder/json", stdlib)
+    print(f"\nLegacy / decoder mean time: {sum(legacy) / sum(decoded):.2f} (orjson {'on' if loads is not json.loads else 'not installed'})")
+
+    # The decoder must agree with the old loop on every field it produced
+    fields = ("airline", "price", "departure", "arrival", "layovers")
+    mismatches = 0
+    for body in payloads:
+        for old, new in zip(legacy_decode(body), decode_offers(body)):
+            if any(getattr(old, f) != getattr(new, f) for f in fields):
+                mismatches += 1
+                print(f"❌ Mismatch\n   legacy:  {old}\n   decoder: {new}")
+    if not mismatches:
+        print("✅ Decoder matches the old parsing loop for every offer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import asyncio
+import re
+import time
+import dateparser
+from app.models.trip_request import TripExtraction
+from app.services.nlp_service import RegexNLPService, warm_up_date_parser, _parse_date_phrase
+from app.config.locations import normalize_to_iata
+
+# Messages in the shapes users actually send: ISO dates, written-out dates,
+# relative phrases, and incomplete requests with no dates at all
+CORPUS = [
+    "Trip from 2026-12-01 to 2026-12-10 for 2 people $3000, flying from Harare to London",
+    "I want to go from Harare to Paris from 2026-11-03 to 2026-11-09 for 1 person $1500",
+    "Trip from December 1 2026 to December 10 2026 for 3 travelers, budget 2500 dollars",
+    "from 5 March 2027 to 12 March 2027 with 2 pax $4000 from Tokyo to London",
+    "Book something from next month to in 2 months for 4 people",
+    "Holiday from tomorrow to next week for 2 people $800",
+    "I want to go to Paris",
+    "Flying from London to Tokyo for 2 people",
+    "Trip from 2026/12/20 to 2026/12/28 for 2 people $5000",
+    "from Dec 24, 2026 to Jan 2, 2027 for 5 people $6000 to Paris",
+]
+ROUNDS = 20
+
+
+class LegacyRegexNLPService:
+    """The extractor as it was before precompiled patterns and the date fast path."""
+
+    async def extract(self, text: str) -> TripExtraction:
+        data = {
+            "origin": None,
+            "destination": None,
+            "start_date": None,
+            "end_date": None,
+            "travelers": None,
+            "budget": None,
+            "missing_fields": []
+        }
+        budget_match = re.search(r'\$(\d+)|(\d+)\s*(?:dollars|usd)', text, re.IGNORECASE)
+        if budget_match:
+            data["budget"] = int(budget_match.group(1) or budget_match.group(2))
+        travelers_match = re.search(r'(\d+)\s*(?:people|person|travelers|pax)', text, re.IGNORECASE)
+        if travelers_match:
+            data["travelers"] = int(travelers_match.group(1))
+
+        date_range_match = re.search(r'from\s+(.*?)\s+to\s+(.*?)(?:\s+for|\s+with|\s*$)', text, re.IGNORECASE)
+        clean_text = text
+        if date_range_match:
+            start_dt = dateparser.parse(date_range_match.group(1).strip(), settings={'PREFER_DATES_FROM': 'future'})
+            end_dt = dateparser.parse(date_range_match.group(2).strip(), settings={'PREFER_DATES_FROM': 'future'})
+            if start_dt and end_dt:
+                data["start_date"] = start_dt.strftime("%Y-%m-%d")
+                data["end_date"] = end_dt.strftime("%Y-%m-%d")
+                clean_text = text.replace(date_range_match.group(0), " ")
+
+        origin_candidates = re.findall(r'\bfrom\s+([A-Z][a-z]+)', clean_text)
+        if origin_candidates:
+            data["origin"] = origin_candidates[0]
+        dest_candidates = re.findall(r'\bto\s+([A-Z][a-z]+)', clean_text)
+        if dest_candidates:
+            data["destination"] = dest_candidates[0]
+
+        airport_codes = {"Harare": "HRE", "London": "LHR", "Paris": "CDG", "New York": "JFK", "Tokyo": "NRT"}
+        if data["origin"] in airport_codes:
+            data["origin"] = airport_codes[data["origin"]]
+        data["reply_message"] = None
+        return TripExtraction(**data)
+
+
+async def run(service, rounds: int, cold_cache: bool = False):
+    latencies = []
+    for _ in range(rounds):
+        for message in CORPUS:
+            if cold_cache:
+                _parse_date_phrase.cache_clear()
+            start = time.perf_counter()
+            await service.extract(message)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return latencies
+
+
+def report(name: str, first_ms: float, latencies):
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[int(len(latencies) * 0.95)]
+    mean = sum(latencies) / len(latencies)
+    print(f"{name:<9}first call {first_ms:8.2f} ms | mean {mean:7.3f} ms | p50 {p50:7.3f} ms | p95 {p95:7.3f} ms")
+
+
+async def main():
+    legacy, fast = LegacyRegexNLPService(), RegexNLPService()
+
+    print(f"Benchmarking NLP extraction on {len(CORPUS)} messages x {ROUNDS} rounds\n")
+
+    start = time.perf_counter()
+    await legacy.extract(CORPUS[0])
+    legacy_first = (time.perf_counter() - start) * 1000
+    legacy_latencies = await run(legacy, ROUNDS)
+
+    # The app warms dateparser at startup, so do the same here
+    warm_up_date_parser()
+    start = time.perf_counter()
+    await fast.extract(CORPUS[0])
+    fast_first = (time.perf_counter() - start) * 1000
+    # Every phrase missing the date cache: fast formats + restricted dateparser only
+    cold_latencies = await run(fast, ROUNDS, cold_cache=True)
+    # The same corpus every round, so after the first round every date phrase is a cache hit
+    warm_latencies = await run(fast, ROUNDS)
+
+    report("legacy", legacy_first, legacy_latencies)
+    report("cold", fast_first, cold_latencies)
+    report("warm", fast_first, warm_latencies)
+
+    # A real message rarely repeats a date phrase seen moments ago, so the
+    # cold figure is the one to quote. The warm one shows what the cache adds.
+    print(f"\nSpeedup (mean, cold date cache): {sum(legacy_latencies) / sum(cold_latencies):.1f}x")
+    print(f"Speedup (mean, warm date cache): {sum(legacy_latencies) / sum(warm_latencies):.1f}x")
+
+    # The fast engine must extract the same fields. Locations are compared as
+    # IATA codes, the way /chat normalizes them.
+    def normalized(trip: TripExtraction) -> dict:
+        data = trip.model_dump()
+        for field in ("origin", "destination"):
+            data[field] = normalize_to_iata(data[field])
+        return data
+
+    mismatches = 0
+    for message in CORPUS:
+        old = normalized(await legacy.extract(message))
+        new = normalized(await fast.extract(message))
+        if old != new:
+            mismatches += 1
+            print(f"❌ Mismatch for {message!r}\n   legacy: {old}\n   fast:   {new}")
+    if not mismatches:
+        print("✅ Both engines extract identical fields for every message")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
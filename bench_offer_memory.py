@@ -0,0 +1,139 @@
+import gc
+import sys
+import time
+import tracemalloc
+from typing import List, Optional
+from pydantic import BaseModel
+from app.models import recommendation
+
+# A busy /chat request: a max=250 direct search, connecting legs joined
+# across a few routes, plus hotel and car results and the scored bundles
+DIRECT_OFFERS = 250
+CONNECTING_ITINERARIES = 200
+HOTELS = 60
+CARS = 15
+BUNDLES = 3
+ROUNDS = 20
+
+
+# The models as they were before, for comparison
+class LegInfo(BaseModel):
+    airline: str
+    origin: str
+    destination: str
+    departure: str
+    arrival: str
+
+class FlightOffer(BaseModel):
+    airline: str
+    price: int
+    departure: str
+    arrival: str
+    layovers: int
+    legs: Optional[List[LegInfo]] = None
+    via: Optional[str] = None
+    return_date: Optional[str] = None
+
+class HotelOffer(BaseModel):
+    name: str
+    price_per_night: int
+    rating: float
+    distance_km: float
+
+class CarRentalOffer(BaseModel):
+    company: str
+    car_type: str
+    price_per_day: int
+    rating: float
+
+class TripBundle(BaseModel):
+    flight: FlightOffer
+    hotel: HotelOffer
+    car_rental: Optional[CarRentalOffer] = None
+    total_price: int
+    score: float
+    reasoning: str
+
+
+def build_request(models) -> list:
+    """Every offer and bundle one request creates, kept alive like the request does."""
+    objects = []
+    for i in range(DIRECT_OFFERS):
+        legs = None
+        if i % 2:  # About half of the offers have a stop, with per-segment legs
+            legs = [
+                models.LegInfo(airline="ET", origin="HRE", destination="ADD",
+                               departure=f"2026-12-01T{i % 12:02d}:10:00", arrival=f"2026-12-01T{i % 12 + 4:02d}:40:00"),
+                models.LegInfo(airline="ET", origin="ADD", destination="LHR",
+                               departure=f"2026-12-01T{i % 12 + 7:02d}:00:00", arrival=f"2026-12-02T0{i % 9}:30:00"),
+            ]
+        objects.append(models.FlightOffer(
+            airline="Airline ET", price=600 + i, departure=f"2026-12-01T{i % 12:02d}:10:00",
+            arrival=f"2026-12-02T0{i % 9}:30:00", layovers=1 if legs else 0, legs=legs
+        ))
+    for i in range(CONNECTING_ITINERARIES):
+        hub = ("DXB", "DOH", "IST", "ADD")[i % 4]
+        legs = [
+            models.LegInfo(airline="EK", origin="HRE", destination=hub,
+                           departure="2026-12-01T08:00:00", arrival="2026-12-01T14:00:00"),
+            models.LegInfo(airline="EK", origin=hub, destination="LHR",
+                           departure="2026-12-01T17:00:00", arrival="2026-12-02T06:00:00"),
+        ]
+        objects.append(models.FlightOffer(
+            airline="EK + EK", price=900 + i, departure=legs[0].departure, arrival=legs[-1].arrival,
+            layovers=1, via=hub, legs=legs
+        ))
+    hotels = [
+        models.HotelOffer(name=f"Hotel {i}", price_per_night=80 + i, rating=3.5 + (i % 15) / 10, distance_km=1.5)
+        for i in range(HOTELS)
+    ]
+    cars = [
+        models.CarRentalOffer(company=f"Rental {i}", car_type="Economy", price_per_day=40 + i, rating=4.1)
+        for i in range(CARS)
+    ]
+    objects.extend(hotels)
+    objects.extend(cars)
+    for i in range(BUNDLES):
+        objects.append(models.TripBundle(
+            flight=objects[i], hotel=hotels[i], car_rental=cars[i],
+            total_price=2000 + i, score=90.0 - i, reasoning="Flight with Airline ET and Hotel."
+        ))
+    return objects
+
+
+def measure(models):
+    """(retained KB, peak KB, allocated blocks, ms) for building one request's objects."""
+    build_request(models)  # Keep one-off first-use allocations out of the numbers
+    gc.collect()
+    tracemalloc.start()
+    objects = build_request(models)
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    del objects
+
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        build_request(models)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return current / 1024, peak / 1024, blocks, timings[len(timings) // 2]
+
+
+def main():
+    legacy = sys.modules[__name__]
+    offers = DIRECT_OFFERS + CONNECTING_ITINERARIES + HOTELS + CARS
+    print(f"Building one request's objects: {offers} offers + {BUNDLES} bundles, build time p50 over {ROUNDS} rounds\n")
+
+    old = measure(legacy)
+    new = measure(recommendation)
+    for name, (retained, peak, blocks, ms) in (("pydantic", old), ("dataclass", new)):
+        print(f"{name:<10}retained {retained:8.1f} KB | peak {peak:8.1f} KB | live blocks {blocks:7d} | build {ms:6.2f} ms")
+
+    print(f"\nSaved per request: {old[0] - new[0]:.1f} KB retained ({old[0] / new[0]:.1f}x), "
+          f"{old[2] - new[2]} live allocations, build {old[3] / new[3]:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -27,6 +27,7 @@ export default ({ config }: ConfigContext): ExpoConfig => ({
     extra: {
         API_BASE_URL: process.env.API_BASE_URL || "http://localhost:8000",
         USE_MOCKS: process.env.USE_MOCKS === "true",
+        USE_STREAMING: process.env.USE_STREAMING === "true",
     },
     scheme: "travelbuddie",
     plugins: ["expo-router"],
@@ -5,12 +5,14 @@
 
 import axios, { AxiosInstance, AxiosError } from "axios";
 import Constants from "expo-constants";
-import { ChatRequest, ChatResponse, TripBundle } from "./types";
+import { ChatRequest, ChatResponse, ChatStreamEvent, TripBundle } from "./types";
 
 // Get config from app.config.ts extra fields
 const API_BASE_URL =
     Constants.expoConfig?.extra?.API_BASE_URL || "http://localhost:8000";
 const USE_MOCKS = Constants.expoConfig?.extra?.USE_MOCKS || false;
+export const USE_STREAMING =
+    Constants.expoConfig?.extra?.USE_STREAMING || false;
 
 // Create axios instance
 export const api: AxiosInstance = axios.create({
@@ -133,9 +135,14 @@ const mockCompleteResponse: ChatResponse = {
 
 /**
  * Send a chat message to the backend
- * Returns parsed response with recommendations if available
+ * Returns parsed response with recommendations if available.
+ * Pass the conversation_id from the previous reply so follow-ups only need
+ * to supply the missing details.
  */
-export const postChat = async (message: string): Promise<ChatResponse> => {
+export const postChat = async (
+    message: string,
+    conversationId?: string
+): Promise<ChatResponse> => {
     // Use mock data in development
     if (USE_MOCKS) {
         console.log("[API] Using mock data");
@@ -155,11 +162,115 @@ export const postChat = async (message: string): Promise<ChatResponse> => {
     }
 
     // Real API call
-    const request: ChatRequest = { message };
+    const request: ChatRequest = { message, conversation_id: conversationId };
     const response = await api.post<ChatResponse>("/chat", request);
     return response.data;
 };
 
+/**
+ * Parse complete SSE frames out of a text buffer.
+ * Returns the parsed events and whatever trailing partial frame is left.
+ */
+const parseSSE = (
+    buffer: string
+): { events: ChatStreamEvent[]; rest: string } => {
+    const frames = buffer.split("\n\n");
+    const rest = frames.pop() ?? "";
+    const events: ChatStreamEvent[] = [];
+
+    for (const frame of frames) {
+        let event = "message";
+        let data = "";
+        for (const line of frame.split("\n")) {
+            if (line.startsWith("event:")) event = line.slice(6).trim();
+            else if (line.startsWith("data:")) data += line.slice(5).trim();
+        }
+        if (data) {
+            events.push({ event, data: JSON.parse(data) } as ChatStreamEvent);
+        }
+    }
+    return { events, rest };
+};
+
+/**
+ * Send a chat message to the streaming endpoint.
+ * onEvent is called for each partial result (extraction, hotels, flights
+ * per hub, bundles, visa...) as the backend produces it. Uses XHR progress
+ * events because React Native's fetch can't read a response body as a stream.
+ */
+export const streamChat = (
+    message: string,
+    onEvent: (event: ChatStreamEvent) => void,
+    conversationId?: string
+): Promise<void> => {
+    if (USE_MOCKS) {
+        return postChat(message).then((response) => {
+            if (response.extracted_data) {
+                onEvent({
+                    event: "extraction",
+                    data: {
+                        extracted_data: response.extracted_data,
+                        conversation_id: conversationId ?? "mock",
+                    },
+                });
+            }
+            if (response.recommendations) {
+                onEvent({
+                    event: "bundles",
+                    data: {
+                        message: response.message,
+                        recommendations: response.recommendations,
+                    },
+                });
+            } else {
+                onEvent({ event: "message", data: response });
+            }
+            onEvent({ event: "done", data: {} });
+        });
+    }
+
+    return new Promise((resolve, reject) => {
+        const xhr = new XMLHttpRequest();
+        let seen = 0;
+        let buffer = "";
+
+        const drain = () => {
+            buffer += xhr.responseText.slice(seen);
+            seen = xhr.responseText.length;
+            const { events, rest } = parseSSE(buffer);
+            buffer = rest;
+            events.forEach(onEvent);
+        };
+
+        console.log("[API] POST /chat/stream");
+        xhr.open("POST", `${API_BASE_URL}/chat/stream`);
+        xhr.setRequestHeader("Content-Type", "application/json");
+        xhr.setRequestHeader("Accept", "text/event-stream");
+        xhr.timeout = 60000;
+        xhr.onprogress = drain;
+        xhr.onload = () => {
+            if (xhr.status >= 200 && xhr.status < 300) {
+                drain();
+                resolve();
+            } else {
+                console.error("[API] Response error:", xhr.status);
+                reject(new Error(`Request failed with status ${xhr.status}`));
+            }
+        };
+        xhr.onerror = () => {
+            console.error("[API] Network error - no response received");
+            reject(new Error("Network error"));
+        };
+        xhr.ontimeout = () => reject(new Error("Request timed out"));
+
+        const request: ChatRequest = {
+            message,
+            conversation_id: conversationId,
+        };
+        xhr.send(JSON.stringify(request));
+    });
+};
+
 /**
  * Health check endpoint
  */
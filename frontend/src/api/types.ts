@@ -23,6 +23,7 @@ export interface TripExtraction {
     travelers: number | null;
     budget: number | null;
     nationality: string | null;
+    flexible_days?: number | null;
     reply_message: string | null;
     missing_fields: string[];
 }
@@ -43,8 +44,10 @@ export interface FlightOffer {
     departure?: string;
     arrival?: string;
     layovers: number;
-    legs?: LegInfo[];
-    via?: string;
+    legs?: LegInfo[] | null;
+    via?: string | null;
+    departure_date?: string | null; // Recommendations from flexible-date searches only
+    return_date?: string | null; // Flexible-date searches only
 }
 
 // Hotel Offer
@@ -67,7 +70,7 @@ export interface CarRentalOffer {
 export interface TripBundle {
     flight: FlightOffer;
     hotel: HotelOffer;
-    car_rental?: CarRentalOffer;
+    car_rental?: CarRentalOffer | null;
     total_price: number;
     score?: number;
     reasoning: string;
@@ -83,27 +86,60 @@ export interface VisaInfo {
     notes: string | null;
 }
 
+// Cheapest round trip per departure date (flexible-date searches)
+export interface PriceCalendarDay {
+    departure_date: string;
+    return_date: string;
+    price: number;
+}
+
 // API Request/Response Types
 export interface ChatRequest {
     message: string;
+    conversation_id?: string;
 }
 
 export interface ChatResponse {
     message: string;
     recommendations?: TripBundle[];
     extracted_data?: TripExtraction;
-    missing_fields?: string[];
-    visa_info?: VisaInfo;
+    missing_fields?: string[] | null;
+    visa_info?: VisaInfo | null;
+    conversation_id?: string;
+    price_calendar?: PriceCalendarDay[] | null;
 }
 
+// Server-Sent Events from POST /chat/stream, in arrival order:
+// extraction, then hotels / cars / hub_flights / flights as each search
+// finishes, then bundles, visa and done. "message" replaces everything
+// after extraction when details are missing.
+export type ChatStreamEvent =
+    | {
+          event: "extraction";
+          data: { extracted_data: TripExtraction; conversation_id: string };
+      }
+    | { event: "message"; data: ChatResponse }
+    | { event: "hotels"; data: { hotels: HotelOffer[] } }
+    | { event: "cars"; data: { cars: CarRentalOffer[] } }
+    | { event: "hub_flights"; data: { via: string; flights: FlightOffer[] } }
+    | { event: "flights"; data: { flights: FlightOffer[]; connecting: boolean } }
+    | {
+          event: "bundles";
+          data: { message: string; recommendations: TripBundle[]; price_calendar?: PriceCalendarDay[] | null };
+      }
+    | { event: "visa"; data: { visa_info: VisaInfo } }
+    | { event: "done"; data: Record<string, never> };
+
 // Recommendation Display (formatted for UI)
 export interface FormattedRecommendation {
     flight: {
         airline: string;
         price: number;
         layovers: number;
-        via?: string;
-        legs?: LegInfo[];
+        via?: string | null;
+        legs?: LegInfo[] | null;
+        departure_date?: string | null;
+        return_date?: string | null;
     };
     hotel: {
         name: string;
@@ -114,7 +150,7 @@ export interface FormattedRecommendation {
         company: string;
         car_type: string;
         price_per_day: number;
-    };
+    } | null;
     total_price: number;
     reasoning: string;
 }
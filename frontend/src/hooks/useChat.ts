@@ -6,8 +6,8 @@
 import { useCallback } from "react";
 import { v4 as uuidv4 } from "uuid";
 import { useChatStore } from "../store/chatStore";
-import { postChat } from "../api/client";
-import { Message, TripBundle } from "../api/types";
+import { postChat, streamChat, USE_STREAMING } from "../api/client";
+import { ChatStreamEvent, Message, TripBundle } from "../api/types";
 
 export const useChat = () => {
     const {
@@ -15,17 +15,120 @@ export const useChat = () => {
         recommendations,
         extractedData,
         visaInfo,
+        conversationId,
         isLoading,
         error,
         addMessage,
+        updateMessage,
         setRecommendations,
         setExtractedData,
         setVisaInfo,
+        setConversationId,
         setLoading,
         setError,
         resetChat,
     } = useChatStore();
 
+    /**
+     * Stream a reply: one assistant message is added up front and filled in
+     * as the backend reports progress, so partial results show immediately
+     */
+    const streamMessage = useCallback(
+        async (text: string) => {
+            const assistantId = uuidv4();
+            addMessage({
+                id: assistantId,
+                role: "assistant",
+                content: "🔎 Searching...",
+                timestamp: new Date(),
+            });
+
+            const found: string[] = [];
+            const handleEvent = (event: ChatStreamEvent) => {
+                switch (event.event) {
+                    case "extraction":
+                        setConversationId(event.data.conversation_id);
+                        setExtractedData(event.data.extracted_data);
+                        updateMessage(assistantId, {
+                            extractedData: event.data.extracted_data,
+                        });
+                        break;
+                    case "message":
+                        updateMessage(assistantId, {
+                            content: event.data.message,
+                            extractedData: event.data.extracted_data,
+                        });
+                        break;
+                    case "hotels":
+                        found.push(`${event.data.hotels.length} hotels`);
+                        break;
+                    case "cars":
+                        found.push(`${event.data.cars.length} cars`);
+                        break;
+                    case "hub_flights":
+                        found.push(`flights via ${event.data.via}`);
+                        break;
+                    case "flights":
+                        found.push(`${event.data.flights.length} flights`);
+                        break;
+                    case "bundles": {
+                        const recommendations = transformRecommendations(
+                            event.data.recommendations
+                        );
+                        updateMessage(assistantId, {
+                            content: event.data.message,
+                            recommendations: recommendations.length
+                                ? recommendations
+                                : undefined,
+                        });
+                        if (recommendations.length > 0) {
+                            setRecommendations(recommendations);
+                        }
+                        return;
+                    }
+                    case "visa":
+                        setVisaInfo(event.data.visa_info);
+                        updateMessage(assistantId, {
+                            visaInfo: event.data.visa_info,
+                        });
+                        return;
+                    default:
+                        return;
+                }
+                if (found.length > 0) {
+                    updateMessage(assistantId, {
+                        content: `🔎 Searching... found ${found.join(", ")}`,
+                    });
+                }
+            };
+
+            try {
+                await streamChat(text, handleEvent, conversationId ?? undefined);
+            } catch (err) {
+                const errorMessage =
+                    err instanceof Error ? err.message : "Something went wrong";
+                setError(errorMessage);
+                updateMessage(assistantId, {
+                    content:
+                        "😔 Sorry, I couldn't process your request. Please check your connection and try again.",
+                });
+            } finally {
+                setLoading(false);
+            }
+        },
+        [
+            conversationId,
+            addMessage,
+            updateMessage,
+            setConversationId,
+            setLoading,
+            setError,
+            setExtractedData,
+            setRecommendations,
+            setVisaInfo,
+        ]
+    );
+
     /**
      * Send a message and handle the response
      */
@@ -48,9 +151,20 @@ export const useChat = () => {
             // Set loading state
             setLoading(true);
 
+            if (USE_STREAMING) {
+                await streamMessage(text);
+                return;
+            }
+
             try {
                 // Call API
-                const response = await postChat(text);
+                const response = await postChat(
+                    text,
+                    conversationId ?? undefined
+                );
+                if (response.conversation_id) {
+                    setConversationId(response.conversation_id);
+                }
 
                 // Build assistant message
                 const assistantMessage: Message = {
@@ -62,7 +176,7 @@ export const useChat = () => {
                         ? transformRecommendations(response.recommendations)
                         : undefined,
                     extractedData: response.extracted_data,
-                    visaInfo: response.visa_info,
+                    visaInfo: response.visa_info ?? undefined,
                 };
 
                 // Add assistant response
@@ -105,7 +219,10 @@ export const useChat = () => {
         },
         [
             isLoading,
+            conversationId,
+            streamMessage,
             addMessage,
+            setConversationId,
             setLoading,
             setError,
             setExtractedData,
@@ -19,6 +19,9 @@ interface ChatState {
     // Visa information
     visaInfo: VisaInfo | null;
 
+    // Server-side conversation holding the partially filled trip
+    conversationId: string | null;
+
     // Loading state
     isLoading: boolean;
 
@@ -27,9 +30,11 @@ interface ChatState {
 
     // Actions
     addMessage: (message: Message) => void;
+    updateMessage: (id: string, patch: Partial<Message>) => void;
     setRecommendations: (recommendations: TripBundle[]) => void;
     setExtractedData: (data: TripExtraction | null) => void;
     setVisaInfo: (info: VisaInfo | null) => void;
+    setConversationId: (id: string | null) => void;
     setLoading: (loading: boolean) => void;
     setError: (error: string | null) => void;
     resetChat: () => void;
@@ -50,6 +55,7 @@ export const useChatStore = create<ChatState>((set) => ({
     recommendations: [],
     extractedData: null,
     visaInfo: null,
+    conversationId: null,
     isLoading: false,
     error: null,
 
@@ -59,6 +65,14 @@ export const useChatStore = create<ChatState>((set) => ({
             messages: [...state.messages, message],
         })),
 
+    // Patch a message in place (used while a streamed reply fills in)
+    updateMessage: (id, patch) =>
+        set((state) => ({
+            messages: state.messages.map((message) =>
+                message.id === id ? { ...message, ...patch } : message
+            ),
+        })),
+
     // Update recommendations
     setRecommendations: (recommendations) =>
         set(() => ({
@@ -77,6 +91,12 @@ export const useChatStore = create<ChatState>((set) => ({
             visaInfo: info,
         })),
 
+    // Remember the conversation so follow-ups continue it
+    setConversationId: (id) =>
+        set(() => ({
+            conversationId: id,
+        })),
+
     // Set loading state
     setLoading: (loading) =>
         set(() => ({
@@ -96,6 +116,7 @@ export const useChatStore = create<ChatState>((set) => ({
             recommendations: [],
             extractedData: null,
             visaInfo: null,
+            conversationId: null,
             isLoading: false,
             error: null,
         })),
@@ -42,6 +42,8 @@ async def test_amadeus():
             
     except Exception as e:
         print(f"❌ API Call Failed: {e}")
+    finally:
+        await service.aclose()
 
 if __name__ == "__main__":
     asyncio.run(test_amadeus())